@@ -1,7 +1,7 @@
 import numpy as np
 import pandas as pd
 from alpha.base_alpha import BaseAlpha
-from binance.client import Client
+from src.interval import Interval
 
 
 class ADX(BaseAlpha):
@@ -9,7 +9,7 @@ class ADX(BaseAlpha):
     TRADING_PAIR = "BTCUSDT"
     START_DATE = "2022-01-01"
     END_DATE = "2022-12-31"
-    KLINE_INTERVAL = Client.KLINE_INTERVAL_1HOUR
+    KLINE_INTERVAL = Interval.HOUR_1
     SAMPLING_INTERVALS = [1, 2, 3, 4, 5, 6, 7, 8, 9, 10, 11, 12, 13, 14, 15, 16, 17, 18, 19, 20]  # 根據 KLINE_INTERVAL 設定採樣 K 棒間隔
     ADX_LENGTH = 12
 
@@ -67,6 +67,9 @@ class ADX(BaseAlpha):
             if column not in df.columns:
                 df[column] = None
 
+        # 價格波動真實範圍由共用指標圖計算
+        true_range = self.indicator(df, "true_range")
+
         # 計算指標邏輯
         def calculate_row(row, df):
             # 取得當前行索引
@@ -78,10 +81,7 @@ class ADX(BaseAlpha):
 
             # 計算指標
             # 價格波動真實範圍
-            row["true_range"] = np.maximum(
-                np.maximum(row["high"] - row["low"], np.abs(row["high"] - df["close"].iloc[index - 1])),
-                np.abs(row["low"] - df["close"].iloc[index - 1]),
-            )
+            row["true_range"] = true_range.iloc[index]
 
             # 如果當前的高點突破前一根 K 線的高點幅度大於低點的跌破幅度，則計算 DM+，否則為 0
             row["directional_movement_plus"] = np.where(
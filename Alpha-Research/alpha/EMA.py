@@ -1,6 +1,6 @@
 import pandas as pd
 from alpha.base_alpha import BaseAlpha
-from binance.client import Client
+from src.interval import Interval
 
 
 class EMACross(BaseAlpha):
@@ -8,7 +8,7 @@ class EMACross(BaseAlpha):
     TRADING_PAIR = "BTCUSDT"
     START_DATE = "2022-06-01"
     END_DATE = "2022-12-26"
-    KLINE_INTERVAL = Client.KLINE_INTERVAL_1HOUR   # 改k bar 
+    KLINE_INTERVAL = Interval.HOUR_1   # 改k bar 
     SAMPLING_INTERVALS = [1, 2, 3, 4, 5, 6, 7, 8, 9, 10, 11, 12, 13, 14, 15, 16, 17, 18, 19, 20]
     
     # EMA Parameters
@@ -37,10 +37,6 @@ class EMACross(BaseAlpha):
 
         return columns
 
-    def calculate_ema(self, data, period):
-        """Calculate Exponential Moving Average"""
-        return data.ewm(span=period, adjust=False).mean()
-
     def alpha(self, rolling_window_df, current_time, generate_sampling_points):
         """
         EMA Crossover Alpha Strategy
@@ -53,9 +49,9 @@ class EMACross(BaseAlpha):
         if "ema_slow" not in df.columns:
             df["ema_slow"] = None
 
-        # Calculate EMAs
-        df["ema_fast"] = self.calculate_ema(df["close"], self.EMA_FAST)
-        df["ema_slow"] = self.calculate_ema(df["close"], self.EMA_SLOW)
+        # Calculate EMAs (shared indicator graph)
+        df["ema_fast"] = self.indicator(df, "ema", span=self.EMA_FAST)
+        df["ema_slow"] = self.indicator(df, "ema", span=self.EMA_SLOW)
 
         # Need at least two data points to check for crossover
         if len(df) >= 2:
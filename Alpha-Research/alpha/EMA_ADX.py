@@ -1,7 +1,7 @@
 import pandas as pd
 import numpy as np
 from alpha.base_alpha import BaseAlpha
-from binance.client import Client
+from src.interval import Interval
 
 
 class EMA_ADX(BaseAlpha):
@@ -9,7 +9,7 @@ class EMA_ADX(BaseAlpha):
     TRADING_PAIR = "BTCUSDT"
     START_DATE = "2020-01-01"
     END_DATE = "2022-12-31"
-    KLINE_INTERVAL = Client.KLINE_INTERVAL_1HOUR
+    KLINE_INTERVAL = Interval.HOUR_1
     SAMPLING_INTERVALS = [1, 2, 3, 4, 5, 6, 7, 8, 9, 10, 11, 12, 13, 14, 15, 16, 17, 18, 19, 20]
     
     # Strategy Parameters
@@ -42,21 +42,13 @@ class EMA_ADX(BaseAlpha):
 
         return columns
 
-    def calculate_ema(self, data, period):
-        """Calculate Exponential Moving Average"""
-        return data.ewm(span=period, adjust=False).mean()
-
     def calculate_adx(self, df):
         """Calculate ADX, +DI, and -DI"""
         high = df['high']
         low = df['low']
-        close = df['close']
         
-        # Calculate True Range (TR)
-        df['tr1'] = abs(high - low)
-        df['tr2'] = abs(high - close.shift(1))
-        df['tr3'] = abs(low - close.shift(1))
-        df['tr'] = df[['tr1', 'tr2', 'tr3']].max(axis=1)
+        # Calculate True Range (TR) via the shared indicator graph
+        df['tr'] = self.indicator(df, 'true_range')
         
         # Calculate directional movement
         df['up_move'] = high - high.shift(1)
@@ -118,9 +110,9 @@ class EMA_ADX(BaseAlpha):
             # Calculate ADX and directional indicators
             df['adx'], df['+di'], df['-di'] = self.calculate_adx(df)
             
-            # Calculate EMAs
-            df['ema_fast'] = self.calculate_ema(df['close'], self.EMA_FAST)
-            df['ema_slow'] = self.calculate_ema(df['close'], self.EMA_SLOW)
+            # Calculate EMAs (shared indicator graph)
+            df['ema_fast'] = self.indicator(df, 'ema', span=self.EMA_FAST)
+            df['ema_slow'] = self.indicator(df, 'ema', span=self.EMA_SLOW)
 
             # Get current values
             current_adx = df['adx'].iloc[-1]
@@ -1,7 +1,7 @@
 import pandas as pd
 import numpy as np
 from alpha.base_alpha import BaseAlpha
-from binance.client import Client
+from src.interval import Interval
 
 
 class KeltnerChannel(BaseAlpha):
@@ -9,7 +9,7 @@ class KeltnerChannel(BaseAlpha):
     TRADING_PAIR = "1000PEPEUSDT"
     START_DATE = "2024-01-01"
     END_DATE = "2024-12-31"
-    KLINE_INTERVAL = Client.KLINE_INTERVAL_1DAY 
+    KLINE_INTERVAL = Interval.DAY_1 
     SAMPLING_INTERVALS = [1, 2, 3, 4, 5, 6, 7, 8, 9, 10, 11, 12, 13, 14, 15, 16, 17, 18, 19, 20]
     KC_LENGTH = 35
     KC_MULT = 1.7
@@ -43,14 +43,6 @@ class KeltnerChannel(BaseAlpha):
 
         return columns
 
-    def calculate_tr(self, high, low, prev_close):
-        """Calculate True Range"""
-        return max(
-            high - low,
-            abs(high - prev_close),
-            abs(low - prev_close)
-        )
-
     def calculate_ema(self, series, length):
         """Calculate Exponential Moving Average"""
         alpha = 2 / (length + 1)
@@ -85,6 +77,9 @@ class KeltnerChannel(BaseAlpha):
             if column not in df.columns:
                 df[column] = None
 
+        # True Range from the shared indicator graph
+        true_range = self.indicator(df, "true_range")
+
         # Calculate indicators for uncalculated rows
         def calculate_row(row, df):
             index = row.name
@@ -94,11 +89,7 @@ class KeltnerChannel(BaseAlpha):
                 return row
 
             # Calculate True Range
-            row["tr"] = self.calculate_tr(
-                row["high"],
-                row["low"],
-                df["close"].iloc[index - 1]
-            )
+            row["tr"] = true_range.iloc[index]
 
             # Mark as calculated
             row["calculated"] = True
@@ -116,7 +107,7 @@ class KeltnerChannel(BaseAlpha):
             df["atr"] = df["tr"].rolling(window=self.KC_LENGTH).mean()
 
             # Calculate EMA (KC Middle Line)
-            df["ema"] = self.calculate_ema(df["close"], self.KC_LENGTH)
+            df["ema"] = self.indicator(df, "ema", span=self.KC_LENGTH)
 
             # Calculate KC Bands
             df["kc_middle"] = df["ema"]
@@ -124,8 +115,8 @@ class KeltnerChannel(BaseAlpha):
             df["kc_lower"] = df["kc_middle"] - (self.KC_MULT * df["atr"])
 
             # Calculate MACD
-            ema6 = self.calculate_ema(df["close"], 6)
-            ema14 = self.calculate_ema(df["close"], 14)
+            ema6 = self.indicator(df, "ema", span=6)
+            ema14 = self.indicator(df, "ema", span=14)
             df["macd"] = ema6 - ema14
             df["macd_signal"] = self.calculate_ema(df["macd"], 8)
 
@@ -1,7 +1,7 @@
 import numpy as np
 import pandas as pd
 from alpha.base_alpha import BaseAlpha
-from binance.client import Client
+from src.interval import Interval
 
 
 class StochasticOscillator(BaseAlpha):
@@ -9,7 +9,7 @@ class StochasticOscillator(BaseAlpha):
     TRADING_PAIR = "BTCUSDT"
     START_DATE = "2022-01-01"
     END_DATE = "2022-12-31"
-    KLINE_INTERVAL = Client.KLINE_INTERVAL_4HOUR
+    KLINE_INTERVAL = Interval.HOUR_4
     SAMPLING_INTERVALS = [1, 2, 3, 4, 5, 6, 7, 8, 9, 10, 11, 12, 13, 14, 15]  # 根據 KLINE_INTERVAL 設定採樣 K 棒間隔
     
     # KD 指標參數
@@ -1,6 +1,6 @@
 import pandas as pd
 from alpha.base_alpha import BaseAlpha
-from binance.client import Client
+from src.interval import Interval
 
 
 class RSI(BaseAlpha):
@@ -8,7 +8,7 @@ class RSI(BaseAlpha):
     TRADING_PAIR = "USDT"
     START_DATE = "2021-01-01"
     END_DATE = "2025-02-26"
-    KLINE_INTERVAL = Client.KLINE_INTERVAL_1DAY
+    KLINE_INTERVAL = Interval.DAY_1
     SAMPLING_INTERVALS = [1, 2, 3, 4, 5, 6, 7, 8, 9, 10, 11, 12, 13, 14, 15, 16, 17, 18, 19, 20]
     RSI_LENGTH = 12
     NOTE = ""
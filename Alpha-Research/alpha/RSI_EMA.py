@@ -1,7 +1,7 @@
 import pandas as pd
 import numpy as np
 from alpha.base_alpha import BaseAlpha
-from binance.client import Client
+from src.interval import Interval
 
 
 class EnhancedRSI(BaseAlpha):
@@ -9,7 +9,7 @@ class EnhancedRSI(BaseAlpha):
     TRADING_PAIR = "BTCUSDT"
     START_DATE = "2022-01-01"
     END_DATE = "2022-12-26"
-    KLINE_INTERVAL = Client.KLINE_INTERVAL_30MINUTE
+    KLINE_INTERVAL = Interval.MINUTE_30
     SAMPLING_INTERVALS = [1, 2, 3, 4, 5, 6, 7, 8, 9, 10, 11, 12, 13, 14, 15, 16, 17, 18, 19, 20]
     
     # Strategy Parameters
@@ -45,10 +45,6 @@ class EnhancedRSI(BaseAlpha):
 
         return columns
 
-    def calculate_ema(self, data, period):
-        """Calculate Exponential Moving Average"""
-        return data.ewm(span=period, adjust=False).mean()
-
     def calculate_volatility(self, data, window):
         """Calculate Rolling Volatility"""
         return data['close'].pct_change().rolling(window=window).std()
@@ -102,9 +98,9 @@ class EnhancedRSI(BaseAlpha):
             
             df.at[df.index[-1], "rsi"] = rsi
 
-            # Calculate EMAs
-            df["ema_fast"] = self.calculate_ema(df["close"], self.EMA_FAST)
-            df["ema_slow"] = self.calculate_ema(df["close"], self.EMA_SLOW)
+            # Calculate EMAs (shared indicator graph)
+            df["ema_fast"] = self.indicator(df, "ema", span=self.EMA_FAST)
+            df["ema_slow"] = self.indicator(df, "ema", span=self.EMA_SLOW)
 
             # Calculate Volatility
             df["volatility"] = self.calculate_volatility(df, self.VOLATILITY_WINDOW)
@@ -1,6 +1,6 @@
 import pandas as pd
 from alpha.base_alpha import BaseAlpha
-from binance.client import Client
+from src.interval import Interval
 
 
 class ATR(BaseAlpha):
@@ -8,7 +8,7 @@ class ATR(BaseAlpha):
     TRADING_PAIR = "SANDUSDT"
     START_DATE = "2021-01-01"
     END_DATE = "2025-02-26"
-    KLINE_INTERVAL = Client.KLINE_INTERVAL_1DAY
+    KLINE_INTERVAL = Interval.DAY_1
     SAMPLING_INTERVALS = [1, 2, 3, 4, 5, 6, 7, 8, 9, 10, 11, 12, 13, 14, 15]  # 根據 KLINE_INTERVAL 設定採樣 K 棒間隔
     ATR_LENGTH = 14
     NOTE = ""  # 備註 note 於檔名
@@ -45,6 +45,9 @@ class ATR(BaseAlpha):
             if column not in df.columns:
                 df[column] = None
 
+        # 真實波動幅度由共用指標圖計算
+        true_range = self.indicator(df, "true_range")
+
         # 計算指標邏輯（row 為當前行, df 為 rolling_window_df）
         def calculate_row(row, df):
             # 取得當前行索引
@@ -58,7 +61,7 @@ class ATR(BaseAlpha):
             row["high_low"] = row["high"] - row["low"]
             row["high_close"] = abs(row["high"] - df["close"].iloc[index - 1])
             row["low_close"] = abs(row["low"] - df["close"].iloc[index - 1])
-            row["tr"] = max(row["high_low"], row["high_close"], row["low_close"])
+            row["tr"] = true_range.iloc[index]
             row["calculated"] = True
 
             return row
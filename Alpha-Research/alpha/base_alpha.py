@@ -1,5 +1,9 @@
 from abc import ABC, abstractmethod
-from binance.client import Client
+import pandas as pd
+from src.interval import Interval
+from src.alpha_expr import compile_formula
+from src.indicator_graph import indicator_graph
+from src.schema import build_schema
 
 
 class BaseAlpha(ABC):
@@ -11,13 +15,34 @@ class BaseAlpha(ABC):
     TRADING_PAIR = "BTCUSDT"
     START_DATE = "2024-12-01"
     END_DATE = "2024-12-04"
-    KLINE_INTERVAL = Client.KLINE_INTERVAL_15MINUTE
+    KLINE_INTERVAL = Interval.MINUTE_15
     SAMPLING_INTERVALS = [1, 2, 3, 4, 5, 6, 7, 8, 9]  # 根據 KLINE_INTERVAL 設定採樣 K 棒間隔
     NOTE = ""  # 備註 note 於檔名
+    PATH_LABELS = False  # 是否加入 MFE / MAE 與三重障礙欄位（見 src/labels.py）
+    TAKE_PROFIT = None  # 三重障礙停利報酬，例如 0.01
+    STOP_LOSS = None  # 三重障礙停損報酬
+    COLUMN_DTYPES = {}  # 覆寫採樣欄位型別（預設規則見 src/schema.py），例如 {"regime": "int8"}
 
     def __init__(self):
         pass
 
+    def get_schema(self):
+        """
+        採樣欄位的型別，Sampling 依此預先配置型別化陣列
+        :return: 欄位 -> dtype
+        """
+        return build_schema(self.get_columns(), self.COLUMN_DTYPES)
+
+    def indicator(self, df, name, source="close", **params):
+        """
+        從共用指標圖取得指標，同一根 K 棒內相同 (name, params, source) 只計算一次
+        :param df: rolling window DataFrame
+        :param name: 指標名稱，例如 ema、sma、true_range、atr
+        :param source: 來源欄位
+        :return: 與 df 對齊的 Series（共用物件，請勿直接修改）
+        """
+        return indicator_graph.get(df, name, source, consumer=type(self).__name__, **params)
+
     @abstractmethod
     def alpha(self, rolling_window_df, current_time, generate_sampling_points):
         """
@@ -28,3 +53,67 @@ class BaseAlpha(ABC):
         :return: 新的採樣點字典（如果有），否則返回 None
         """
         pass
+
+
+class FormulaAlpha(BaseAlpha):
+    """
+    以公式字串定義的 Alpha，子類只需設定 FORMULA（語法見 src/alpha_expr.py）
+
+    公式值由下往上穿越 THRESHOLD 時做多、由上往下穿越 -THRESHOLD 時做空
+    """
+
+    FORMULA = ""
+    THRESHOLD = 0.0
+
+    def __init__(self):
+        super().__init__()
+        self.compiled = compile_formula(self.FORMULA)
+        # rolling window 為單一交易對，截面運算子（rank、scale 等）在每個時間點都是常數
+        if self.compiled.cross_sectional:
+            raise ValueError(f"{type(self).__name__}: cross-sectional operators {self.compiled.cross_sectional} need a multi-symbol panel, use ts_rank instead")
+        # main.py 依 *_LENGTH 屬性決定 rolling window 大小
+        self.FORMULA_LENGTH = self.compiled.lookback + 2
+
+    def get_columns(self):
+        """
+        自定義所有需要的列名
+
+        y_timestamp 為採樣點的時間戳 (Required)
+        """
+        columns = []
+
+        # 當下欄位
+        columns.extend(["timestamp", "price", "is_buy", "alpha_value"])
+
+        # 延遲欄位（底線後的名稱需要與 alpha function 內 df 的欄位名稱一致）
+        for i in range(1, len(self.SAMPLING_INTERVALS) + 1):
+            columns.extend([f"y{i}_timestamp", f"y{i}_open", f"y{i}_close", f"y{i}_high", f"y{i}_low", f"y{i}_alpha_value"])
+
+        return columns
+
+    def alpha(self, rolling_window_df, current_time, generate_sampling_points):
+        """
+        以批次模式計算整個 rolling window 的公式值
+        """
+        df = rolling_window_df
+        df["alpha_value"] = self.compiled.evaluate(df)
+
+        current_value = df["alpha_value"].iloc[-1]
+        prev_value = df["alpha_value"].iloc[-2]
+        if pd.isna(current_value) or pd.isna(prev_value):
+            return None, df
+
+        if prev_value <= self.THRESHOLD < current_value:
+            is_buy = True
+        elif prev_value >= -self.THRESHOLD > current_value:
+            is_buy = False
+        else:
+            return None, df
+
+        new_point = generate_sampling_points(current_time, self.KLINE_INTERVAL)
+        new_point["timestamp"] = current_time
+        new_point["price"] = df["close"].iloc[-1]
+        new_point["is_buy"] = is_buy
+        new_point["alpha_value"] = current_value
+
+        return new_point, df
@@ -1,7 +1,7 @@
 import numpy as np
 import pandas as pd
 from alpha.base_alpha import BaseAlpha
-from binance.client import Client
+from src.interval import Interval
 
 
 class FibonacciMomentumAlpha(BaseAlpha):
@@ -14,7 +14,7 @@ class FibonacciMomentumAlpha(BaseAlpha):
     TRADING_PAIR = "BTCUSDT"
     START_DATE = "2024-06-01"
     END_DATE = "2024-12-04"
-    KLINE_INTERVAL = Client.KLINE_INTERVAL_1MINUTE
+    KLINE_INTERVAL = Interval.MINUTE_1
     SAMPLING_INTERVALS = list(range(1, 21)) 
     
     FIB_RATIO = 0.618
@@ -0,0 +1,22 @@
+from alpha.base_alpha import FormulaAlpha
+from src.interval import Interval
+
+
+class FSMomentum(FormulaAlpha):
+    # Parameters
+    TRADING_PAIR = "BTCUSDT"
+    START_DATE = "2024-11-01"
+    END_DATE = "2024-12-01"
+    KLINE_INTERVAL = Interval.MINUTE_5
+    SAMPLING_INTERVALS = [1, 2, 3, 4, 5, 6, 7, 8, 9, 10, 11, 12, 13, 14, 15, 16, 17, 18, 19, 20]
+    NOTE = "Price-volume divergence formula from fsmom.ipynb"
+
+    # Formula (quintle analysis/fsmom.ipynb)
+    FORMULA = """
+        price_mom = close/ts_delay(close, 2) - 1;
+        vol_mom = volume/ts_delay(volume, 1) - 1;
+        divergence = price_mom - vol_mom;
+        fast_sig = ts_mean(divergence, 2);
+        slow_sig = ts_mean(divergence, 10);
+        combine_sig = 0.8 * fast_sig + 0.2 * slow_sig
+    """
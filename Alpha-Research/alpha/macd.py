@@ -1,5 +1,5 @@
 from alpha.base_alpha import BaseAlpha
-from binance.client import Client
+from src.interval import Interval
 
 class MACD(BaseAlpha):
     # 參數設置
@@ -7,7 +7,7 @@ class MACD(BaseAlpha):
 
     START_DATE = "2024-01-01"
     END_DATE = "2024-12-31"
-    KLINE_INTERVAL = Client.KLINE_INTERVAL_4HOUR
+    KLINE_INTERVAL = Interval.HOUR_4
     SAMPLING_INTERVALS = [1, 2, 3, 4, 5, 6, 7, 8, 9, 10, 11, 12, 13, 14, 15]  # 根據 KLINE_INTERVAL 的設定採樣 K 棒間隔
     MACD_LENGTH = 10
 
@@ -43,6 +43,10 @@ class MACD(BaseAlpha):
             if column not in df.columns:
                 df[column] = None
 
+        # EMA 由共用指標圖計算，每根 K 棒只算一次
+        ema3 = self.indicator(df, "ema", span=3)
+        ema12 = self.indicator(df, "ema", span=12)
+
         # 計算指標邏輯（row 為當前行, df 為 rolling_window_df）
         def calculate_row(row, df):
             # 取得當前行索引
@@ -53,8 +57,8 @@ class MACD(BaseAlpha):
                 return row
 
             # 計算指標
-            row["ema3"] = df["close"].ewm(span=3, adjust=False).mean().iloc[index]
-            row["ema12"] = df["close"].ewm(span=12, adjust=False).mean().iloc[index]
+            row["ema3"] = ema3.iloc[index]
+            row["ema12"] = ema12.iloc[index]
             row["macd"] = row["ema3"] - row["ema12"]
             row["signal"] = df["macd"].ewm(span=self.MACD_LENGTH, adjust=False).mean().iloc[index]
             row["calculated"] = True
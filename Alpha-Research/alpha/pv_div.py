@@ -1,6 +1,6 @@
 import pandas as pd
 from alpha.base_alpha import BaseAlpha
-from binance.client import Client
+from src.interval import Interval
 
 
 class PriceVolDivergence(BaseAlpha):
@@ -8,7 +8,7 @@ class PriceVolDivergence(BaseAlpha):
     TRADING_PAIR = "BTCUSDT"
     START_DATE = "2024-11-01"
     END_DATE = "2024-12-01"
-    KLINE_INTERVAL = Client.KLINE_INTERVAL_5MINUTE
+    KLINE_INTERVAL = Interval.MINUTE_5
     SAMPLING_INTERVALS = [1, 2, 3, 4, 5, 6, 7, 8, 9, 10, 11, 12, 13, 14, 15, 16, 17, 18, 19, 20]
     
     # Strategy Parameters
@@ -1,7 +1,7 @@
 import pandas as pd
 import numpy as np
 from alpha.base_alpha import BaseAlpha
-from binance.client import Client
+from src.interval import Interval
 
 
 class VWAPCross(BaseAlpha):
@@ -9,7 +9,7 @@ class VWAPCross(BaseAlpha):
     TRADING_PAIR = "BTCUSDT"
     START_DATE = "2024-01-12"
     END_DATE = "2024-06-12"
-    KLINE_INTERVAL = Client.KLINE_INTERVAL_5MINUTE
+    KLINE_INTERVAL = Interval.MINUTE_5
     SAMPLING_INTERVALS = [1, 2, 3, 4, 5, 6, 7, 8, 9, 10, 11, 12, 13, 14, 15, 16, 17, 18, 19, 20]
     
     # VWAP Parameters
@@ -0,0 +1,106 @@
+import os
+import sys
+import argparse
+import numpy as np
+import pandas as pd
+from pathlib import Path
+
+# Allow `python analysis/backtest.py` from any directory
+project_root = Path(os.path.dirname(os.path.abspath(__file__))).parent
+sys.path.insert(0, str(project_root))
+
+from src.data_cache import load_klines
+from src.positions import OVERLAP_MODES, overlap_adjusted_returns
+from src.backtest import DEFAULT_TAKER_FEE, DEFAULT_MAKER_FEE, DEFAULT_CAPITAL, DEFAULT_IMPACT, backtest_klines, summarize_backtest
+from src.stats_table import parse_sample_path
+
+# (metric, statistic, scale) in the printed summary; scale 100 is written as a percentage
+SUMMARY_STATS = [
+    ("Total Return", "total_return", 100),
+    ("Annual Return", "annual_return", 100),
+    ("Annual Volatility", "annual_volatility", 100),
+    ("Sharpe Ratio", "sharpe", 1),
+    ("Max Drawdown", "max_drawdown", 100),
+    ("Turnover", "turnover", 1),
+    ("Mean Exposure", "mean_exposure", 1),
+    ("Fees", "fees", 100),
+    ("Slippage", "slippage", 100),
+    ("Funding", "funding", 100),
+]
+
+def sample_positions(samples, bars, horizon, side="Combined", overlap_mode="average", cap=1.0):
+    """
+    Target position after each bar close for the samples held over y{horizon}
+    The position engine gives the exposure held during each bar, so it is shifted back one bar
+    """
+    exit_column = f"y{horizon}_timestamp"
+    if exit_column not in samples.columns:
+        raise ValueError(f"Missing required column: {exit_column}")
+    overlap = overlap_adjusted_returns(bars, samples[["timestamp", "is_buy", exit_column]], overlap_mode, cap)
+    held = overlap[side]["exposure"][:, 0]
+    return np.r_[held[1:], 0.0]
+
+def backtest_file(file_path, horizon, side="Combined", overlap_mode="average", cap=1.0, funding_file=None, **kwargs):
+    """Backtest the positions of one sample file and write <sample>_backtest_y{horizon}.parquet"""
+    info = parse_sample_path(file_path)
+    samples = pd.read_csv(file_path)
+    last_exit = pd.to_datetime(samples[f"y{horizon}_timestamp"]).max()
+    end = max(pd.Timestamp(info["end_date"]), last_exit.normalize())
+    bars = load_klines(info["exchange"], info["trading_pair"], info["interval"], info["start_date"], end.strftime("%Y-%m-%d"))
+    if bars.empty:
+        raise ValueError(f"No klines found for {info['exchange']} {info['trading_pair']} {info['interval']}")
+    bars = bars.sort_values("close_time", kind="stable").reset_index(drop=True)
+
+    positions = sample_positions(samples, bars, horizon, side, overlap_mode, cap)
+    funding_rates = pd.read_csv(funding_file) if funding_file else None
+    result = backtest_klines(bars, positions, funding_rates, **kwargs)
+
+    # Parquet, so pnl_graph does not pick the series up as a sample file
+    output_file = f"{os.path.splitext(file_path)[0]}_backtest_y{horizon}.parquet"
+    result.to_parquet(output_file, index=False)
+    try:
+        summary = summarize_backtest(result, info["interval"])
+    except ValueError:
+        # Information bars have no fixed length, report per-bar figures
+        summary = summarize_backtest(result)
+
+    print(f"\nBacktest: {os.path.basename(file_path)} (y{horizon}, {side}, {overlap_mode} overlap)")
+    for metric, key, scale in SUMMARY_STATS:
+        value = float(summary[key]) * scale
+        print(f"{metric}: {value:.4f}{'' if scale == 1 else '%'}")
+    print(f"Equity curve -> {output_file}")
+    return output_file
+
+def main():
+    """Main function"""
+    parser = argparse.ArgumentParser(description="Backtest sample files with fees, slippage and funding")
+    parser.add_argument("files", nargs="+", help="sample CSV files under sample_output/")
+    parser.add_argument("--horizon", type=int, default=1, help="hold each sample until y{horizon}_timestamp")
+    parser.add_argument("--side", choices=["Long", "Short", "Combined"], default="Combined", help="which samples to trade")
+    parser.add_argument("--overlap", choices=OVERLAP_MODES, default="average", help="how overlapping positions are combined")
+    parser.add_argument("--overlap-cap", type=float, default=1.0, help="gross exposure limit for --overlap cap")
+    parser.add_argument("--taker-fee", type=float, default=DEFAULT_TAKER_FEE, help="taker fee rate")
+    parser.add_argument("--maker-fee", type=float, default=DEFAULT_MAKER_FEE, help="maker fee rate")
+    parser.add_argument("--maker-ratio", type=float, default=0.0, help="share of turnover filled as maker")
+    parser.add_argument("--half-spread", type=float, default=0.0, help="half spread paid on every trade")
+    parser.add_argument("--impact", type=float, default=DEFAULT_IMPACT, help="square-root impact coefficient on quote_asset_volume")
+    parser.add_argument("--capital", type=float, default=DEFAULT_CAPITAL, help="quote notional of exposure 1")
+    parser.add_argument("--funding", help="CSV with funding_time, funding_rate columns (futures only)")
+    args = parser.parse_args()
+
+    file_paths = [os.path.abspath(file) for file in args.files]
+    funding_file = os.path.abspath(args.funding) if args.funding else None
+    # kline/ paths are relative to the project root
+    os.chdir(project_root)
+    for file_path in file_paths:
+        try:
+            backtest_file(
+                file_path, args.horizon, args.side, args.overlap, args.overlap_cap, funding_file,
+                taker_fee=args.taker_fee, maker_fee=args.maker_fee, maker_ratio=args.maker_ratio,
+                half_spread=args.half_spread, impact=args.impact, capital=args.capital,
+            )
+        except Exception as e:
+            print(f"Error backtesting {file_path}: {e}")
+
+if __name__ == "__main__":
+    main()
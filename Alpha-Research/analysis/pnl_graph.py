@@ -1,42 +1,131 @@
 import os
+import io
+import sys
+import argparse
+import contextlib
+from concurrent.futures import ProcessPoolExecutor, as_completed
+import numpy as np
 import pandas as pd
 import seaborn as sns
 import matplotlib.pyplot as plt
 from pathlib import Path
+from rich.progress import Progress
 
 # Set output folder
 sample_output = Path(os.path.dirname(__file__)).parent / "sample_output"
-print(sample_output)
 
-def find_unprocessed_csv():
-    """Find CSV files without corresponding PNG files"""
-    csv_files = set()
-    png_files = set()
-
-    for root, dirs, files in os.walk(sample_output):
-        for file in files:
-            file_path = os.path.join(root, file)
-            relative_path = os.path.relpath(file_path, sample_output)
-
-            if file.endswith(".csv"):
-                csv_files.add(relative_path)
-            elif file.endswith("_returns.png"):
-                png_base = relative_path[:-12] + ".csv"
-                png_files.add(png_base)
-
-    unprocessed_csv = csv_files - png_files
-    return sorted(list(unprocessed_csv))
+# Allow `python analysis/pnl_graph.py` from any directory
+project_root = Path(os.path.dirname(os.path.abspath(__file__))).parent
+sys.path.insert(0, str(project_root))
+
+import src.horizon_stats
+import src.streaming_stats
+import src.decimation
+import src.bootstrap
+import src.stats_table
+import src.positions
+import src.labels
+import src.data_cache
+from src.horizon_stats import horizon_columns, horizon_returns, cumulative_returns, describe_sides
+from src.decimation import lttb_indices
+from src.bootstrap import DEFAULT_CONFIDENCE, DEFAULT_REPLICATES, DEFAULT_SEED, bootstrap_sides
+from src.streaming_stats import DEFAULT_CHUNKSIZE, read_chunks, stream_describe_sides
+from src.analysis_manifest import AnalysisManifest, code_version
+from src.stats_table import parse_sample_path, tidy_stats, save_stats_table, update_stats_index, load_sample_params
+from src.positions import OVERLAP_MODES, overlap_adjusted_returns, describe_pnl
+from src.data_cache import load_klines
+
+# Outputs are rebuilt when any of these sources change
+ANALYSIS_SOURCES = [os.path.abspath(__file__), src.horizon_stats.__file__, src.streaming_stats.__file__, src.decimation.__file__, src.bootstrap.__file__, src.stats_table.__file__, src.positions.__file__, src.labels.__file__, src.data_cache.__file__]
+
+# (metric, interval, scale) in the bootstrap section
+BOOTSTRAP_STATS = [
+    ("Mean Return", "mean", 100),
+    ("Sharpe Ratio", "sharpe", 1),
+    ("Win Rate", "win_rate", 100),
+]
+
+# (metric, statistic, scale) in the overlap-adjusted section, computed on the bar-level PnL
+OVERLAP_STATS = [
+    ("Total Return", "total_return", 100),
+    ("Mean Bar Return", "mean", 100),
+    ("Bar Std Dev", "std", 100),
+    ("Bar Sharpe Ratio", "sharpe", 1),
+    ("Time in Market", "time_in_market", 100),
+    ("Mean Exposure", "mean_exposure", 1),
+    ("Max Overlap", "max_overlap", 1),
+]
+
+# Chart layout: 3 subplots per row on a 20-inch figure saved at 300 dpi
+FIGURE_WIDTH = 20
+PLOT_DPI = 300
+# Points drawn per series, about twice the subplot width in pixels
+MAX_PLOT_POINTS = 2 * int(FIGURE_WIDTH / 3 * PLOT_DPI)
+
+# Files a worker process handles before it is replaced
+WORKER_MAX_TASKS = 20
+
+# (metric, statistic, scale) in the detailed section; scale 100 is written as a percentage
+DETAILED_STATS = [
+    ("Sample Size", "count", 1),
+    ("Mean Return", "mean", 100),
+    ("Std Dev", "std", 100),
+    ("Min Return", "min", 100),
+    ("25th Percentile", "q25", 100),
+    ("Median", "median", 100),
+    ("75th Percentile", "q75", 100),
+    ("Max Return", "max", 100),
+    ("Skewness", "skew", 1),
+    ("Kurtosis", "kurtosis", 1),
+    ("Sharpe Ratio", "sharpe", 1),
+    ("Win Rate", "win_rate", 100),
+]
+
+def find_unprocessed_csv(manifest, render=True, streaming=False, options=None):
+    """Find CSV files whose content, analysis version, options or outputs differ from the manifest"""
+    return manifest.stale_files(".csv", render, streaming, options)
+
+def analysis_options(bootstrap_replicates, overlap_mode, overlap_cap):
+    """Options that change the stats; a file analysed with different options is processed again"""
+    options = {"bootstrap": bootstrap_replicates, "overlap": overlap_mode}
+    if bootstrap_replicates:
+        options.update(seed=DEFAULT_SEED, confidence=DEFAULT_CONFIDENCE)
+    if overlap_mode == "cap":
+        options["overlap_cap"] = overlap_cap
+    return options
+
+def output_files(file_path, render=True):
+    """Files process_file writes for a CSV file"""
+    name_parts = os.path.splitext(file_path)[0]
+    outputs = [f"{name_parts}_stats.txt", f"{name_parts}_stats.parquet"]
+    if render:
+        outputs.append(f"{name_parts}_returns.png")
+    return outputs
+
+def tidy_run_stats(stats, file_path, intervals=None, overlap_stats=None):
+    """Tidy stats table for one sample file; overlap-adjusted statistics are stored as overlap_<metric>"""
+    run = os.path.relpath(file_path, sample_output)
+    try:
+        info = parse_sample_path(file_path)
+    except ValueError:
+        info = {"alpha": "", "interval": "", "exchange": "", "trading_pair": "", "start_date": "", "end_date": "", "note": ""}
+    if overlap_stats:
+        stats = {side: dict(stats.get(side, {})) for side in overlap_stats}
+        for side, side_stats in overlap_stats.items():
+            stats[side].update({f"overlap_{name}": value for name, value in side_stats.items()})
+    # Parameters recorded by main.py when the samples were generated; older files have none
+    return tidy_stats(stats, run, info, load_sample_params(file_path), intervals)
 
 def validate_data(df):
     """Validate data integrity"""
-    # Check required columns
+    # Check required columns; the horizon count comes from the y{i}_close columns
     required_columns = ["timestamp", "price", "is_buy"]
-    y_columns = [f"y{i}_close" for i in range(1, 21)]  # Updated to 20 k-bars
-    required_columns.extend(y_columns)
-    
     missing_columns = [col for col in required_columns if col not in df.columns]
     if missing_columns:
         raise ValueError(f"Missing required columns: {', '.join(missing_columns)}")
+    y_columns = horizon_columns(df.columns)
+    if not y_columns:
+        raise ValueError("Missing required columns: y{i}_close")
 
     # Validate price data
     if df["price"].isna().any():
@@ -44,13 +133,12 @@ def validate_data(df):
     if (df["price"] <= 0).any():
         raise ValueError("Price column contains non-positive values")
 
-    # Validate y1-y20 data
-    for i in range(1, 21):
-        col = f"y{i}_close"
-        if df[col].isna().any():
-            raise ValueError(f"{col} contains missing values")
-        if (df[col] <= 0).any():
-            raise ValueError(f"{col} contains non-positive values")
+    # Validate y{i}_close data in one pass
+    y_values = df[y_columns].to_numpy(dtype=float)
+    for check, message in ((np.isnan(y_values), "contains missing values"), (y_values <= 0, "contains non-positive values")):
+        bad = check.any(axis=0)
+        if bad.any():
+            raise ValueError(f"{y_columns[int(np.argmax(bad))]} {message}")
 
     # Validate timestamp
     try:
@@ -64,130 +152,118 @@ def validate_data(df):
 
     return True
 
-def calculate_descriptive_stats(df):
-    """Calculate descriptive statistics for each k-bar"""
-    stats = {}
-
-    for i in range(1, 21):  # Updated to 20 k-bars
-        y_col = f"y{i}_close"
-
-        # Long statistics
-        df_buy = df[df["is_buy"]]
-        buy_returns = (df_buy[y_col] - df_buy["price"]) / df_buy["price"]
-        buy_stats = {
-            "Sample Size": len(buy_returns),
-            "Mean Return": buy_returns.mean() * 100,
-            "Std Dev": buy_returns.std() * 100,
-            "Min Return": buy_returns.min() * 100,
-            "25th Percentile": buy_returns.quantile(0.25) * 100,
-            "Median": buy_returns.median() * 100,
-            "75th Percentile": buy_returns.quantile(0.75) * 100,
-            "Max Return": buy_returns.max() * 100,
-            "Skewness": buy_returns.skew(),
-            "Kurtosis": buy_returns.kurtosis(),
-            "Sharpe Ratio": (buy_returns.mean() / buy_returns.std()) if buy_returns.std() != 0 else 0,
-            "Win Rate": (buy_returns > 0).mean() * 100  # Added win rate
-        }
-
-        # Short statistics
-        df_sell = df[~df["is_buy"]]
-        sell_returns = -(df_sell[y_col] - df_sell["price"]) / df_sell["price"]
-        sell_stats = {
-            "Sample Size": len(sell_returns),
-            "Mean Return": sell_returns.mean() * 100,
-            "Std Dev": sell_returns.std() * 100,
-            "Min Return": sell_returns.min() * 100,
-            "25th Percentile": sell_returns.quantile(0.25) * 100,
-            "Median": sell_returns.median() * 100,
-            "75th Percentile": sell_returns.quantile(0.75) * 100,
-            "Max Return": sell_returns.max() * 100,
-            "Skewness": sell_returns.skew(),
-            "Kurtosis": sell_returns.kurtosis(),
-            "Sharpe Ratio": (sell_returns.mean() / sell_returns.std()) if sell_returns.std() != 0 else 0,
-            "Win Rate": (sell_returns > 0).mean() * 100  # Added win rate
-        }
-
-        stats[f"Y{i}"] = {"Long": buy_stats, "Short": sell_stats}
-
-    return stats
-
-def save_stats_to_txt(stats_data, stats, file_path):
-    """Save statistics to text file"""
+def calculate_descriptive_stats(returns, is_buy):
+    """Calculate descriptive statistics for all k-bars and both sides at once"""
+    return describe_sides(returns, is_buy)
+
+def load_overlap_returns(df, file_path, mode="average", cap=1.0):
+    """
+    Bar-level PnL of the sampled positions with overlapping horizons combined by mode
+    :return: overlap_adjusted_returns() result, None when the klines are not available
+    """
+    info = parse_sample_path(file_path)
+    last_exit = pd.to_datetime(df[[column for column in df.columns if column.startswith("y") and column.endswith("_timestamp")]].stack()).max()
+    end = max(pd.Timestamp(info["end_date"]), last_exit.normalize())
+    bars = load_klines(info["exchange"], info["trading_pair"], info["interval"], info["start_date"], end.strftime("%Y-%m-%d"))
+    if bars.empty:
+        return None
+    return overlap_adjusted_returns(bars, df, mode, cap)
+
+def describe_overlap(overlap):
+    """Bar-level statistics per side"""
+    return {side: describe_pnl(**overlap[side]) for side in ["Long", "Short", "Combined"]}
+
+def save_stats_to_txt(stats, file_path, intervals=None, confidence=DEFAULT_CONFIDENCE, overlap_stats=None, overlap_mode=None):
+    """Save statistics to text file, with bootstrap confidence intervals and overlap-adjusted returns when given"""
     base_name = os.path.splitext(os.path.basename(file_path))[0]
     output_path = os.path.dirname(file_path)
     output_filename = os.path.join(output_path, f"{base_name}_stats.txt")
+    num_horizons = len(stats["Long"]["mean"])
 
     with open(output_filename, "w", encoding="utf-8") as f:
         # Write strategy name and date range
         f.write(f"Strategy Analysis: {base_name}\n")
         f.write("=" * 50 + "\n\n")
 
-        for i in range(1, 21):  # Updated to 20 k-bars
-            f.write(f"\nK-bar {i} Statistics\n")
+        for h in range(num_horizons):
+            f.write(f"\nK-bar {h + 1} Statistics\n")
             f.write("-" * 50 + "\n")
 
             # Write cumulative returns
             f.write("\nCumulative Returns:\n")
-            
-            # Long statistics
-            buy_cum_return = stats_data["buy"][f"cum_return_y{i}"].iloc[-1]
-            buy_mean = stats_data["buy"][f"return_y{i}"].mean()
-            buy_std = stats_data["buy"][f"return_y{i}"].std()
-            buy_max = stats_data["buy"][f"return_y{i}"].max()
-            buy_min = stats_data["buy"][f"return_y{i}"].min()
-            buy_sharpe = buy_mean / buy_std if buy_std != 0 else 0
-            buy_win_rate = (stats_data["buy"][f"return_y{i}"] > 0).mean() * 100
-
-            f.write("\nLong Position Metrics:\n")
-            buy_stats = {
-                "Total Return": f"{buy_cum_return*100:.2f}%",
-                "Mean Return": f"{buy_mean*100:.4f}%",
-                "Std Dev": f"{buy_std*100:.4f}%",
-                "Max Return": f"{buy_max*100:.4f}%",
-                "Min Return": f"{buy_min*100:.4f}%",
-                "Sharpe Ratio": f"{buy_sharpe:.4f}",
-                "Win Rate": f"{buy_win_rate:.2f}%"
-            }
-            for key, value in buy_stats.items():
-                f.write(f"{key}: {value}\n")
-
-            # Short statistics
-            sell_cum_return = stats_data["sell"][f"cum_return_y{i}"].iloc[-1]
-            sell_mean = stats_data["sell"][f"return_y{i}"].mean()
-            sell_std = stats_data["sell"][f"return_y{i}"].std()
-            sell_max = stats_data["sell"][f"return_y{i}"].max()
-            sell_min = stats_data["sell"][f"return_y{i}"].min()
-            sell_sharpe = sell_mean / sell_std if sell_std != 0 else 0
-            sell_win_rate = (stats_data["sell"][f"return_y{i}"] > 0).mean() * 100
-
-            f.write("\nShort Position Metrics:\n")
-            sell_stats = {
-                "Total Return": f"{sell_cum_return*100:.2f}%",
-                "Mean Return": f"{sell_mean*100:.4f}%",
-                "Std Dev": f"{sell_std*100:.4f}%",
-                "Max Return": f"{sell_max*100:.4f}%",
-                "Min Return": f"{sell_min*100:.4f}%",
-                "Sharpe Ratio": f"{sell_sharpe:.4f}",
-                "Win Rate": f"{sell_win_rate:.2f}%"
-            }
-            for key, value in sell_stats.items():
-                f.write(f"{key}: {value}\n")
+
+            for direction in ["Long", "Short"]:
+                side = stats[direction]
+                f.write(f"\n{direction} Position Metrics:\n")
+                metrics = {
+                    "Total Return": f"{side['total_return'][h]*100:.2f}%",
+                    "Mean Return": f"{side['mean'][h]*100:.4f}%",
+                    "Std Dev": f"{side['std'][h]*100:.4f}%",
+                    "Max Return": f"{side['max'][h]*100:.4f}%",
+                    "Min Return": f"{side['min'][h]*100:.4f}%",
+                    "Sharpe Ratio": f"{side['sharpe'][h]:.4f}",
+                    "Win Rate": f"{side['win_rate'][h]*100:.2f}%"
+                }
+                for key, value in metrics.items():
+                    f.write(f"{key}: {value}\n")
 
             # Write detailed statistics
             f.write("\nDetailed Statistics:\n")
             for direction in ["Long", "Short"]:
                 f.write(f"\n{direction} Position Analysis:\n")
-                for metric, value in stats[f"Y{i}"][direction].items():
-                    if metric in ["Skewness", "Kurtosis", "Sample Size", "Sharpe Ratio"]:
+                for metric, key, scale in DETAILED_STATS:
+                    value = stats[direction][key][h] * scale
+                    if scale == 1:
                         f.write(f"{metric}: {value:.4f}\n")
                     else:
                         f.write(f"{metric}: {value:.4f}%\n")
 
+            if intervals:
+                f.write(f"\nBootstrap {confidence:.0%} Confidence Intervals:\n")
+                for direction in ["Long", "Short"]:
+                    f.write(f"\n{direction} Position:\n")
+                    for metric, key, scale in BOOTSTRAP_STATS:
+                        low, high = (bound[h] * scale for bound in intervals[direction][key])
+                        unit = "" if scale == 1 else "%"
+                        f.write(f"{metric}: [{low:.4f}{unit}, {high:.4f}{unit}]\n")
+
+            if overlap_stats:
+                f.write(f"\nOverlap-adjusted Returns ({overlap_mode}):\n")
+                for direction in ["Long", "Short", "Combined"]:
+                    f.write(f"\n{direction} Position:\n")
+                    for metric, key, scale in OVERLAP_STATS:
+                        value = overlap_stats[direction][key][h] * scale
+                        if key == "max_overlap":
+                            f.write(f"{metric}: {value:.0f}\n")
+                        elif scale == 1:
+                            f.write(f"{metric}: {value:.4f}\n")
+                        else:
+                            f.write(f"{metric}: {value:.4f}%\n")
+
             f.write("\n" + "=" * 50 + "\n")
 
-def process_file(file_path):
-    """Process individual CSV file"""
+def plot_decimated(ax, x, y, **kwargs):
+    """Plot a series reduced with LTTB to about twice the subplot pixel width"""
+    indices = lttb_indices(x, y, MAX_PLOT_POINTS)
+    ax.plot(x[indices], y[indices], **kwargs)
+
+def process_file(file_path, render=True, chunksize=None, bootstrap_replicates=DEFAULT_REPLICATES, bootstrap_workers=1, overlap_mode="average", overlap_cap=1.0):
+    """
+    Process individual CSV file; render=False writes the stats only
+    :param chunksize: stream the file in chunks of this many rows (stats only, constant memory, no bootstrap)
+    :param bootstrap_replicates: block-bootstrap replicates for the confidence intervals, 0 disables them
+    :param bootstrap_workers: threads used by the bootstrap
+    :param overlap_mode: how overlapping positions are combined for the bar-level returns (average, cap, sum), None disables them
+    :param overlap_cap: gross exposure limit in cap mode
+    """
     try:
+        if chunksize:
+            stats = stream_describe_sides(read_chunks(file_path, chunksize), validate=validate_data)
+            save_stats_to_txt(stats, file_path)
+            save_stats_table(tidy_run_stats(stats, file_path), file_path)
+            print(f"Successfully processed (streaming stats): {os.path.basename(file_path)}")
+            return True
+
         # Read CSV file
         df = pd.read_csv(file_path)
         validate_data(df)
@@ -200,76 +276,91 @@ def process_file(file_path):
         # Convert timestamp
         df["timestamp"] = pd.to_datetime(df["timestamp"])
 
-        # Split data by position type
-        df_buy = df[df["is_buy"]].copy()
-        df_sell = df[~df["is_buy"]].copy()
-        df_combined_dict = {}
+        # Returns for every k-bar as one (samples x horizons) matrix
+        y_columns, returns, is_buy = horizon_returns(df)
+        num_horizons = len(y_columns)
+        timestamps = df["timestamp"].to_numpy()
 
-        # Calculate returns for each k-bar
-        for i in range(1, 21):  # Updated to 20 k-bars
-            y_col = f"y{i}_close"
-            
-            # Calculate returns
-            df_buy[f"return_y{i}"] = (df_buy[y_col] - df_buy["price"]) / df_buy["price"]
-            df_sell[f"return_y{i}"] = -(df_sell[y_col] - df_sell["price"]) / df_sell["price"]
-
-            # Calculate cumulative returns
-            df_buy[f"cum_return_y{i}"] = (1 + df_buy[f"return_y{i}"]).cumprod() - 1
-            df_sell[f"cum_return_y{i}"] = (1 + df_sell[f"return_y{i}"]).cumprod() - 1
-
-            # Combine returns
-            df_combined = pd.concat([
-                df_buy[["timestamp", f"return_y{i}"]],
-                df_sell[["timestamp", f"return_y{i}"]]
-            ]).sort_values("timestamp")
-            
-            df_combined[f"cum_return_y{i}"] = (1 + df_combined[f"return_y{i}"]).cumprod() - 1
-            df_combined_dict[i] = df_combined
+        # Cumulative returns per side and combined (both sides ordered by time)
+        cum_buy = cumulative_returns(returns[is_buy])
+        cum_sell = cumulative_returns(returns[~is_buy])
+        order = np.argsort(timestamps, kind="stable")
+        cum_combined = cumulative_returns(returns[order])
 
         # Calculate statistics
-        stats_data = {"buy": df_buy, "sell": df_sell}
-        stats = calculate_descriptive_stats(df)
-        save_stats_to_txt(stats_data, stats, file_path)
+        stats = calculate_descriptive_stats(returns, is_buy)
+        intervals = None
+        if bootstrap_replicates:
+            # Blocks follow the sample time order
+            intervals = bootstrap_sides(returns[order], is_buy[order], replicates=bootstrap_replicates, workers=bootstrap_workers)
+
+        # Bar-level PnL of overlapping positions, when the klines are available
+        overlap = None
+        overlap_stats = None
+        if overlap_mode:
+            try:
+                overlap = load_overlap_returns(df, file_path, overlap_mode, overlap_cap)
+            except ValueError:
+                overlap = None
+            if overlap is None:
+                print(f"Klines not found, overlap-adjusted returns skipped: {base_name}")
+            else:
+                overlap_stats = describe_overlap(overlap)
+
+        save_stats_to_txt(stats, file_path, intervals, overlap_stats=overlap_stats, overlap_mode=overlap_mode)
+        save_stats_table(tidy_run_stats(stats, file_path, intervals, overlap_stats), file_path)
+        if not render:
+            print(f"Successfully processed (stats only): {base_name}")
+            return True
 
         # Create visualization
         sns.set_style("whitegrid")
-        num_rows = (20 + 2) // 3  # Calculate required rows
-        fig, axes = plt.subplots(num_rows, 3, figsize=(20, 30))
+        num_rows = (num_horizons + 2) // 3  # Calculate required rows
+        fig, axes = plt.subplots(num_rows, 3, figsize=(FIGURE_WIDTH, 30 * num_rows / 7), squeeze=False)
 
         # Set title
         fig.suptitle(f"Returns Analysis: {name_parts}", fontsize=16)
 
+        # Equity curves compounded on the bar-level PnL when available, otherwise per signal
+        if overlap is not None:
+            bar_times = overlap["times"]
+            curves = [(bar_times, cumulative_returns(overlap[side]["pnl"])) for side in ["Long", "Short", "Combined"]]
+            title = f"({overlap_mode} overlap)"
+        else:
+            curves = [(timestamps[is_buy], cum_buy), (timestamps[~is_buy], cum_sell), (timestamps[order], cum_combined)]
+            title = "(per signal)"
+
         # Plot returns for each k-bar
-        for i in range(1, 21):
-            row = (i - 1) // 3
-            col = (i - 1) % 3
+        for h in range(num_horizons):
+            row = h // 3
+            col = h % 3
             ax = axes[row, col]
 
             # Plot long positions
-            ax.plot(df_buy["timestamp"], 
-                   df_buy[f"cum_return_y{i}"] * 100,
+            plot_decimated(ax, curves[0][0],
+                   curves[0][1][:, h] * 100,
                    label="Long", 
                    color="green", 
                    linewidth=2)
             
             # Plot short positions
-            ax.plot(df_sell["timestamp"],
-                   df_sell[f"cum_return_y{i}"] * 100,
+            plot_decimated(ax, curves[1][0],
+                   curves[1][1][:, h] * 100,
                    label="Short",
                    color="red",
                    linewidth=2,
                    linestyle="--")
             
             # Plot combined returns
-            ax.plot(df_combined_dict[i]["timestamp"],
-                   df_combined_dict[i][f"cum_return_y{i}"] * 100,
+            plot_decimated(ax, curves[2][0],
+                   curves[2][1][:, h] * 100,
                    label="Combined",
                    color="blue",
                    linewidth=1.5,
                    linestyle=":")
 
             # Customize subplot
-            ax.set_title(f"K-bar {i} Returns", fontsize=12)
+            ax.set_title(f"K-bar {h + 1} Returns {title}", fontsize=12)
             ax.set_xlabel("Time", fontsize=10)
             ax.set_ylabel("Cumulative Returns (%)", fontsize=10)
             ax.tick_params(axis="x", rotation=45)
@@ -277,12 +368,12 @@ def process_file(file_path):
             ax.grid(True, linestyle="--", alpha=0.7)
 
         # Remove empty subplots
-        for i in range((20 + 2) // 3 * 3 - 20):
+        for i in range(num_rows * 3 - num_horizons):
             fig.delaxes(axes[num_rows-1, -(i+1)])
 
         # Adjust layout
         plt.tight_layout()
-        plt.savefig(output_filename, bbox_inches="tight", dpi=300)
+        plt.savefig(output_filename, bbox_inches="tight", dpi=PLOT_DPI)
         plt.close()
 
         print(f"Successfully processed: {base_name}")
@@ -292,9 +383,76 @@ def process_file(file_path):
         print(f"Error processing {file_path}: {e}")
         return False
 
+def _init_worker():
+    """Workers render headless"""
+    plt.switch_backend("Agg")
+
+def _process_in_worker(file_path, render, chunksize, bootstrap_replicates, overlap_mode, overlap_cap):
+    """Run process_file in a worker and return its console output with the result"""
+    output = io.StringIO()
+    with contextlib.redirect_stdout(output):
+        result = process_file(file_path, render, chunksize, bootstrap_replicates, 1, overlap_mode, overlap_cap)
+    return result, output.getvalue()
+
+def process_files(file_paths, workers=None, render=True, chunksize=None, bootstrap_replicates=DEFAULT_REPLICATES, overlap_mode="average", overlap_cap=1.0):
+    """
+    Process files in a process pool, one task per file so a failing file does not affect the others
+    :param workers: number of processes, 1 runs in this process
+    :return: {file_path: success}
+    """
+    workers = workers or os.cpu_count() or 1
+    results = {}
+    with Progress() as progress:
+        task = progress.add_task("[cyan]Processing sample files...", total=len(file_paths))
+        if workers == 1 or len(file_paths) == 1:
+            _init_worker()
+            for file_path in file_paths:
+                # Files run one at a time, so the bootstrap gets every core
+                results[file_path] = process_file(file_path, render, chunksize, bootstrap_replicates, os.cpu_count() or 1, overlap_mode, overlap_cap)
+                progress.update(task, advance=1)
+            return results
+
+        # Recycle workers periodically so matplotlib state does not accumulate
+        with ProcessPoolExecutor(max_workers=min(workers, len(file_paths)), initializer=_init_worker, max_tasks_per_child=WORKER_MAX_TASKS) as executor:
+            futures = {executor.submit(_process_in_worker, file_path, render, chunksize, bootstrap_replicates, overlap_mode, overlap_cap): file_path for file_path in file_paths}
+            for future in as_completed(futures):
+                file_path = futures[future]
+                try:
+                    results[file_path], output = future.result()
+                    progress.console.print(output.rstrip(), markup=False, highlight=False)
+                except Exception as e:
+                    # The worker itself died (e.g. out of memory)
+                    results[file_path] = False
+                    progress.console.print(f"Error processing {file_path}: {e}", markup=False, highlight=False)
+                progress.update(task, advance=1)
+    return results
+
 def main():
     """Main function"""
-    unprocessed_files = find_unprocessed_csv()
+    parser = argparse.ArgumentParser(description="Returns statistics and charts for unprocessed sample files")
+    parser.add_argument("--workers", type=int, default=None, help="number of worker processes (default: CPU count, 1 = serial)")
+    parser.add_argument("--stats-only", action="store_true", help="write the stats files without rendering charts")
+    parser.add_argument("--streaming", action="store_true", help="read files in chunks with constant memory (implies --stats-only, quantiles are t-digest estimates)")
+    parser.add_argument("--bootstrap", type=int, default=DEFAULT_REPLICATES, help="bootstrap replicates for confidence intervals (0 disables)")
+    parser.add_argument("--chunksize", type=int, default=DEFAULT_CHUNKSIZE, help="rows per chunk in streaming mode")
+    parser.add_argument("--overlap", choices=[*OVERLAP_MODES, "none"], default="average", help="combine overlapping positions into bar-level returns (needs the klines, none disables)")
+    parser.add_argument("--overlap-cap", type=float, default=1.0, help="gross exposure limit for --overlap cap")
+    args = parser.parse_args()
+
+    # Klines are read from the project's kline/ folder
+    os.chdir(project_root)
+
+    print(sample_output)
+    render = not (args.stats_only or args.streaming)
+    chunksize = args.chunksize if args.streaming else None
+    if not os.path.isdir(sample_output):
+        print("No unprocessed CSV files found")
+        return
+    overlap_mode = None if args.overlap == "none" else args.overlap
+    # Streaming runs skip the bootstrap and the bar-level returns, so their options are not compared
+    options = None if args.streaming else analysis_options(args.bootstrap, overlap_mode, args.overlap_cap)
+    manifest = AnalysisManifest(sample_output, code_version(ANALYSIS_SOURCES))
+    unprocessed_files = find_unprocessed_csv(manifest, render, args.streaming, options)
 
     if not unprocessed_files:
         print("No unprocessed CSV files found")
@@ -304,12 +462,24 @@ def main():
     for file in unprocessed_files:
         print(f"- {file}")
 
-    for file in unprocessed_files:
-        file_path = os.path.join(sample_output, file)
-        if process_file(file_path):
-            print(f"Successfully processed: {file}")
-        else:
-            print(f"Failed to process: {file}")
+    file_paths = [os.path.join(sample_output, file) for file in unprocessed_files]
+    results = process_files(file_paths, args.workers, render, chunksize, args.bootstrap, overlap_mode, args.overlap_cap)
+
+    # Only successful files are recorded, failed ones are retried next run
+    for file, file_path in zip(unprocessed_files, file_paths):
+        if results[file_path]:
+            manifest.record(file, [os.path.relpath(output, sample_output) for output in output_files(file_path, render)], render, args.streaming, options)
+    manifest.save()
+
+    # Merge this run's tables into the aggregate index used for leaderboards
+    tables = [output_files(file_path, render)[1] for file_path in file_paths if results[file_path]]
+    index_path = update_stats_index(tables, sample_output, runs=manifest.entries.keys())
+    print(f"Stats index: {index_path}")
+
+    failed = [file for file, file_path in zip(unprocessed_files, file_paths) if not results[file_path]]
+    print(f"Processed {len(file_paths) - len(failed)}/{len(file_paths)} files")
+    for file in failed:
+        print(f"Failed to process: {file}")
 
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    main()
@@ -0,0 +1,73 @@
+import os
+import sys
+import math
+import argparse
+import pandas as pd
+from pathlib import Path
+
+# Allow `python analysis/relabel.py` from any directory
+project_root = Path(os.path.dirname(os.path.abspath(__file__))).parent
+sys.path.insert(0, str(project_root))
+
+from src.agg_trades import is_information_bar, parse_bar_spec
+from src.data_cache import load_klines
+from src.interval import interval_seconds
+from src.labels import FORWARD_COLUMN, label_samples, add_path_labels
+from src.stats_table import parse_sample_path
+
+def extra_days(kline_interval, max_horizon):
+    """Days of klines needed after end_date to cover the longest horizon"""
+    if is_information_bar(kline_interval):
+        return 1
+    spec = parse_bar_spec(kline_interval)
+    seconds = spec[1] / 1000 if spec else interval_seconds(kline_interval)
+    return math.ceil(max_horizon * seconds / 86400) + 1
+
+def relabel_file(file_path, horizons, keep_incomplete=False, path=False, take_profit=None, stop_loss=None):
+    """Rebuild the forward columns of a sample file with new horizons, optionally with MFE/MAE and barrier columns"""
+    info = parse_sample_path(file_path)
+    kline_interval, exchange, trading_pair, start_date, end_date = (
+        info["interval"], info["exchange"], info["trading_pair"], info["start_date"], info["end_date"]
+    )
+    end = pd.Timestamp(end_date) + pd.Timedelta(days=extra_days(kline_interval, max(horizons)))
+    bars = load_klines(exchange, trading_pair, kline_interval, start_date, end.strftime("%Y-%m-%d"))
+    if bars.empty:
+        raise ValueError(f"No klines found for {exchange} {trading_pair} {kline_interval}")
+
+    samples = pd.read_csv(file_path)
+    df = label_samples(samples, bars, horizons, kline_interval)
+    if path:
+        df = add_path_labels(df, bars, horizons, kline_interval, take_profit, stop_loss)
+    if not keep_incomplete:
+        # Same as Sampling: only samples with every horizon filled
+        df = df.dropna(subset=[column for column in df.columns if FORWARD_COLUMN.match(column)]).reset_index(drop=True)
+
+    base_name = os.path.splitext(file_path)[0]
+    output_file = f"{base_name}_relabel_{'-'.join(map(str, horizons))}.csv"
+    df.to_csv(output_file, index=False)
+    print(f"Relabeled {len(df)}/{len(samples)} samples -> {output_file}")
+    return output_file
+
+def main():
+    """Main function"""
+    parser = argparse.ArgumentParser(description="Relabel sample files with new forward horizons")
+    parser.add_argument("files", nargs="+", help="sample CSV files under sample_output/")
+    parser.add_argument("--horizons", required=True, help="comma separated horizons, e.g. 1,5,10,30")
+    parser.add_argument("--path", action="store_true", help="add MFE/MAE and triple-barrier columns")
+    parser.add_argument("--take-profit", type=float, help="take-profit return for the barrier columns, e.g. 0.01")
+    parser.add_argument("--stop-loss", type=float, help="stop-loss return for the barrier columns")
+    parser.add_argument("--keep-incomplete", action="store_true", help="keep samples whose horizons run past the data")
+    args = parser.parse_args()
+
+    horizons = [int(value) for value in args.horizons.split(",")]
+    file_paths = [os.path.abspath(file) for file in args.files]
+    # kline/ paths are relative to the project root
+    os.chdir(project_root)
+    for file_path in file_paths:
+        try:
+            relabel_file(file_path, horizons, args.keep_incomplete, args.path, args.take_profit, args.stop_loss)
+        except Exception as e:
+            print(f"Error relabeling {file_path}: {e}")
+
+if __name__ == "__main__":
+    main()
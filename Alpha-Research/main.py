@@ -1,10 +1,16 @@
 import os
 import sys
 import pandas as pd
-import importlib
 from datetime import datetime, timedelta
 from src.sampling import Sampling
-from src.get_kline import get_kline
+from src.get_kline import get_kline, backfill_klines
+from src.agg_trades import is_bar_spec
+from src.data_cache import kline_file_path, load_klines
+from src.indicator_graph import indicator_graph
+from src.alpha_registry import AlphaRegistry
+from src.signal_cache import signal_cache_key, load_signals, save_signals, replay_samples
+from src.labels import add_path_labels
+from src.stats_table import save_sample_params
 from rich.console import Console
 from rich.table import Table
 from rich.progress import Progress
@@ -15,35 +21,33 @@ sys.dont_write_bytecode = True
 class AlphaManager:
     def __init__(self, alpha_dir="alpha"):
         self.alpha_dir = alpha_dir
-        self.strategies = self._load_strategies()
+        # 以 AST 掃描策略，選取後才 import 對應模組
+        self.registry = AlphaRegistry(alpha_dir)
+        self.strategies = self.registry.entries
 
-    def _load_strategies(self):
+    def get_alpha_names(self):
         """
-        動態加載 alpha 資料夾中的策略模組
+        返回所有策略名稱
         """
-        strategies = {}
-        for file in os.listdir(self.alpha_dir):
-            if file.endswith(".py") and file != "base_alpha.py" and file != "__init__.py":
-                module_name = file[:-3]
-                module = importlib.import_module(f"{self.alpha_dir}.{module_name}")
-                for attr in dir(module):
-                    cls = getattr(module, attr)
-                    if isinstance(cls, type) and issubclass(cls, module.BaseAlpha) and cls is not module.BaseAlpha:
-                        strategies[cls.__name__] = cls
-
-        return strategies
+        return self.registry.names()
 
-    def get_alpha_names(self):
+    def get_alpha_params(self, name):
         """
-        返回所有策略名稱
+        返回策略的參數（靜態解析，不需 import）
         """
-        return list(self.strategies.keys())
+        return self.registry.params(name)
 
     def get_alpha_class(self, name):
         """
         根據名稱返回策略類
         """
-        return self.strategies[name]
+        return self.registry.load(name)
+
+    def get_errors(self):
+        """
+        返回無法解析的策略檔案與錯誤訊息
+        """
+        return self.registry.errors
 
 
 def main():
@@ -56,29 +60,42 @@ def main():
     table = Table(show_lines=True)
     table.add_column("No.", justify="center", style="bold")
     table.add_column("Alpha Name", justify="left")
+    table.add_column("Trading Pair", justify="left")
+    table.add_column("Interval", justify="left")
 
     alphas = manager.get_alpha_names()
     for i, alpha_name in enumerate(alphas, 1):
-        table.add_row(str(i), alpha_name)
+        params = manager.get_alpha_params(alpha_name)
+        table.add_row(str(i), alpha_name, str(params.get("TRADING_PAIR", "")), str(params.get("KLINE_INTERVAL", "")))
 
     console.print(table)
 
+    for module_name, error in manager.get_errors().items():
+        console.print(f"[bold red]Skipped alpha/{module_name}.py: {error}[/bold red]")
+
     # 選擇 Alpha
     while True:
         try:
             choice = int(console.input("[bold yellow]Please select Alpha (input No.): [/bold yellow]"))
             if 1 <= choice <= len(alphas):
                 selected_alpha_name = alphas[choice - 1]
-                break
             else:
                 console.print("[bold red]Invalid number, please input again.[/bold red]")
+                continue
         except ValueError:
             console.print("[bold red]Please input a valid number.[/bold red]")
+            continue
+
+        # 只 import 選取的策略，載入失敗時可重新選擇
+        try:
+            alpha_class = manager.get_alpha_class(selected_alpha_name)
+            break
+        except Exception as e:
+            console.print(f"[bold red]Failed to load {selected_alpha_name}: {type(e).__name__}: {e}[/bold red]")
 
     console.print(f"[bold green]Selected Alpha: {selected_alpha_name}[/bold green]")
 
     # 初始化 Alpha
-    alpha_class = manager.get_alpha_class(selected_alpha_name)
     alpha_instance = alpha_class()
 
     # 取得 Alpha 的參數
@@ -103,39 +120,74 @@ def main():
     current_date = datetime.strptime(start_date_string, "%Y-%m-%d")
     end_date = datetime.strptime(end_date_string, "%Y-%m-%d")
 
-    # 初始化採樣
-    sampling = Sampling(window_size=window_size, sampling_intervals=sampling_intervals, alpha=alpha_instance)
+    # 初始化採樣（記錄逐 K 棒欄位與信號供信號快取使用）
+    sampling = Sampling(window_size=window_size, sampling_intervals=sampling_intervals, alpha=alpha_instance, record_signals=True)
+
+    # 預先並行下載整段區間的 K 線（1s 資料與 aggTrades K 棒由 Binance Data 每日壓縮檔提供）
+    if kline_interval != "1s" and not is_bar_spec(kline_interval):
+        console.print("[bold cyan]Downloading klines...[/bold cyan]")
+        try:
+            backfill_klines(exchange, [trading_pair], kline_interval, start_date_string, end_date_string)
+        except Exception as e:
+            console.print(f"[bold red]Backfill failed, falling back to daily download: {str(e)}[/bold red]")
 
-    console.print("[bold cyan]Start sampling...[/bold cyan]")
     total_days = (end_date - current_date).days + 1
+    file_paths = [
+        kline_file_path(exchange, trading_pair, kline_interval, (current_date + timedelta(days=day)).strftime("%Y-%m-%d")) for day in range(total_days)
+    ]
+
+    # 信號快取：alpha 原始碼、參數與 K 線資料皆未改變時，直接由快取的信號重建延遲欄位
+    cache_key = signal_cache_key(alpha_instance, window_size, file_paths) if all(map(os.path.exists, file_paths)) else None
+    cached_signals = load_signals(cache_key) if cache_key else None
+
+    if cached_signals is not None:
+        console.print("[bold cyan]Signal cache hit, rebuilding forward columns...[/bold cyan]")
+        sampling.completed_samples_df = replay_samples(
+            cached_signals, alpha_instance.get_columns(), sampling_intervals, kline_interval, alpha_instance.get_schema()
+        )
+    else:
+        console.print("[bold cyan]Start sampling...[/bold cyan]")
+        failed = False
 
-    with Progress() as progress:
-        task = progress.add_task("[cyan]Sampling progress...", total=total_days)
+        with Progress() as progress:
+            task = progress.add_task("[cyan]Sampling progress...", total=total_days)
 
-        while not progress.finished:
-            date_string = current_date.strftime("%Y-%m-%d")
+            while not progress.finished:
+                date_string = current_date.strftime("%Y-%m-%d")
             
-            try:
-                # 下載數據
-                get_kline(exchange, trading_pair, date_string, kline_interval)
+                try:
+                    # 下載數據
+                    get_kline(exchange, trading_pair, date_string, kline_interval)
                 
-                # 構建文件路徑
-                file_path = f"kline/{exchange}/{trading_pair}/{kline_interval}/{trading_pair}_{date_string}_{kline_interval}.csv"
+                    # 構建文件路徑
+                    file_path = kline_file_path(exchange, trading_pair, kline_interval, date_string)
                 
-                if os.path.exists(file_path):
-                    # 執行採樣
-                    sampling.alpha_sampling(file_path, alpha_instance)
-                else:
-                    console.print(f"[bold red]Warning: Data file not found for {date_string}[/bold red]")
+                    if os.path.exists(file_path):
+                        # 執行採樣
+                        sampling.alpha_sampling(file_path, alpha_instance)
+                    else:
+                        console.print(f"[bold red]Warning: Data file not found for {date_string}[/bold red]")
                 
-                current_date += timedelta(days=1)
-                progress.update(task, advance=1)
+                    current_date += timedelta(days=1)
+                    progress.update(task, advance=1)
                 
-            except Exception as e:
-                console.print(f"[bold red]Error processing {date_string}: {str(e)}[/bold red]")
-                current_date += timedelta(days=1)
-                progress.update(task, advance=1)
-                continue
+                except Exception as e:
+                    console.print(f"[bold red]Error processing {date_string}: {str(e)}[/bold red]")
+                    failed = True
+                    current_date += timedelta(days=1)
+                    progress.update(task, advance=1)
+                    continue
+
+        # 每天都成功採樣時才寫入快取
+        if not failed and all(map(os.path.exists, file_paths)):
+            save_signals(signal_cache_key(alpha_instance, window_size, file_paths), sampling.signal_records())
+
+    # 路徑相關欄位：MFE / MAE 與三重障礙（K 線已在快取中，不需重新解析）
+    if alpha_instance.PATH_LABELS and not sampling.completed_samples_df.empty:
+        bars = load_klines(exchange, trading_pair, kline_interval, start_date_string, end_date_string)
+        sampling.completed_samples_df = add_path_labels(
+            sampling.completed_samples_df, bars, sampling_intervals, kline_interval, alpha_instance.TAKE_PROFIT, alpha_instance.STOP_LOSS
+        )
 
     # 保存結果
     now = datetime.now().strftime("%Y%m%d_%H%M%S")
@@ -152,10 +204,18 @@ def main():
     
     if not sampling.completed_samples_df.empty:
         sampling.completed_samples_df.to_csv(result_file, index=False)
+        # 記錄本次取樣實際使用的參數（全大寫屬性），統計報表以此為準，不受之後修改 alpha 影響
+        save_sample_params(
+            result_file,
+            {name: getattr(alpha_instance, name) for name in sorted(dir(alpha_instance)) if name.isupper() and not callable(getattr(alpha_instance, name))},
+        )
         console.print(f"[bold green]{selected_alpha_name} sampling completed! Result saved to {result_file}[/bold green]")
     else:
         console.print("[bold red]Warning: No samples were generated![/bold red]")
 
+    if indicator_graph.requests:
+        console.print(f"[cyan]{indicator_graph.summary()}[/cyan]")
+
 
 if __name__ == "__main__":
     main()
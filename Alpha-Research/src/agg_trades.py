@@ -0,0 +1,233 @@
+import io
+import os
+import zipfile
+import numpy as np
+import pandas as pd
+import requests
+from src.interval import INTERVAL_MILLISECONDS
+
+AGG_TRADES_COLUMNS = ["agg_trade_id", "price", "quantity", "first_trade_id", "last_trade_id", "transact_time", "is_buyer_maker"]
+
+# 資訊 K 棒的種類：time 以時間切、tick 以成交筆數、volume 以成交量、dollar 以成交金額
+BAR_TYPES = ("time", "tick", "volume", "dollar")
+
+
+def parse_bar_spec(kline_interval):
+    """
+    解析 K 棒規格字串，例如 tick_1000、volume_250、dollar_5000000、time_1s
+    :return: (bar_type, threshold)，非 K 棒規格則回傳 None
+    """
+    bar_type, _, value = str(kline_interval).partition("_")
+    if bar_type not in BAR_TYPES or not value:
+        return None
+    if bar_type == "time":
+        if value not in INTERVAL_MILLISECONDS:
+            return None
+        return bar_type, INTERVAL_MILLISECONDS[value]
+    try:
+        return bar_type, float(value)
+    except ValueError:
+        return None
+
+
+def is_bar_spec(kline_interval):
+    return parse_bar_spec(kline_interval) is not None
+
+
+def is_information_bar(kline_interval):
+    """
+    tick / volume / dollar K 棒沒有固定時間長度，採樣間隔以 K 棒數計算
+    """
+    spec = parse_bar_spec(kline_interval)
+    return spec is not None and spec[0] != "time"
+
+
+def fetch_agg_trades_from_binance_data(trading_pair, date, futures=True):
+    """
+    從 Binance Data 下載每日 aggTrades 壓縮檔
+    :return: 欄位為 transact_time / price / quantity / is_buyer_maker / trade_count 的 numpy 陣列字典
+    """
+    market = "futures/um" if futures else "spot"
+    url = f"https://data.binance.vision/data/{market}/daily/aggTrades/{trading_pair}/{trading_pair}-aggTrades-{date}.zip"
+
+    response = requests.get(url)
+    response.raise_for_status()
+
+    with zipfile.ZipFile(io.BytesIO(response.content)) as zip_file:
+        csv_filename = zip_file.namelist()[0]
+        with zip_file.open(csv_filename) as csv_file:
+            df = pd.read_csv(csv_file, header=None)
+
+    # 期貨檔案帶有標頭列，現貨檔案多一欄 is_best_match
+    if isinstance(df.iloc[0, 0], str) and not df.iloc[0, 0].isdigit():
+        df = df.iloc[1:]
+    df = df.iloc[:, : len(AGG_TRADES_COLUMNS)]
+    df.columns = AGG_TRADES_COLUMNS
+
+    # 有標頭列時欄位讀成字串（pandas 3 為 str 而非 object），"false" 直接轉 bool 會變成 True
+    is_buyer_maker = df["is_buyer_maker"]
+    if not pd.api.types.is_bool_dtype(is_buyer_maker):
+        is_buyer_maker = is_buyer_maker.astype(str).str.lower() == "true"
+
+    return {
+        "transact_time": df["transact_time"].to_numpy(dtype=np.int64),
+        "price": df["price"].to_numpy(dtype=np.float64),
+        "quantity": df["quantity"].to_numpy(dtype=np.float64),
+        "is_buyer_maker": is_buyer_maker.to_numpy(dtype=bool),
+        "trade_count": (df["last_trade_id"].to_numpy(dtype=np.int64) - df["first_trade_id"].to_numpy(dtype=np.int64) + 1),
+    }
+
+
+def get_agg_trades(exchange, trading_pair, date):
+    """
+    讀取（必要時下載）每日 aggTrades，以欄式 npz 檔存於 kline 資料夾
+    """
+    file_path = os.path.join("kline", exchange, trading_pair, "aggTrades", f"{trading_pair}_{date}_aggTrades.npz")
+
+    if os.path.exists(file_path):
+        with np.load(file_path) as data:
+            return {name: data[name] for name in data.files}
+
+    trades = fetch_agg_trades_from_binance_data(trading_pair, date)
+    os.makedirs(os.path.dirname(file_path), exist_ok=True)
+    np.savez_compressed(file_path, **trades)
+    print(f"aggTrades 已保存到: {file_path}")
+
+    return trades
+
+
+class BarBuilder:
+    """
+    由 aggTrades 串流建立 time / tick / volume / dollar K 棒
+
+    每次 update 只回傳已完成的 K 棒，最後一根未完成的 K 棒留待下一批成交資料，
+    輸出欄位與 kline 檔案一致，可直接交給 Sampling 與所有 BaseAlpha 使用。
+    """
+
+    def __init__(self, bar_type, threshold):
+        """
+        :param bar_type: time / tick / volume / dollar
+        :param threshold: time 為毫秒，其他為每根 K 棒的筆數、成交量或成交金額
+        """
+        if bar_type not in BAR_TYPES:
+            raise ValueError(f"Unsupported bar type: {bar_type}")
+        self.bar_type = bar_type
+        self.threshold = threshold
+        self.pending = None
+        self.cumulative_base = 0.0  # pending 第一筆成交之前的累計量
+
+    def _measure(self, trades):
+        if self.bar_type == "tick":
+            return trades["trade_count"].astype(np.float64)
+        if self.bar_type == "volume":
+            return trades["quantity"]
+        return trades["price"] * trades["quantity"]
+
+    def _bar_ids(self, trades):
+        if self.bar_type == "time":
+            return trades["transact_time"] // int(self.threshold)
+        measure = self._measure(trades)
+
+        # 以成交前的累計量決定所屬 K 棒，跨越門檻的那筆成交屬於當前 K 棒
+        cumulative_before = self.cumulative_base + np.cumsum(measure) - measure
+        return np.floor(cumulative_before / self.threshold).astype(np.int64)
+
+    def _aggregate(self, trades, bar_ids, starts):
+        ends = np.r_[starts[1:], len(bar_ids)] - 1
+        price = trades["price"]
+        quantity = trades["quantity"]
+        quote = price * quantity
+        taker_buy = ~trades["is_buyer_maker"]
+
+        if self.bar_type == "time":
+            open_time = bar_ids[starts] * int(self.threshold)
+            close_time = open_time + int(self.threshold) - 1
+        else:
+            open_time = trades["transact_time"][starts]
+            close_time = trades["transact_time"][ends]
+
+        return pd.DataFrame(
+            {
+                "open_time": pd.to_datetime(open_time, unit="ms"),
+                "open": price[starts],
+                "high": np.maximum.reduceat(price, starts),
+                "low": np.minimum.reduceat(price, starts),
+                "close": price[ends],
+                "volume": np.add.reduceat(quantity, starts),
+                "close_time": pd.to_datetime(close_time, unit="ms"),
+                "quote_asset_volume": np.add.reduceat(quote, starts),
+                "number_of_trades": np.add.reduceat(trades["trade_count"], starts),
+                "taker_buy_base_asset_volume": np.add.reduceat(np.where(taker_buy, quantity, 0.0), starts),
+                "taker_buy_quote_asset_volume": np.add.reduceat(np.where(taker_buy, quote, 0.0), starts),
+                "ignore": 0,
+            }
+        )
+
+    def update(self, trades):
+        """
+        加入一批依時間排序的成交資料
+        :return: 已完成 K 棒的 DataFrame
+        """
+        if self.pending is not None:
+            trades = {name: np.concatenate([self.pending[name], trades[name]]) for name in trades}
+            self.pending = None
+        if len(trades["price"]) == 0:
+            return pd.DataFrame()
+
+        bar_ids = self._bar_ids(trades)
+        starts = np.flatnonzero(np.r_[True, bar_ids[1:] != bar_ids[:-1]])
+
+        # 最後一根 K 棒尚未確定完成，保留到下一批
+        last_start = starts[-1]
+        if self.bar_type != "time" and last_start > 0:
+            first_pending = {name: values[:last_start] for name, values in trades.items()}
+            self.cumulative_base += float(np.sum(self._measure(first_pending)))
+        self.pending = {name: values[last_start:] for name, values in trades.items()}
+        if len(starts) == 1:
+            return pd.DataFrame()
+
+        completed = {name: values[:last_start] for name, values in trades.items()}
+        return self._aggregate(completed, bar_ids[:last_start], starts[:-1])
+
+    def flush(self):
+        """
+        輸出最後一根未完成的 K 棒
+        """
+        if self.pending is None or len(self.pending["price"]) == 0:
+            return pd.DataFrame()
+        trades, self.pending = self.pending, None
+        bar_ids = self._bar_ids(trades)
+        starts = np.flatnonzero(np.r_[True, bar_ids[1:] != bar_ids[:-1]])
+        if self.bar_type != "time":
+            self.cumulative_base += float(np.sum(self._measure(trades)))
+        return self._aggregate(trades, bar_ids, starts)
+
+
+def build_bars(trades, kline_interval):
+    """
+    將一批成交資料一次轉為 K 棒（包含最後一根未滿門檻的 K 棒）
+    """
+    bar_type, threshold = parse_bar_spec(kline_interval)
+    builder = BarBuilder(bar_type, threshold)
+    bars = [bar for bar in (builder.update(trades), builder.flush()) if not bar.empty]
+    return pd.concat(bars, ignore_index=True) if bars else pd.DataFrame()
+
+
+def get_bars(exchange, trading_pair, date, kline_interval):
+    """
+    由每日 aggTrades 建立 K 棒並存入 kline 資料夾（每日最後一根 K 棒於日界結束）
+    :return: 產生的檔案路徑
+    """
+    file_path = os.path.join("kline", exchange, trading_pair, kline_interval, f"{trading_pair}_{date}_{kline_interval}.csv")
+    if os.path.exists(file_path):
+        return file_path
+
+    df = build_bars(get_agg_trades(exchange, trading_pair, date), kline_interval)
+    if df.empty:
+        return None
+
+    os.makedirs(os.path.dirname(file_path), exist_ok=True)
+    df.to_csv(file_path, index=False)
+    print(f"K棒数据已保存到: {file_path}")
+
+    return file_path
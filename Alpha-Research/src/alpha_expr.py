@@ -0,0 +1,692 @@
+"""
+Alpha 表達式語言
+
+將 notebook 中的公式字串（例如 -rank(ts_sum((close-low)/(high-close),4))*rank(ts_delta(close,4))）
+解析為 AST，再編譯為單一 NumPy 函數。時間序列運算沿 axis 0（時間），截面運算沿 axis 1（交易對，見 src/cross_section.py），
+輸入可為單一交易對的 1-D 陣列或 (timestamps × symbols) 的 2-D 面板（可直接傳入 src/panel.py 的 Panel）。
+
+多行公式以分號分隔並可賦值，最後一個敘述為輸出：
+    price_mom = close/ts_delay(close, 2) - 1;
+    vol_mom = volume/ts_delay(volume, 1) - 1;
+    0.8 * ts_mean(price_mom - vol_mom, 2) + 0.2 * ts_mean(price_mom - vol_mom, 10)
+"""
+
+import re
+import operator
+from collections import deque
+import numpy as np
+from numpy.lib.stride_tricks import sliding_window_view
+from src.rolling import rolling_rank, rolling_pearson, rolling_spearman, RollingRank, RollingPearson, RollingSpearman
+from src.cross_section import rank, zscore, demean, neutralize, scale, quantile
+
+# ---------------------------------------------------------------------------
+# 運算子
+# ---------------------------------------------------------------------------
+
+
+def _rolling(x, window, reducer):
+    """
+    沿時間軸以滑動視窗套用 reducer（reducer 作用於最後一軸），前 window-1 筆為 NaN
+    """
+    x = np.asarray(x, dtype=np.float64)
+    out = np.full(x.shape, np.nan)
+    if window <= len(x):
+        view = sliding_window_view(x, window, axis=0)
+        out[window - 1 :] = reducer(view)
+    return out
+
+
+def ts_delay(x, period):
+    x = np.asarray(x, dtype=np.float64)
+    out = np.full(x.shape, np.nan)
+    if period < len(x):
+        out[period:] = x[: len(x) - period]
+    return out
+
+
+def ts_delta(x, period):
+    return np.asarray(x, dtype=np.float64) - ts_delay(x, period)
+
+
+def ts_sum(x, window):
+    return _rolling(x, window, lambda view: view.sum(axis=-1))
+
+
+def ts_mean(x, window):
+    return _rolling(x, window, lambda view: view.mean(axis=-1))
+
+
+def ts_std(x, window):
+    return _rolling(x, window, lambda view: view.std(axis=-1, ddof=1))
+
+
+def ts_rank(x, window):
+    """
+    視窗內最後一筆的排名（1 ~ window，同值取平均排名）
+    """
+    return rolling_rank(x, window)
+
+
+def ts_corr(x, y, window):
+    """
+    滾動 Pearson 相關係數
+    """
+    return rolling_pearson(x, y, window)
+
+
+def ts_spearman(x, y, window):
+    """
+    滾動 Spearman 相關係數
+    """
+    return rolling_spearman(x, y, window)
+
+
+def decay_linear(x, window):
+    """
+    線性衰減加權平均，最新一筆權重為 window，最舊一筆為 1
+    """
+    weights = np.arange(1, window + 1, dtype=np.float64)
+    weights /= weights.sum()
+    return _rolling(x, window, lambda view: view @ weights)
+
+
+def div(a, b):
+    with np.errstate(divide="ignore", invalid="ignore"):
+        result = np.divide(a, b)
+    return np.where(np.isinf(result), np.nan, result)
+
+
+def log(x):
+    with np.errstate(divide="ignore", invalid="ignore"):
+        return div(np.log(x), 1.0)
+
+
+OPERATORS = {
+    "ts_delay": (ts_delay, 1),
+    "ts_delta": (ts_delta, 1),
+    "ts_sum": (ts_sum, 1),
+    "ts_mean": (ts_mean, 1),
+    "ts_std": (ts_std, 1),
+    "ts_rank": (ts_rank, 1),
+    "ts_corr": (ts_corr, 2),
+    "ts_spearman": (ts_spearman, 2),
+    "decay_linear": (decay_linear, 1),
+    "rank": (rank, 1),
+    "zscore": (zscore, 1),
+    "demean": (demean, 1),
+    "neutralize": (neutralize, 2),
+    "scale": (scale, 1),
+    "quantile": (quantile, 1),
+    "abs": (np.abs, 1),
+    "sign": (np.sign, 1),
+    "log": (log, 1),
+}
+
+# 時間序列運算子的視窗參數決定公式需要多少歷史 K 棒
+WINDOW_OPERATORS = {"ts_delay", "ts_delta", "ts_sum", "ts_mean", "ts_std", "ts_rank", "ts_corr", "ts_spearman", "decay_linear"}
+
+# 截面運算子需要 (timestamps × symbols) 面板，單一交易對時沒有意義
+CROSS_SECTIONAL_OPERATORS = {"rank", "zscore", "demean", "neutralize", "scale", "quantile"}
+
+# 可選的常數參數個數（視窗運算子之外）
+OPTIONAL_PARAMETERS = {"scale": 1, "quantile": 1}
+
+
+def check_call(name, args):
+    """
+    檢查運算子的參數個數，視窗運算子的最後一個參數須為正整數常數
+    :return: 視窗長度，非視窗運算子為 None
+    """
+    _, n_inputs = OPERATORS[name]
+    if name in WINDOW_OPERATORS:
+        if len(args) != n_inputs + 1:
+            raise SyntaxError(f"{name} expects {n_inputs + 1} arguments, got {len(args)}")
+        window = args[n_inputs]
+        if window[0] != "num" or not float(window[1]).is_integer() or window[1] < 1:
+            raise SyntaxError(f"{name} window must be a positive integer constant")
+        return int(window[1])
+    if not n_inputs <= len(args) <= n_inputs + OPTIONAL_PARAMETERS.get(name, 0):
+        raise SyntaxError(f"{name} expects {n_inputs} arguments, got {len(args)}")
+    return None
+
+
+# ---------------------------------------------------------------------------
+# 解析器
+# ---------------------------------------------------------------------------
+
+TOKEN_PATTERN = re.compile(r"\s*(?:(\d+\.?\d*(?:[eE][-+]?\d+)?|\.\d+)|([A-Za-z_][A-Za-z_0-9]*)|(<=|>=|==|!=|[-+*/^(),;=<>]))")
+
+
+def tokenize(formula):
+    tokens = []
+    position = 0
+    formula = formula.rstrip()
+    while position < len(formula):
+        match = TOKEN_PATTERN.match(formula, position)
+        if match is None:
+            raise SyntaxError(f"Unexpected character at {position}: {formula[position:position + 10]!r}")
+        number, name, symbol = match.groups()
+        if number is not None:
+            tokens.append(("num", float(number)))
+        elif name is not None:
+            tokens.append(("name", name))
+        else:
+            tokens.append(("op", symbol))
+        position = match.end()
+    tokens.append(("end", None))
+    return tokens
+
+
+class Parser:
+    """
+    遞迴下降解析器，AST 節點為 tuple：
+    ("num", value) / ("var", name) / ("neg", node) / ("bin", op, left, right) / ("call", name, args)
+    """
+
+    def __init__(self, formula):
+        self.tokens = tokenize(formula)
+        self.position = 0
+        self.bindings = {}
+
+    def _peek(self):
+        return self.tokens[self.position]
+
+    def _next(self):
+        token = self.tokens[self.position]
+        self.position += 1
+        return token
+
+    def _expect(self, symbol):
+        token = self._next()
+        if token != ("op", symbol):
+            raise SyntaxError(f"Expected {symbol!r}, got {token[1]!r}")
+
+    def parse(self):
+        """
+        :return: 最後一個敘述的 AST（賦值的變數已展開）
+        """
+        result = None
+        while self._peek()[0] != "end":
+            if self._peek() == ("op", ";"):
+                self._next()
+                continue
+            result = self._statement()
+        if result is None:
+            raise SyntaxError("Empty formula")
+        return result
+
+    def _statement(self):
+        token = self._peek()
+        if token[0] == "name" and self.tokens[self.position + 1] == ("op", "="):
+            self.position += 2
+            node = self._comparison()
+            self.bindings[token[1]] = node
+            return node
+        return self._comparison()
+
+    def _comparison(self):
+        node = self._additive()
+        token = self._peek()
+        if token[0] == "op" and token[1] in ("<", ">", "<=", ">=", "==", "!="):
+            self._next()
+            node = ("bin", token[1], node, self._additive())
+        return node
+
+    def _additive(self):
+        node = self._term()
+        while self._peek() in (("op", "+"), ("op", "-")):
+            node = ("bin", self._next()[1], node, self._term())
+        return node
+
+    def _term(self):
+        node = self._unary()
+        while self._peek() in (("op", "*"), ("op", "/")):
+            node = ("bin", self._next()[1], node, self._unary())
+        return node
+
+    def _unary(self):
+        if self._peek() == ("op", "-"):
+            self._next()
+            return ("neg", self._unary())
+        if self._peek() == ("op", "+"):
+            self._next()
+            return self._unary()
+        return self._power()
+
+    def _power(self):
+        node = self._primary()
+        if self._peek() == ("op", "^"):
+            self._next()
+            node = ("bin", "^", node, self._unary())
+        return node
+
+    def _primary(self):
+        kind, value = self._next()
+        if kind == "num":
+            return ("num", value)
+        if kind == "name":
+            if self._peek() == ("op", "("):
+                self._next()
+                args = []
+                if self._peek() != ("op", ")"):
+                    args.append(self._comparison())
+                    while self._peek() == ("op", ","):
+                        self._next()
+                        args.append(self._comparison())
+                self._expect(")")
+                if value not in OPERATORS:
+                    raise SyntaxError(f"Unknown operator: {value}")
+                check_call(value, args)
+                return ("call", value, tuple(args))
+            # 已賦值的變數直接展開為對應的 AST
+            return self.bindings.get(value, ("var", value))
+        if (kind, value) == ("op", "("):
+            node = self._comparison()
+            self._expect(")")
+            return node
+        raise SyntaxError(f"Unexpected token: {value!r}")
+
+
+def parse(formula):
+    return Parser(formula).parse()
+
+
+# ---------------------------------------------------------------------------
+# 編譯器
+# ---------------------------------------------------------------------------
+
+BINARY_TEMPLATES = {
+    "+": "({} + {})",
+    "-": "({} - {})",
+    "*": "({} * {})",
+    "/": "div({}, {})",
+    "^": "np.power({}, {})",
+    "<": "({} < {}).astype(np.float64)",
+    ">": "({} > {}).astype(np.float64)",
+    "<=": "({} <= {}).astype(np.float64)",
+    ">=": "({} >= {}).astype(np.float64)",
+    "==": "({} == {}).astype(np.float64)",
+    "!=": "({} != {}).astype(np.float64)",
+}
+
+
+def lookback(node):
+    """
+    計算公式輸出第一個有效值前需要的歷史 K 棒數（不含當前 K 棒）
+    """
+    kind = node[0]
+    if kind in ("num", "var"):
+        return 0
+    if kind == "neg":
+        return lookback(node[1])
+    if kind == "bin":
+        return max(lookback(node[2]), lookback(node[3]))
+
+    name, args = node[1], node[2]
+    window = check_call(name, args)
+    _, n_inputs = OPERATORS[name]
+    depth = max(lookback(arg) for arg in args[:n_inputs])
+    if window is not None:
+        depth += window if name in ("ts_delay", "ts_delta") else window - 1
+    return depth
+
+
+def operators(node):
+    """
+    :return: 公式使用的運算子名稱
+    """
+    kind = node[0]
+    if kind == "neg":
+        return operators(node[1])
+    if kind == "bin":
+        return operators(node[2]) | operators(node[3])
+    if kind == "call":
+        return {node[1]}.union(*(operators(arg) for arg in node[2]))
+    return set()
+
+
+def variables(node):
+    kind = node[0]
+    if kind == "var":
+        return {node[1]}
+    if kind == "neg":
+        return variables(node[1])
+    if kind == "bin":
+        return variables(node[2]) | variables(node[3])
+    if kind == "call":
+        return set().union(*(variables(arg) for arg in node[2]))
+    return set()
+
+
+class _CodeGenerator:
+    """
+    將 AST 轉為一連串暫存變數賦值；相同的子樹只計算一次
+    """
+
+    def __init__(self):
+        self.lines = []
+        self.temporaries = {}
+
+    def emit(self, node):
+        kind = node[0]
+        if kind == "num":
+            return repr(node[1])
+        if node in self.temporaries:
+            return self.temporaries[node]
+
+        if kind == "var":
+            expression = f"data[{node[1]!r}]"
+        elif kind == "neg":
+            expression = f"(-{self.emit(node[1])})"
+        elif kind == "bin":
+            expression = BINARY_TEMPLATES[node[1]].format(self.emit(node[2]), self.emit(node[3]))
+        else:
+            name, args = node[1], node[2]
+            _, n_inputs = OPERATORS[name]
+            arguments = [self.emit(arg) for arg in args[:n_inputs]]
+            for arg in args[n_inputs:]:
+                if arg[0] != "num":
+                    raise SyntaxError(f"{name} parameters must be constants")
+                arguments.append(repr(int(arg[1])) if name in WINDOW_OPERATORS else repr(arg[1]))
+            expression = f"{name}({', '.join(arguments)})"
+
+        temporary = f"t{len(self.temporaries)}"
+        self.temporaries[node] = temporary
+        self.lines.append(f"    {temporary} = {expression}")
+        return temporary
+
+
+def _prepare(data, names):
+    """
+    取出公式需要的欄位轉為 float64 陣列，並補上衍生欄位 vwap、returns
+    """
+    prepared = {}
+    for name in names:
+        if name in data:
+            prepared[name] = np.asarray(data[name], dtype=np.float64)
+        elif name == "vwap" and "quote_asset_volume" in data and "volume" in data:
+            prepared[name] = div(np.asarray(data["quote_asset_volume"], dtype=np.float64), np.asarray(data["volume"], dtype=np.float64))
+        elif name == "returns" and "close" in data:
+            close = np.asarray(data["close"], dtype=np.float64)
+            prepared[name] = div(close, ts_delay(close, 1)) - 1
+        else:
+            raise KeyError(f"Missing input column: {name}")
+    return prepared
+
+
+class CompiledFormula:
+    """
+    編譯後的公式
+
+    evaluate() 為批次模式，一次計算整段陣列；stream() 回傳逐根 K 棒更新的串流計算器。
+    """
+
+    def __init__(self, formula):
+        self.formula = formula
+        self.ast = parse(formula)
+        self.lookback = lookback(self.ast)
+        self.variables = sorted(variables(self.ast))
+        self.cross_sectional = sorted(operators(self.ast) & CROSS_SECTIONAL_OPERATORS)
+
+        generator = _CodeGenerator()
+        result = generator.emit(self.ast)
+        self.source = "\n".join(["def _formula(data):", *generator.lines, f"    return {result}"])
+
+        namespace = {"np": np, "div": div, **{name: function for name, (function, _) in OPERATORS.items()}}
+        exec(compile(self.source, f"<formula {formula!r}>", "exec"), namespace)
+        self._function = namespace["_formula"]
+
+    def evaluate(self, data):
+        """
+        :param data: 欄位名稱 -> 1-D（單一交易對）或 2-D（timestamps × symbols）陣列，可為 DataFrame；
+                     使用截面運算子的公式只接受 2-D 面板
+        :return: 與輸入同形狀的 alpha 陣列
+        """
+        prepared = _prepare(data, self.variables)
+        if self.cross_sectional and any(values.ndim < 2 for values in prepared.values()):
+            raise ValueError(f"Cross-sectional operators {self.cross_sectional} need a 2-D (timestamps × symbols) panel, use ts_rank for a single symbol")
+        with np.errstate(divide="ignore", invalid="ignore"):
+            return np.asarray(self._function(prepared), dtype=np.float64)
+
+    def stream(self):
+        return FormulaStream(self)
+
+
+# ---------------------------------------------------------------------------
+# 串流運算子：每個節點保留自己的狀態，每根 K 棒以 O(1)（ts_rank / ts_spearman 見 src/rolling.py）更新
+# ---------------------------------------------------------------------------
+
+
+class _StreamDelay:
+    def __init__(self, period):
+        self.values = deque(maxlen=period + 1)
+
+    def update(self, x):
+        self.values.append(x)
+        return self.values[0] if len(self.values) == self.values.maxlen else np.nan
+
+
+class _StreamDelta(_StreamDelay):
+    def update(self, x):
+        return x - super().update(x)
+
+
+class _StreamMoments:
+    """
+    ts_sum / ts_mean / ts_std：相對於錨點的累加和，每 window 筆以視窗平均重設錨點並重新累加，避免長時間累加的誤差
+    """
+
+    def __init__(self, window, statistic):
+        self.window = window
+        self.statistic = statistic
+        self.values = deque()
+        self.nan_count = 0
+        self.updates = 0
+        self._rebuild()
+
+    def _rebuild(self):
+        finite = [value for value in self.values if not np.isnan(value)]
+        self.anchor = sum(finite) / len(finite) if finite else 0.0
+        self.sum = self.sum_squares = 0.0
+        for value in finite:
+            self._add(value, 1)
+
+    def _add(self, value, sign):
+        deviation = value - self.anchor
+        self.sum += sign * deviation
+        self.sum_squares += sign * deviation * deviation
+
+    def update(self, x):
+        self.values.append(x)
+        if np.isnan(x):
+            self.nan_count += 1
+        else:
+            self._add(x, 1)
+        if len(self.values) > self.window:
+            oldest = self.values.popleft()
+            if np.isnan(oldest):
+                self.nan_count -= 1
+            else:
+                self._add(oldest, -1)
+
+        self.updates += 1
+        if self.updates % self.window == 0:
+            self._rebuild()
+
+        if len(self.values) < self.window or self.nan_count:
+            return np.nan
+        n = self.window
+        if self.statistic == "sum":
+            return n * self.anchor + self.sum
+        if self.statistic == "mean":
+            return self.anchor + self.sum / n
+        if n < 2:
+            return np.nan
+        return float(np.sqrt(max((self.sum_squares - self.sum * self.sum / n) / (n - 1), 0.0)))
+
+
+class _StreamDecayLinear:
+    """
+    線性衰減加權和：移出最舊一筆時所有權重減 1，W' = W - S + window × x
+    """
+
+    def __init__(self, window):
+        self.window = window
+        self.total_weight = window * (window + 1) / 2
+        self.values = deque(maxlen=window)
+        self.nan_count = 0
+        self.updates = 0
+        self.dirty = True
+        self.weighted = self.sum = 0.0
+
+    def update(self, x):
+        full = len(self.values) == self.window
+        oldest = self.values[0] if full else np.nan
+        self.values.append(x)
+        self.nan_count += int(np.isnan(x)) - int(full and np.isnan(oldest))
+
+        self.updates += 1
+        if len(self.values) < self.window or self.nan_count:
+            self.dirty = True
+            return np.nan
+        if self.dirty or self.updates % self.window == 0:
+            self.weighted = sum((i + 1) * value for i, value in enumerate(self.values))
+            self.sum = sum(self.values)
+            self.dirty = False
+        else:
+            self.weighted += self.window * x - self.sum
+            self.sum += x - oldest
+        return self.weighted / self.total_weight
+
+
+class _StreamElementwise:
+    def __init__(self, function):
+        self.function = function
+
+    def update(self, x):
+        return float(self.function(x))
+
+
+class _StreamPair:
+    def __init__(self, rolling):
+        self.rolling = rolling
+
+    def update(self, x, y):
+        return self.rolling.update(x, y)
+
+
+# 運算子名稱 -> 建立串流狀態的函數（參數為公式中的常數參數）
+STREAM_OPERATORS = {
+    "ts_delay": _StreamDelay,
+    "ts_delta": _StreamDelta,
+    "ts_sum": lambda window: _StreamMoments(window, "sum"),
+    "ts_mean": lambda window: _StreamMoments(window, "mean"),
+    "ts_std": lambda window: _StreamMoments(window, "std"),
+    "ts_rank": RollingRank,
+    "ts_corr": lambda window: _StreamPair(RollingPearson(window)),
+    "ts_spearman": lambda window: _StreamPair(RollingSpearman(window)),
+    "decay_linear": _StreamDecayLinear,
+    "abs": lambda: _StreamElementwise(np.abs),
+    "sign": lambda: _StreamElementwise(np.sign),
+    "log": lambda: _StreamElementwise(log),
+}
+
+BINARY_FUNCTIONS = {
+    "+": operator.add,
+    "-": operator.sub,
+    "*": operator.mul,
+    "/": div,
+    "^": np.power,
+    "<": operator.lt,
+    ">": operator.gt,
+    "<=": operator.le,
+    ">=": operator.ge,
+    "==": operator.eq,
+    "!=": operator.ne,
+}
+
+
+def _field(bar, name):
+    """
+    K 棒缺少的欄位視為 NaN，各節點的狀態仍每根 K 棒前進一格，不會錯位
+    """
+    value = bar.get(name)
+    return np.nan if value is None else float(value)
+
+
+class FormulaStream:
+    """
+    串流模式：公式的每個節點保留自己的滾動狀態（延遲佇列、累加和、排序視窗等），
+    每次 update 只以最新一根 K 棒更新各節點，不重新計算整個視窗。結果與 evaluate() 的最後一筆一致（浮點誤差內）。
+    """
+
+    def __init__(self, compiled):
+        if compiled.cross_sectional:
+            raise ValueError(f"Cross-sectional operators {compiled.cross_sectional} cannot be streamed for a single symbol")
+        self.compiled = compiled
+        self.steps = []
+        self.slots = {}
+        self.output = self._build(compiled.ast)
+        self.values = [np.nan] * len(self.steps)
+
+    def _variable(self, name):
+        if name == "vwap":
+            return lambda bar: _field(bar, name) if name in bar else float(div(_field(bar, "quote_asset_volume"), _field(bar, "volume")))
+        if name == "returns":
+            previous = _StreamDelay(1)
+
+            def returns(bar):
+                # 前一根收盤每根 K 棒都要更新
+                close = _field(bar, "close")
+                derived = float(div(close, previous.update(close))) - 1
+                return _field(bar, name) if name in bar else derived
+
+            return returns
+        return lambda bar: _field(bar, name)
+
+    def _build(self, node):
+        """
+        依後序將 AST 展開為一連串步驟，相同的子樹共用同一個節點
+        :return: 節點輸出在 self.values 中的位置
+        """
+        if node in self.slots:
+            return self.slots[node]
+        kind = node[0]
+        if kind == "num":
+            value = float(node[1])
+            step = lambda bar, values: value
+        elif kind == "var":
+            read = self._variable(node[1])
+            step = lambda bar, values: read(bar)
+        elif kind == "neg":
+            a = self._build(node[1])
+            step = lambda bar, values: -values[a]
+        elif kind == "bin":
+            function = BINARY_FUNCTIONS[node[1]]
+            a, b = self._build(node[2]), self._build(node[3])
+            step = lambda bar, values: float(function(values[a], values[b]))
+        else:
+            name, args = node[1], node[2]
+            _, n_inputs = OPERATORS[name]
+            inputs = [self._build(arg) for arg in args[:n_inputs]]
+            state = STREAM_OPERATORS[name](*(int(arg[1]) for arg in args[n_inputs:]))
+            step = lambda bar, values: state.update(*(values[i] for i in inputs))
+
+        self.slots[node] = len(self.steps)
+        self.steps.append(step)
+        return self.slots[node]
+
+    def update(self, bar):
+        """
+        :param bar: 欄位名稱 -> 當前 K 棒的值（dict 或 Series），缺少的欄位為 NaN
+        :return: 當前 K 棒的 alpha 值（歷史不足時為 NaN）
+        """
+        values = self.values
+        with np.errstate(divide="ignore", invalid="ignore"):
+            for i, step in enumerate(self.steps):
+                values[i] = step(bar, values)
+        return float(values[self.output])
+
+
+def compile_formula(formula):
+    return CompiledFormula(formula)
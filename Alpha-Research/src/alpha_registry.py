@@ -0,0 +1,242 @@
+import ast
+import os
+import json
+import importlib
+from src.interval import Interval
+
+# 定義在此檔案的類別為基底類別，不列入策略清單
+BASE_MODULE = "base_alpha"
+BASE_CLASS = "BaseAlpha"
+
+
+def _base_name(node):
+    """
+    取得基底類別名稱（Name 或 module.Name 皆取最後一段）
+    """
+    if isinstance(node, ast.Name):
+        return node.id
+    if isinstance(node, ast.Attribute):
+        return node.attr
+    return None
+
+
+def _parameter_value(node):
+    """
+    參數值可直接求值時回傳 Python 值，Interval 常數轉為區間字串，其他回傳原始碼字串
+    """
+    try:
+        return ast.literal_eval(node)
+    except (ValueError, SyntaxError, TypeError):
+        pass
+    if isinstance(node, ast.Attribute) and isinstance(node.value, ast.Name) and node.value.id == "Interval":
+        return getattr(Interval, node.attr, ast.unparse(node))
+    return ast.unparse(node)
+
+
+# 快取中 JSON 無法原樣表示的參數值（tuple、set、bytes、complex 等）記為 {"__repr__": repr(value)}
+REPR_TAG = "__repr__"
+
+# 快取格式版本，格式變更後舊快取整個重新掃描
+CACHE_VERSION = 2
+
+
+def _json_safe(value):
+    """
+    值經 JSON 寫入再讀回後是否不變（tuple 會變 list、非字串鍵會變字串，皆視為不安全）
+    """
+    if value is None or isinstance(value, (str, bool, int, float)):
+        return True
+    if isinstance(value, list):
+        return all(map(_json_safe, value))
+    if isinstance(value, dict):
+        return set(value) != {REPR_TAG} and all(isinstance(key, str) and _json_safe(item) for key, item in value.items())
+    return False
+
+
+def _encode_parameter(value):
+    return value if _json_safe(value) else {REPR_TAG: repr(value)}
+
+
+def _decode_parameter(value):
+    if isinstance(value, dict) and set(value) == {REPR_TAG}:
+        return ast.literal_eval(value[REPR_TAG])
+    return value
+
+
+def scan_alpha_file(file_path):
+    """
+    以 AST 靜態解析 alpha 檔案，不執行任何程式碼
+    :return: [{"name", "bases", "params", "doc", "line"}, ...]
+    """
+    with open(file_path, "r", encoding="utf-8") as f:
+        tree = ast.parse(f.read(), filename=file_path)
+
+    classes = []
+    for node in tree.body:
+        if not isinstance(node, ast.ClassDef):
+            continue
+        params = {}
+        for statement in node.body:
+            # 參數為全大寫的類別屬性，例如 TRADING_PAIR、KLINE_INTERVAL、MACD_LENGTH
+            if isinstance(statement, ast.Assign) and len(statement.targets) == 1 and isinstance(statement.targets[0], ast.Name):
+                name = statement.targets[0].id
+                if name.isupper():
+                    params[name] = _parameter_value(statement.value)
+        doc = ast.get_docstring(node)
+        classes.append(
+            {
+                "name": node.name,
+                "bases": [name for name in map(_base_name, node.bases) if name],
+                "params": params,
+                "doc": doc.strip().splitlines()[0] if doc else "",
+                "line": node.lineno,
+            }
+        )
+    return classes
+
+
+class AlphaRegistry:
+    """
+    Alpha 策略登錄表
+
+    以 AST 掃描 alpha 資料夾找出所有 BaseAlpha 子類別與其參數，只有被選取的策略才會 import。
+    掃描結果依檔案 mtime 快取於磁碟，無法解析的檔案記錄於 errors 而不影響其他策略。
+    """
+
+    def __init__(self, alpha_dir="alpha", cache_path=None):
+        """
+        :param alpha_dir: alpha 資料夾（同時為 package 名稱）
+        :param cache_path: 掃描結果快取檔，預設為 <alpha_dir>/.registry_cache.json
+        """
+        self.alpha_dir = alpha_dir
+        self.cache_path = cache_path or os.path.join(alpha_dir, ".registry_cache.json")
+        self.errors = {}
+        self.entries = self._discover()
+
+    def _read_cache(self):
+        try:
+            with open(self.cache_path, "r", encoding="utf-8") as f:
+                cache = json.load(f)
+        except (OSError, ValueError):
+            return {}
+        if not isinstance(cache, dict) or cache.get("version") != CACHE_VERSION:
+            return {}
+
+        decoded = {}
+        for file, entry in cache.get("files", {}).items():
+            try:
+                for cls in entry["classes"]:
+                    cls["params"] = {name: _decode_parameter(value) for name, value in cls["params"].items()}
+            except (KeyError, TypeError, ValueError, SyntaxError):
+                continue  # 無法還原的項目重新掃描
+            decoded[file] = entry
+        return decoded
+
+    def _write_cache(self, cache):
+        """
+        參數以可還原的形式寫入，冷掃描與讀取快取得到相同的值；repr 無法還原的檔案不寫入快取，下次重新掃描
+        """
+        encoded = {}
+        for file, entry in cache.items():
+            classes = []
+            for cls in entry["classes"]:
+                params = {name: _encode_parameter(value) for name, value in cls["params"].items()}
+                try:
+                    restored = {name: _decode_parameter(value) for name, value in params.items()}
+                except (ValueError, SyntaxError):
+                    break
+                if restored != cls["params"]:
+                    break
+                classes.append({**cls, "params": params})
+            else:
+                encoded[file] = {**entry, "classes": classes}
+
+        try:
+            with open(self.cache_path, "w", encoding="utf-8") as f:
+                json.dump({"version": CACHE_VERSION, "files": encoded}, f, ensure_ascii=False, indent=2)
+        except (OSError, TypeError, ValueError):
+            pass  # 快取寫入失敗不影響使用
+
+    def _scan(self):
+        """
+        掃描所有檔案，mtime 與大小未變的檔案直接使用快取
+        :return: 模組名稱 -> 類別列表
+        """
+        cache = self._read_cache()
+        updated = {}
+        modules = {}
+
+        for file in sorted(os.listdir(self.alpha_dir)):
+            if not file.endswith(".py") or file == "__init__.py":
+                continue
+            file_path = os.path.join(self.alpha_dir, file)
+            stat = os.stat(file_path)
+            cached = cache.get(file)
+
+            if cached and cached["mtime_ns"] == stat.st_mtime_ns and cached["size"] == stat.st_size:
+                entry = cached
+            else:
+                try:
+                    entry = {"mtime_ns": stat.st_mtime_ns, "size": stat.st_size, "classes": scan_alpha_file(file_path), "error": None}
+                except (SyntaxError, UnicodeDecodeError, ValueError) as e:
+                    entry = {"mtime_ns": stat.st_mtime_ns, "size": stat.st_size, "classes": [], "error": f"{type(e).__name__}: {e}"}
+
+            updated[file] = entry
+            if entry["error"]:
+                self.errors[file[:-3]] = entry["error"]
+            else:
+                modules[file[:-3]] = entry["classes"]
+
+        if updated != cache:
+            self._write_cache(updated)
+        return modules
+
+    def _discover(self):
+        modules = self._scan()
+        classes = {cls["name"]: (module_name, cls) for module_name, module_classes in modules.items() for cls in module_classes}
+
+        def is_alpha(name, seen=()):
+            if name == BASE_CLASS:
+                return True
+            if name not in classes or name in seen:
+                return False
+            return any(is_alpha(base, seen + (name,)) for base in classes[name][1]["bases"])
+
+        def resolved_params(name, seen=()):
+            # 依繼承順序合併參數，子類別覆蓋基底類別
+            if name not in classes or name in seen:
+                return {}
+            params = {}
+            for base in reversed(classes[name][1]["bases"]):
+                params.update(resolved_params(base, seen + (name,)))
+            params.update(classes[name][1]["params"])
+            return params
+
+        entries = {}
+        for module_name, module_classes in modules.items():
+            if module_name == BASE_MODULE:
+                continue
+            for cls in module_classes:
+                if is_alpha(cls["name"]):
+                    entries[cls["name"]] = {
+                        "module": f"{self.alpha_dir}.{module_name}",
+                        "class": cls["name"],
+                        "params": resolved_params(cls["name"]),
+                        "doc": cls["doc"],
+                    }
+        return entries
+
+    def names(self):
+        return list(self.entries.keys())
+
+    def params(self, name):
+        return self.entries[name]["params"]
+
+    def load(self, name):
+        """
+        只 import 選取策略所在的模組
+        :return: 策略類別
+        """
+        entry = self.entries[name]
+        module = importlib.import_module(entry["module"])
+        return getattr(module, entry["class"])
@@ -0,0 +1,130 @@
+import os
+import json
+import hashlib
+from src.signal_cache import file_sha256
+
+MANIFEST_FILENAME = ".analysis_manifest.json"
+
+
+def code_version(source_paths):
+    """
+    分析程式碼的版本：所有來源檔內容的 sha256，程式碼變更後既有產出視為過期
+    """
+    digest = hashlib.sha256()
+    for source_path in source_paths:
+        digest.update(os.path.basename(source_path).encode())
+        digest.update(file_sha256(source_path).encode())
+    return digest.hexdigest()
+
+
+class AnalysisManifest:
+    """
+    增量分析清單
+
+    記錄每個輸入檔的 mtime / 大小 / sha256、分析版本、分析模式、影響結果的參數與產出檔案。掃描時只 stat 檔案，
+    mtime 或大小改變才重新計算 hash，內容、分析版本、模式、參數或產出檔任一不符時才需要重新分析。
+    """
+
+    def __init__(self, root, version, manifest_path=None):
+        """
+        :param root: 輸入檔所在的根目錄（清單中的路徑相對於此）
+        :param version: 分析版本，見 code_version()
+        :param manifest_path: 清單檔，預設為 <root>/.analysis_manifest.json
+        """
+        self.root = str(root)
+        self.version = version
+        self.manifest_path = manifest_path or os.path.join(self.root, MANIFEST_FILENAME)
+        self.entries = self._read()
+        self.current = {}
+
+    def _read(self):
+        try:
+            with open(self.manifest_path, "r", encoding="utf-8") as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return {}
+
+    def save(self):
+        """
+        寫入暫存檔後再取代，中斷時不會留下損毀的清單
+        """
+        temporary_path = f"{self.manifest_path}.tmp"
+        with open(temporary_path, "w", encoding="utf-8") as f:
+            json.dump(self.entries, f, indent=2)
+        os.replace(temporary_path, self.manifest_path)
+
+    def _walk(self, suffix):
+        stack = [self.root]
+        while stack:
+            with os.scandir(stack.pop()) as entries:
+                for entry in entries:
+                    if entry.is_dir(follow_symlinks=False):
+                        stack.append(entry.path)
+                    elif entry.name.endswith(suffix):
+                        yield entry
+
+    def _content(self, entry, relative_path):
+        """
+        :return: {"mtime_ns", "size", "sha256"}，stat 未變時沿用清單中的 hash
+        """
+        stat = entry.stat()
+        recorded = self.entries.get(relative_path)
+        if recorded and recorded["mtime_ns"] == stat.st_mtime_ns and recorded["size"] == stat.st_size:
+            sha256 = recorded["sha256"]
+        else:
+            sha256 = file_sha256(entry.path)
+        return {"mtime_ns": stat.st_mtime_ns, "size": stat.st_size, "sha256": sha256}
+
+    def is_stale(self, relative_path, render=True, streaming=False, options=None):
+        recorded = self.entries.get(relative_path)
+        current = self.current[relative_path]
+        if not recorded or recorded["sha256"] != current["sha256"] or recorded["version"] != self.version:
+            return True
+        if render and not recorded["render"]:
+            return True
+        # 串流模式的統計為近似值，一般模式執行時重新分析
+        if not streaming and recorded.get("streaming", False):
+            return True
+        if options is not None and recorded.get("options") != options:
+            return True
+        return not all(os.path.exists(os.path.join(self.root, artifact)) for artifact in recorded["artifacts"])
+
+    def stale_files(self, suffix=".csv", render=True, streaming=False, options=None):
+        """
+        :param render: 需要圖表時，先前只產生統計的檔案也視為過期
+        :param streaming: 本次是否為串流模式，非串流時先前以串流模式產生的檔案也視為過期
+        :param options: 影響結果的參數（可序列化為 JSON 的 dict），與記錄不同時視為過期，None 為不比較
+        :return: 需要重新分析的輸入檔（相對路徑，已排序）
+        """
+        self.current = {}
+        for entry in self._walk(suffix):
+            relative_path = os.path.relpath(entry.path, self.root)
+            self.current[relative_path] = self._content(entry, relative_path)
+
+        # 已刪除的輸入檔從清單移除
+        for relative_path in set(self.entries) - set(self.current):
+            del self.entries[relative_path]
+
+        # 內容未變只是 mtime 改變的檔案更新 stat，下次不需重新計算 hash
+        for relative_path, current in self.current.items():
+            recorded = self.entries.get(relative_path)
+            if recorded and recorded["sha256"] == current["sha256"]:
+                recorded.update(current)
+
+        return sorted(relative_path for relative_path in self.current if self.is_stale(relative_path, render, streaming, options))
+
+    def record(self, relative_path, artifacts, render=True, streaming=False, options=None):
+        """
+        記錄分析成功的輸入檔與其產出
+        :param artifacts: 產出檔的相對路徑
+        :param streaming: 是否以串流模式分析
+        :param options: 分析時使用的參數，見 stale_files()
+        """
+        self.entries[relative_path] = {
+            **self.current[relative_path],
+            "version": self.version,
+            "render": render,
+            "streaming": streaming,
+            "options": options,
+            "artifacts": list(artifacts),
+        }
@@ -0,0 +1,148 @@
+"""
+向量化回測
+
+持倉陣列與 K 棒對齊：positions[t] 為第 t 根 K 棒收盤後持有的曝險（資金的倍數，正為多、負為空），
+賺取第 t + 1 根 K 棒的收盤到收盤報酬。每根 K 棒的淨報酬為
+    前一根持倉 × K 棒報酬 − 手續費 − 滑價 − 資金費率
+手續費依換手量與 taker / maker 費率計算；滑價為半價差加上平方根衝擊 impact × sqrt(成交金額 / quote_asset_volume)，
+成交金額以固定資金 capital 計算，因此整段回測只需對欄位陣列做一次向量運算，不需逐根迴圈。
+positions 可為 1-D 或 (bars × strategies) 的 2-D 陣列，多組持倉共用同一次計算。
+"""
+
+import numpy as np
+import pandas as pd
+from src.interval import bars_per_day
+
+# Binance USDⓈ-M 期貨一般帳戶費率
+DEFAULT_TAKER_FEE = 0.0005
+DEFAULT_MAKER_FEE = 0.0002
+
+DEFAULT_CAPITAL = 10_000
+DEFAULT_IMPACT = 0.1
+
+# 單筆滑價上限（quote_asset_volume 為 0 時使用）
+MAX_SLIPPAGE = 0.01
+
+
+def funding_by_bar(bar_times, funding_rates):
+    """
+    將資金費率對齊到 K 棒：結算時間落在 (close_time[t - 1], close_time[t]] 的費率由第 t 根 K 棒負擔
+    :param funding_rates: 含 funding_time、funding_rate 欄位的 DataFrame（Binance fundingRate 的毫秒時間亦可）
+    :return: 長度 len(bar_times) 的費率陣列，沒有結算的 K 棒為 0
+    """
+    bar_times = np.asarray(bar_times, dtype="datetime64[ns]")
+    funding_time = funding_rates["funding_time"]
+    unit = "ms" if pd.api.types.is_numeric_dtype(funding_time) else None
+    times = pd.to_datetime(funding_time, unit=unit).to_numpy(dtype="datetime64[ns]")
+    positions = np.searchsorted(bar_times, times, "left")
+    # 第一根之前的持倉為空手，超出資料範圍的結算不計
+    valid = (positions > 0) & (positions < len(bar_times))
+    return np.bincount(positions[valid], funding_rates["funding_rate"].to_numpy(dtype=np.float64)[valid], minlength=len(bar_times))
+
+
+def backtest(
+    close,
+    positions,
+    quote_volume=None,
+    funding=None,
+    taker_fee=DEFAULT_TAKER_FEE,
+    maker_fee=DEFAULT_MAKER_FEE,
+    maker_ratio=0.0,
+    half_spread=0.0,
+    impact=DEFAULT_IMPACT,
+    capital=DEFAULT_CAPITAL,
+    max_slippage=MAX_SLIPPAGE,
+):
+    """
+    :param close: 收盤價
+    :param positions: 每根 K 棒收盤後的目標曝險，1-D 或 (bars × strategies)
+    :param quote_volume: quote_asset_volume，None 時只計半價差
+    :param funding: 與 K 棒對齊的資金費率（funding_by_bar 的結果），多單支付正費率
+    :param maker_ratio: 以 maker 成交的換手比例
+    :param impact: 平方根衝擊係數
+    :param capital: 曝險 1 對應的資金（quote 計價），用於計算成交金額佔成交量的比例
+    :return: {"gross_return", "fee", "slippage", "funding", "net_return", "equity", "drawdown", "turnover", "exposure"}，形狀與 positions 相同
+    """
+    close = np.asarray(close, dtype=np.float64)
+    positions = np.asarray(positions, dtype=np.float64)
+    shape = positions.shape
+    positions = positions.reshape(len(positions), -1)
+    n = len(close)
+    if len(positions) != n:
+        raise ValueError("positions must be aligned to the bars")
+
+    returns = np.r_[0.0, close[1:] / close[:-1] - 1][:, None]
+    # 進入第 t 根 K 棒時的持倉（第一根之前為空手）
+    held = np.vstack([np.zeros((1, positions.shape[1])), positions[:-1]])
+    turnover = np.abs(positions - held)
+
+    fee = turnover * (maker_ratio * maker_fee + (1 - maker_ratio) * taker_fee)
+    slippage_rate = np.full((n, 1), half_spread)
+    if quote_volume is not None and impact:
+        quote_volume = np.asarray(quote_volume, dtype=np.float64)[:, None]
+        traded = turnover * capital
+        with np.errstate(divide="ignore", invalid="ignore"):
+            participation = np.where(quote_volume > 0, traded / quote_volume, np.inf)
+        slippage_rate = np.minimum(half_spread + impact * np.sqrt(participation), max_slippage)
+    slippage = np.where(turnover > 0, turnover * slippage_rate, 0.0)
+    funding_cost = held * np.asarray(funding, dtype=np.float64)[:, None] if funding is not None else np.zeros_like(held)
+
+    gross_return = held * returns
+    net_return = gross_return - fee - slippage - funding_cost
+    equity = capital * np.cumprod(1 + net_return, axis=0)
+    drawdown = equity / np.maximum.accumulate(equity, axis=0) - 1
+
+    result = {
+        "gross_return": gross_return,
+        "fee": fee,
+        "slippage": slippage,
+        "funding": funding_cost,
+        "net_return": net_return,
+        "equity": equity,
+        "drawdown": drawdown,
+        "turnover": turnover,
+        "exposure": held,
+    }
+    return {name: values.reshape(shape) for name, values in result.items()}
+
+
+def backtest_klines(bars, positions, funding_rates=None, time_column="close_time", **kwargs):
+    """
+    以 K 線 DataFrame 回測單組持倉
+    :param bars: load_klines() 的結果（依時間排序）
+    :param funding_rates: 見 funding_by_bar，None 為不計資金費率（現貨）
+    :return: 每根 K 棒一列的 DataFrame（close_time、position 與 backtest() 的各序列）
+    """
+    bar_times = pd.to_datetime(bars[time_column]).to_numpy(dtype="datetime64[ns]")
+    quote_volume = bars["quote_asset_volume"].to_numpy() if "quote_asset_volume" in bars.columns else None
+    funding = funding_by_bar(bar_times, funding_rates) if funding_rates is not None else None
+    result = backtest(bars["close"].to_numpy(), positions, quote_volume, funding, **kwargs)
+    return pd.DataFrame({time_column: bar_times, "position": np.asarray(positions, dtype=np.float64), **result})
+
+
+def summarize_backtest(result, kline_interval=None, periods_per_year=None):
+    """
+    :param result: backtest() 或 backtest_klines() 的結果
+    :param kline_interval: 用於年化（加密貨幣全年無休，一年 365 天）
+    :param periods_per_year: 每年 K 棒數，資訊 K 棒等沒有固定區間時指定；兩者皆無時不年化
+    :return: 總報酬、年化報酬與波動、Sharpe、最大回撤、換手、平均曝險與各項成本合計
+    """
+    net_return = np.asarray(result["net_return"], dtype=np.float64)
+    periods = periods_per_year or (bars_per_day(kline_interval) * 365 if kline_interval else 1)
+    n = len(net_return)
+    growth = np.prod(1 + net_return, axis=0)
+    volatility = net_return.std(axis=0, ddof=1) * np.sqrt(periods) if n > 1 else np.nan
+    with np.errstate(divide="ignore", invalid="ignore"):
+        sharpe = np.where(volatility != 0, net_return.mean(axis=0) * periods / volatility, 0.0)
+    return {
+        "total_return": growth - 1,
+        "annual_return": growth ** (periods / n) - 1 if n else np.nan,
+        "annual_volatility": volatility,
+        "sharpe": sharpe,
+        "max_drawdown": np.asarray(result["drawdown"]).min(axis=0),
+        "turnover": np.asarray(result["turnover"]).sum(axis=0),
+        "mean_exposure": np.abs(np.asarray(result["exposure"])).mean(axis=0),
+        "fees": np.asarray(result["fee"]).sum(axis=0),
+        "slippage": np.asarray(result["slippage"]).sum(axis=0),
+        "funding": np.asarray(result["funding"]).sum(axis=0),
+    }
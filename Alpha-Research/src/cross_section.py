@@ -0,0 +1,139 @@
+"""
+截面運算
+
+作用於 (timestamps × symbols) 的面板陣列，每個時間點在所有交易對之間計算，NaN（缺少 K 棒或尚未上市）
+不參與計算且輸出仍為 NaN。1-D 輸入視為只有一個交易對的面板（截面只有一個值，結果為常數；
+公式語言中對 1-D 輸入使用截面運算子會直接報錯，見 src/alpha_expr.py）。
+"""
+
+import numpy as np
+from src.rolling import average_rank
+
+
+def _as_panel(x):
+    x = np.asarray(x, dtype=np.float64)
+    return (x[:, None], True) if x.ndim == 1 else (x, False)
+
+
+def _restore(out, squeeze):
+    return out[:, 0] if squeeze else out
+
+
+def _valid_count(valid):
+    return valid.sum(axis=1, keepdims=True)
+
+
+def _cross_mean(x, valid):
+    with np.errstate(divide="ignore", invalid="ignore"):
+        return np.where(valid, x, 0.0).sum(axis=1, keepdims=True) / _valid_count(valid)
+
+
+def rank(x):
+    """
+    截面百分位排名（1/n ~ 1，同值取平均），單一交易對時每個時間點排名為 1
+    """
+    x, squeeze = _as_panel(x)
+    valid = ~np.isnan(x)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        pct = average_rank(x) / _valid_count(valid)
+    return _restore(np.where(valid, pct, np.nan), squeeze)
+
+
+def zscore(x):
+    """
+    截面標準化 (x - mean) / std，標準差為 0 時為 NaN
+    """
+    x, squeeze = _as_panel(x)
+    valid = ~np.isnan(x)
+    deviation = x - _cross_mean(x, valid)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        std = np.sqrt(np.where(valid, deviation**2, 0.0).sum(axis=1, keepdims=True) / _valid_count(valid))
+        z = deviation / std
+    return _restore(np.where(valid & np.isfinite(z), z, np.nan), squeeze)
+
+
+def demean(x, groups=None):
+    """
+    截面去均值
+    :param groups: 分組標籤，(symbols,) 或 (timestamps × symbols)，指定時減去組內平均（例如產業中性）
+    """
+    x, squeeze = _as_panel(x)
+    valid = ~np.isnan(x)
+    if groups is None:
+        return _restore(x - _cross_mean(x, valid), squeeze)
+
+    # 單一交易對時每個時間點只有一個樣本，分組不影響結果
+    labels = np.zeros(x.shape, dtype=np.int64) if squeeze else np.broadcast_to(np.asarray(groups), x.shape)
+    _, codes = np.unique(labels, return_inverse=True)
+    n_groups = codes.max() + 1
+    # 每個 (時間點, 組別) 對應一個桶，以 bincount 一次算出所有組內平均
+    bucket = (np.arange(x.shape[0])[:, None] * n_groups + codes.reshape(x.shape))[valid]
+    sums = np.bincount(bucket, weights=x[valid], minlength=x.shape[0] * n_groups)
+    counts = np.bincount(bucket, minlength=x.shape[0] * n_groups)
+
+    out = np.full(x.shape, np.nan)
+    out[valid] = x[valid] - sums[bucket] / counts[bucket]
+    return _restore(out, squeeze)
+
+
+def neutralize(x, exposures):
+    """
+    截面中性化：每個時間點以 x 對 exposures（含截距）做最小平方回歸，回傳殘差
+    :param exposures: 與 x 同形狀的單一因子，或最後一軸為 K 個因子的陣列
+    """
+    x, squeeze = _as_panel(x)
+    factors = np.asarray(exposures, dtype=np.float64)
+    if factors.ndim == x.ndim - squeeze:
+        factors = factors[..., None]
+    if squeeze:
+        factors = factors[:, None, :]
+    factors = np.broadcast_to(factors, x.shape + factors.shape[-1:])
+
+    valid = ~np.isnan(x) & ~np.isnan(factors).any(axis=-1)
+    design = np.concatenate([np.ones(x.shape + (1,)), factors], axis=-1)
+    weighted = np.where(valid[..., None], design, 0.0)
+    target = np.where(valid, x, 0.0)
+
+    # 批次求解每個時間點的正規方程，奇異時以 pseudo-inverse 取最小範數解
+    gram = np.einsum("tnk,tnl->tkl", weighted, weighted)
+    moment = np.einsum("tnk,tn->tk", weighted, target)
+    beta = np.einsum("tkl,tl->tk", np.linalg.pinv(gram), moment)
+    residual = x - np.einsum("tnk,tk->tn", np.where(valid[..., None], design, 0.0), beta)
+    return _restore(np.where(valid, residual, np.nan), squeeze)
+
+
+def scale(x, a=1.0):
+    """
+    截面縮放，使每個時間點的絕對值總和為 a
+    """
+    x, squeeze = _as_panel(x)
+    total = np.nansum(np.abs(x), axis=1, keepdims=True)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        scaled = np.where(total > 0, x * a / total, 0.0)
+    return _restore(np.where(np.isnan(x), np.nan, scaled), squeeze)
+
+
+def quantile(x, q=0.2):
+    """
+    截面分位選擇：排名前 q 比例為 1、後 q 比例為 -1，其餘為 0
+    :param q: 每一側的比例，0 < q <= 0.5
+    """
+    x, squeeze = _as_panel(x)
+    valid = ~np.isnan(x)
+    ranks = average_rank(x)
+    n = _valid_count(valid)
+    cutoff = q * n
+    signal = np.where(ranks >= n + 1 - cutoff, 1.0, np.where(ranks <= cutoff, -1.0, 0.0))
+    return _restore(np.where(valid, signal, np.nan), squeeze)
+
+
+def quantile_weights(x, q=0.2):
+    """
+    多空等權重：前 q 比例各 +1/n_long、後 q 比例各 -1/n_short，每個時間點多空各為 1 單位
+    """
+    signal, squeeze = _as_panel(quantile(x, q))
+    long_count = (signal > 0).sum(axis=1, keepdims=True)
+    short_count = (signal < 0).sum(axis=1, keepdims=True)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        weights = np.where(signal > 0, 1.0 / long_count, np.where(signal < 0, -1.0 / short_count, 0.0))
+    return _restore(np.where(np.isnan(signal), np.nan, weights), squeeze)
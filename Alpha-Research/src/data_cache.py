@@ -0,0 +1,142 @@
+import os
+import threading
+from collections import OrderedDict
+import pandas as pd
+
+# 預設記憶體快取上限（bytes）
+DEFAULT_MAX_BYTES = 1024**3
+
+
+def kline_file_path(exchange, trading_pair, kline_interval, date):
+    """
+    回傳 kline 資料夾中某日 K 線檔案的路徑
+    """
+    return os.path.join("kline", exchange, trading_pair, kline_interval, f"{trading_pair}_{date}_{kline_interval}.csv")
+
+
+def parse_kline_file_path(file_path):
+    """
+    由 kline/<exchange>/<pair>/<interval>/<pair>_<date>_<interval>.csv 解析出快取鍵
+    :return: (exchange, trading_pair, kline_interval, date)，格式不符則回傳 None
+    """
+    parts = os.path.normpath(os.path.abspath(file_path)).split(os.sep)
+    if len(parts) < 4:
+        return None
+    exchange, trading_pair, kline_interval, file_name = parts[-4:]
+    prefix, suffix = f"{trading_pair}_", f"_{kline_interval}.csv"
+    if not (file_name.startswith(prefix) and file_name.endswith(suffix)):
+        return None
+    return exchange, trading_pair, kline_interval, file_name[len(prefix) : -len(suffix)]
+
+
+class KlineCache:
+    """
+    進程內共用的 K 線 DataFrame 快取
+
+    以 (exchange, pair, interval, day) 為鍵、依 DataFrame 佔用的 bytes 做 LRU 淘汰，
+    檔案 mtime 改變時自動失效。可選擇在後方掛一層磁碟快取（pickle），
+    跨次執行時免去 CSV 解析。回傳的 DataFrame 為共用物件，請勿直接修改。
+    """
+
+    def __init__(self, max_bytes=DEFAULT_MAX_BYTES, persistent_dir=None):
+        """
+        :param max_bytes: 記憶體快取上限
+        :param persistent_dir: 磁碟快取資料夾，None 表示不使用
+        """
+        self.max_bytes = max_bytes
+        self.persistent_dir = persistent_dir
+        self.current_bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.persistent_hits = 0
+        self._frames = OrderedDict()  # key -> (mtime, nbytes, df)
+        self._lock = threading.Lock()
+
+    def _read(self, key, file_path, mtime):
+        if self.persistent_dir:
+            pickle_path = os.path.join(self.persistent_dir, *key[:3], f"{key[1]}_{key[3]}_{key[2]}.pkl")
+            if os.path.exists(pickle_path) and os.path.getmtime(pickle_path) >= mtime:
+                self.persistent_hits += 1
+                return pd.read_pickle(pickle_path)
+            df = pd.read_csv(file_path)
+            os.makedirs(os.path.dirname(pickle_path), exist_ok=True)
+            df.to_pickle(pickle_path)
+            return df
+        return pd.read_csv(file_path)
+
+    def _evict(self):
+        while self.current_bytes > self.max_bytes and len(self._frames) > 1:
+            _, (_, nbytes, _) = self._frames.popitem(last=False)
+            self.current_bytes -= nbytes
+
+    def load_file(self, file_path):
+        """
+        讀取 K 線檔案，命中快取時直接回傳已解碼的 DataFrame
+        """
+        key = parse_kline_file_path(file_path) or (os.path.abspath(file_path),) * 4
+        mtime = os.path.getmtime(file_path)
+
+        with self._lock:
+            entry = self._frames.get(key)
+            if entry is not None and entry[0] == mtime:
+                self._frames.move_to_end(key)
+                self.hits += 1
+                return entry[2]
+            self.misses += 1
+
+        df = self._read(key, file_path, mtime)
+        nbytes = int(df.memory_usage(deep=True).sum())
+
+        with self._lock:
+            if key in self._frames:
+                self.current_bytes -= self._frames.pop(key)[1]
+            self._frames[key] = (mtime, nbytes, df)
+            self.current_bytes += nbytes
+            self._evict()
+
+        return df
+
+    def load(self, exchange, trading_pair, kline_interval, date):
+        return self.load_file(kline_file_path(exchange, trading_pair, kline_interval, date))
+
+    def clear(self):
+        with self._lock:
+            self._frames.clear()
+            self.current_bytes = 0
+
+    def stats(self):
+        """
+        回傳命中率與容量資訊
+        """
+        total = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "persistent_hits": self.persistent_hits,
+            "hit_rate": self.hits / total if total else 0.0,
+            "entries": len(self._frames),
+            "bytes": self.current_bytes,
+            "max_bytes": self.max_bytes,
+        }
+
+
+# 全域共用的快取，Sampling、分析腳本與 notebook 皆透過此實例讀取 K 線
+kline_cache = KlineCache(
+    max_bytes=int(os.environ.get("KLINE_CACHE_MAX_BYTES", DEFAULT_MAX_BYTES)),
+    persistent_dir=os.environ.get("KLINE_CACHE_DIR"),
+)
+
+
+def load_klines(exchange, trading_pair, kline_interval, start_date, end_date):
+    """
+    透過快取讀取一段日期區間的 K 線並合併，缺少的日期會略過
+    """
+    frames = []
+    for day in pd.date_range(start_date, end_date, freq="D"):
+        file_path = kline_file_path(exchange, trading_pair, kline_interval, day.strftime("%Y-%m-%d"))
+        if os.path.exists(file_path):
+            frames.append(kline_cache.load_file(file_path))
+
+    if not frames:
+        return pd.DataFrame()
+    return pd.concat(frames, ignore_index=True)
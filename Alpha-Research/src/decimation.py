@@ -0,0 +1,73 @@
+"""
+繪圖用的序列降採樣
+
+    lttb_indices     Largest-Triangle-Three-Buckets，保留視覺形狀的代表點
+    minmax_indices   每個像素桶保留首、尾、最小、最大四點（M4），折線圖的像素輸出與原始資料相同
+兩者都回傳原始序列的索引，x 可為數值或 datetime64。
+"""
+
+import numpy as np
+
+
+def _as_float(x):
+    x = np.asarray(x)
+    if np.issubdtype(x.dtype, np.datetime64):
+        return x.astype("datetime64[ns]").astype(np.int64).astype(np.float64)
+    return x.astype(np.float64)
+
+
+def lttb_indices(x, y, threshold):
+    """
+    :param x: 遞增的 x（時間）
+    :param y: 數值
+    :param threshold: 輸出點數（含首尾），序列較短時回傳全部索引
+    :return: 選取點的索引（遞增）
+    """
+    n = len(y)
+    if threshold >= n or threshold < 3:
+        return np.arange(n)
+    x = _as_float(x)
+    y = np.asarray(y, dtype=np.float64)
+
+    # 首尾固定，中間 n - 2 點平均分成 threshold - 2 桶
+    edges = np.floor(np.linspace(1, n - 1, threshold - 1)).astype(np.int64)
+    counts = np.diff(edges)
+    # 下一桶的平均點（最後一桶的下一桶為最後一點）
+    x_means = np.add.reduceat(x[:-1], edges[:-1]) / counts
+    y_means = np.add.reduceat(y[:-1], edges[:-1]) / counts
+    next_x = np.r_[x_means[1:], x[-1]]
+    next_y = np.r_[y_means[1:], y[-1]]
+
+    selected = np.empty(threshold, dtype=np.int64)
+    selected[0], selected[-1] = 0, n - 1
+    a = 0
+    for bucket in range(threshold - 2):
+        start, end = edges[bucket], edges[bucket + 1]
+        ax, ay = x[a], y[a]
+        # 三角形 (a, 候選點, 下一桶平均) 面積的兩倍
+        areas = np.abs((ax - next_x[bucket]) * (y[start:end] - ay) - (ax - x[start:end]) * (next_y[bucket] - ay))
+        a = start + int(np.argmax(areas))
+        selected[bucket + 1] = a
+    return selected
+
+
+def minmax_indices(x, y, buckets):
+    """
+    :param buckets: 桶數（通常為像素寬度），每桶保留首、尾、最小、最大
+    :return: 選取點的索引（遞增、不重複）
+    """
+    n = len(y)
+    if 4 * buckets >= n:
+        return np.arange(n)
+    x = _as_float(x)
+    y = np.asarray(y, dtype=np.float64)
+
+    # 依 x 範圍等寬分桶，對應畫面上的像素欄
+    bucket = np.minimum(((x - x[0]) / max(x[-1] - x[0], 1) * buckets).astype(np.int64), buckets - 1)
+    starts = np.flatnonzero(np.r_[True, bucket[1:] != bucket[:-1]])
+    ends = np.r_[starts[1:], n] - 1
+    # 以 (桶, 值) 排序取得每桶的最小與最大位置
+    order = np.lexsort((y, bucket))
+    minima = order[starts]
+    maxima = order[ends]
+    return np.unique(np.concatenate([starts, ends, minima, maxima]))
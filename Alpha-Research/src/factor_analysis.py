@@ -0,0 +1,287 @@
+"""
+信號的 IC 與分位數報酬分析
+
+輸入為依時間排序的 1-D 序列（可用 groups 標示交易對的 long 格式，每個交易對內依時間排序），
+或 (timestamps × symbols) 的 2-D 面板（沿 axis 0 為時間，截面在 axis 1）：
+    forward_returns       一次計算多個 horizon 的未來報酬，不跨越交易對
+    information_coefficient / cross_sectional_ic / rolling_ic   全樣本、逐時間截面與滾動的 Spearman IC
+    quantile_buckets / quantile_returns / quantile_spread        分位數分組與各組平均未來報酬
+    signal_turnover / quantile_turnover / signal_decay / ic_decay 換手與衰減
+滾動 IC 預設為視窗內重新排名的 Spearman（rolling_spearman，O(n × window)），只使用當時已知的資料；
+method="rank" 以全樣本排名後做滾動 Pearson（排序 O(n log n)，滾動 O(n)），排名用到未來資料，只適合快速的全樣本探索。
+"""
+
+import numpy as np
+import pandas as pd
+from src.rolling import average_rank, rolling_pearson, rolling_spearman
+from src.cross_section import rank
+
+
+def _codes(groups):
+    """
+    :return: (每列的組別代碼, 組別標籤)
+    """
+    codes, labels = pd.factorize(np.asarray(groups))
+    return codes, labels
+
+
+def _lag_index(n, lag, codes=None):
+    """
+    每一列 lag 筆之前（負值為之後）同組資料的位置，不存在為 -1
+    """
+    if codes is None:
+        source = np.arange(n) - lag
+        return np.where((source >= 0) & (source < n), source, -1)
+    # 穩定排序後同組資料相鄰且維持時間順序
+    order = np.argsort(codes, kind="stable")
+    sorted_codes = codes[order]
+    source = np.arange(n) - lag
+    valid = (source >= 0) & (source < n)
+    valid[valid] = sorted_codes[source[valid]] == sorted_codes[valid]
+    index = np.full(n, -1)
+    index[order[valid]] = order[source[valid]]
+    return index
+
+
+def _take(x, index):
+    """
+    沿 axis 0 取值，位置為 -1 時為 NaN
+    """
+    x = np.asarray(x, dtype=np.float64)
+    taken = x[np.maximum(index, 0)]
+    missing = (index < 0).reshape((-1,) + (1,) * (x.ndim - 1))
+    return np.where(missing, np.nan, taken)
+
+
+def _shift(x, lag, groups=None):
+    codes = _codes(groups)[0] if groups is not None else None
+    return _take(x, _lag_index(len(x), lag, codes))
+
+
+def _as_columns(returns, n):
+    returns = np.asarray(returns, dtype=np.float64)
+    return returns.reshape(n, -1) if returns.ndim == 1 else returns
+
+
+def _rank_correlation(x, y, min_periods=2):
+    """
+    沿最後一軸的 Spearman 相關係數，只使用兩者皆有效的樣本
+    """
+    x, y = np.broadcast_arrays(np.asarray(x, dtype=np.float64), np.asarray(y, dtype=np.float64))
+    valid = np.isfinite(x) & np.isfinite(y)
+    # 無效樣本以 inf 排到最後，不影響有效樣本的排名
+    x_rank = average_rank(np.where(valid, x, np.inf))
+    y_rank = average_rank(np.where(valid, y, np.inf))
+    n = valid.sum(axis=-1)
+    center = (n[..., None] + 1) / 2
+    x_dev = np.where(valid, x_rank - center, 0.0)
+    y_dev = np.where(valid, y_rank - center, 0.0)
+    sxx, syy, sxy = (x_dev**2).sum(axis=-1), (y_dev**2).sum(axis=-1), (x_dev * y_dev).sum(axis=-1)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        corr = sxy / np.sqrt(sxx * syy)
+    return np.where((n >= min_periods) & (sxx > 0) & (syy > 0), np.clip(corr, -1.0, 1.0), np.nan)
+
+
+def forward_returns(close, horizons, groups=None):
+    """
+    :param close: 收盤價，1-D 或 (timestamps × symbols)
+    :param horizons: 例如 [1, 5, 10]
+    :param groups: 1-D 輸入時的交易對標籤，未來報酬不跨越交易對
+    :return: close.shape + (len(horizons),)，超出資料範圍為 NaN
+    """
+    close = np.asarray(close, dtype=np.float64)
+    codes = _codes(groups)[0] if groups is not None else None
+    with np.errstate(divide="ignore", invalid="ignore"):
+        return np.stack([_take(close, _lag_index(len(close), -horizon, codes)) / close - 1 for horizon in horizons], axis=-1)
+
+
+def information_coefficient(signal, returns, groups=None):
+    """
+    全樣本 Spearman IC
+    :param signal: 1-D 信號
+    :param returns: (n × horizons) 未來報酬
+    :param groups: 指定時每組分別計算
+    :return: 每個 horizon 一個值；有 groups 時為 DataFrame（列為組別，欄依 returns 的順序）
+    """
+    signal = np.asarray(signal, dtype=np.float64)
+    returns = _as_columns(returns, len(signal))
+    if groups is None:
+        return _rank_correlation(signal[None, :], returns.T)
+    codes, labels = _codes(groups)
+    values = [_rank_correlation(signal[None, codes == code], returns[codes == code].T) for code in range(len(labels))]
+    return pd.DataFrame(values, index=labels)
+
+
+def cross_sectional_ic(signal, returns):
+    """
+    每個時間點在交易對之間的 Spearman IC
+    :param signal: (timestamps × symbols)
+    :param returns: (timestamps × symbols × horizons) 或 (timestamps × symbols)
+    :return: (timestamps × horizons)，有效交易對少於 2 時為 NaN
+    """
+    signal = np.asarray(signal, dtype=np.float64)
+    returns = np.asarray(returns, dtype=np.float64)
+    if returns.ndim == 2:
+        returns = returns[..., None]
+    return _rank_correlation(signal[:, None, :], np.moveaxis(returns, -1, 1))
+
+
+def _rolling_ic(signal, returns, window, min_periods, method):
+    if method == "exact":
+        return rolling_spearman(signal[:, None], returns, window, min_periods)
+    if method != "rank":
+        raise ValueError(f"Unknown rolling IC method: {method}")
+    signal_rank = average_rank(signal)
+    returns_rank = average_rank(returns.T).T
+    return rolling_pearson(signal_rank[:, None], returns_rank, window, min_periods)
+
+
+def rolling_ic(signal, returns, window, min_periods=None, method="exact", groups=None):
+    """
+    滾動 IC，第 t 筆使用 (t - window, t] 的資料
+    :param returns: (n × horizons) 未來報酬
+    :param method: exact 為視窗內排名的 Spearman；rank 為全樣本排名後的滾動 Pearson，排名含未來資料（look-ahead）
+    :param groups: 指定時每組分別滾動
+    :return: (n × horizons)
+    """
+    signal = np.asarray(signal, dtype=np.float64)
+    returns = _as_columns(returns, len(signal))
+    min_periods = window if min_periods is None else min_periods
+    if groups is None:
+        return _rolling_ic(signal, returns, window, min_periods, method)
+    codes, labels = _codes(groups)
+    out = np.full(returns.shape, np.nan)
+    for code in range(len(labels)):
+        rows = np.flatnonzero(codes == code)
+        out[rows] = _rolling_ic(signal[rows], returns[rows], window, min_periods, method)
+    return out
+
+
+def ic_summary(ic):
+    """
+    :param ic: IC 序列，(k × horizons)，NaN 不計
+    :return: mean、std、ir（mean / std）、t_stat、positive（IC 為正的比例）
+    """
+    ic = np.asarray(ic, dtype=np.float64)
+    ic = ic.reshape(len(ic), -1)
+    count = np.isfinite(ic).sum(axis=0)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        mean = np.nanmean(ic, axis=0)
+        std = np.nanstd(ic, axis=0, ddof=1)
+        ir = mean / std
+        positive = (ic > 0).sum(axis=0) / count
+    return {"mean": mean, "std": std, "ir": ir, "t_stat": ir * np.sqrt(count), "positive": positive}
+
+
+def quantile_buckets(signal, quantiles=5, groups=None):
+    """
+    分位數分組（1 ~ quantiles，同值在同一組，NaN 為 NaN）
+    2-D 面板在每個時間點的截面分組；1-D 序列以全樣本（有 groups 時為組內）分組
+    組別為 ceil(平均排名百分位 × quantiles)，同值較多時邊界與 pd.qcut 不同
+    """
+    signal = np.asarray(signal, dtype=np.float64)
+    if signal.ndim == 2:
+        pct = rank(signal)
+    elif groups is None:
+        pct = average_rank(signal) / np.isfinite(signal).sum()
+    else:
+        codes, labels = _codes(groups)
+        pct = np.full(signal.shape, np.nan)
+        for code in range(len(labels)):
+            rows = np.flatnonzero(codes == code)
+            pct[rows] = average_rank(signal[rows]) / np.isfinite(signal[rows]).sum()
+    return np.where(np.isnan(pct), np.nan, np.clip(np.ceil(pct * quantiles), 1, quantiles))
+
+
+def quantile_returns(buckets, returns, quantiles=5):
+    """
+    各分位數組的未來報酬
+    :param buckets: quantile_buckets() 的結果
+    :param returns: buckets.shape + (horizons,) 或與 buckets 相同形狀
+    :return: {"mean", "std", "count"}，每個為 (quantiles × horizons)
+    """
+    buckets = np.asarray(buckets, dtype=np.float64).reshape(-1)
+    returns = np.asarray(returns, dtype=np.float64).reshape(len(buckets), -1)
+    horizons = returns.shape[1]
+    valid = np.isfinite(buckets)[:, None] & np.isfinite(returns)
+    # 以 (組別, horizon) 的平坦索引一次 bincount
+    index = ((np.nan_to_num(buckets).astype(np.int64) - 1)[:, None] * horizons + np.arange(horizons))[valid]
+    size = quantiles * horizons
+    count = np.bincount(index, minlength=size).reshape(quantiles, horizons)
+    total = np.bincount(index, returns[valid], minlength=size).reshape(quantiles, horizons)
+    squares = np.bincount(index, returns[valid] ** 2, minlength=size).reshape(quantiles, horizons)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        mean = total / count
+        std = np.sqrt(np.maximum(squares - total * mean, 0) / (count - 1))
+    return {"mean": mean, "std": std, "count": count}
+
+
+def quantile_spread(stats):
+    """
+    最高組減最低組的平均報酬與其 t 統計量（Welch）
+    :param stats: quantile_returns() 的結果
+    :return: (spread, t_stat)，每個 horizon 一個值
+    """
+    spread = stats["mean"][-1] - stats["mean"][0]
+    with np.errstate(divide="ignore", invalid="ignore"):
+        error = np.sqrt(stats["std"][-1] ** 2 / stats["count"][-1] + stats["std"][0] ** 2 / stats["count"][0])
+        return spread, spread / error
+
+
+def signal_turnover(signal, groups=None):
+    """
+    mean(|Δsignal|) / mean(|signal|)，沿 axis 0，不跨越交易對
+    :return: 1-D 為純量，2-D 為每個交易對一個值
+    """
+    signal = np.asarray(signal, dtype=np.float64)
+    change = np.abs(signal - _shift(signal, 1, groups))
+    with np.errstate(divide="ignore", invalid="ignore"):
+        return np.nanmean(change, axis=0) / np.nanmean(np.abs(signal), axis=0)
+
+
+def quantile_turnover(buckets, quantiles=5, lag=1, groups=None):
+    """
+    各分位數組中 lag 筆之前不在同組的比例
+    :return: 1-D 為 (quantiles,)；2-D 面板為每個時間點的截面比例 (timestamps × quantiles)
+    """
+    buckets = np.asarray(buckets, dtype=np.float64)
+    previous = _shift(buckets, lag, groups)
+    labels = np.arange(1, quantiles + 1)
+    member = (buckets[..., None] == labels) & np.isfinite(previous)[..., None]
+    entered = member & (previous[..., None] != labels)
+    axis = 1 if buckets.ndim == 2 else 0
+    with np.errstate(divide="ignore", invalid="ignore"):
+        return entered.sum(axis=axis) / member.sum(axis=axis)
+
+
+def signal_decay(signal, lags, groups=None):
+    """
+    信號的排名自相關（signal[t] 與 signal[t - lag] 的 Spearman），2-D 面板為截面排名自相關的時間平均
+    :return: 每個 lag 一個值
+    """
+    signal = np.asarray(signal, dtype=np.float64)
+    values = []
+    for lag in lags:
+        previous = _shift(signal, lag, groups)
+        if signal.ndim == 2:
+            values.append(np.nanmean(_rank_correlation(signal, previous)))
+        else:
+            values.append(_rank_correlation(signal, previous))
+    return np.array(values, dtype=np.float64)
+
+
+def ic_decay(signal, returns, lags, groups=None):
+    """
+    以延遲 lag 筆的信號計算 IC，觀察預測力隨延遲衰減
+    :param returns: 1-D 信號時為 (n × horizons)，2-D 面板時為 (timestamps × symbols × horizons)
+    :return: (len(lags) × horizons)；2-D 面板為截面 IC 的時間平均
+    """
+    signal = np.asarray(signal, dtype=np.float64)
+    values = []
+    for lag in lags:
+        lagged = _shift(signal, lag, groups)
+        if signal.ndim == 2:
+            values.append(np.nanmean(cross_sectional_ic(lagged, returns), axis=0))
+        else:
+            values.append(information_coefficient(lagged, returns))
+    return np.array(values, dtype=np.float64)
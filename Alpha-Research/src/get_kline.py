@@ -1,11 +1,11 @@
 import os
-from binance.client import Client, HistoricalKlinesType
 import pandas as pd
 import requests
 import zipfile
 import io
-
-client = Client()
+from src.rest_fetch import fetch_klines
+from src.resample import get_resampled_kline
+from src.agg_trades import is_bar_spec, get_bars
 
 
 def is_kline_data_exists(exchange, trading_pair, date, kline_interval):
@@ -22,39 +22,64 @@ def is_kline_data_exists(exchange, trading_pair, date, kline_interval):
 
 def fetch_kline_from_api(symbol, interval, date):
     # Build start and end time, and set to UTC+0 timezone
-    start_str = f"{date} 00:00:00"
-    end_str = f"{date} 23:59:59"
-
-    # Get klines from Binance API
-    klines = client.get_historical_klines(symbol, interval, start_str, end_str, klines_type=HistoricalKlinesType.FUTURES)
-
-    # Convert data to DataFrame
-    df = pd.DataFrame(
-        klines,
-        columns=[
-            "open_time",
-            "open",
-            "high",
-            "low",
-            "close",
-            "volume",
-            "close_time",
-            "quote_asset_volume",
-            "number_of_trades",
-            "taker_buy_base_asset_volume",
-            "taker_buy_quote_asset_volume",
-            "ignore",
-        ],
-    )
-
-    # Convert timestamp to datetime format
-    df["open_time"] = pd.to_datetime(df["open_time"], unit="ms")
-    df["close_time"] = pd.to_datetime(df["close_time"], unit="ms")
-
-    # Convert data type
-    df[["open", "high", "low", "close", "volume"]] = df[["open", "high", "low", "close", "volume"]].astype(float)
-
-    return df
+    start_ms = int(pd.Timestamp(f"{date} 00:00:00").value // 10**6)
+    end_ms = int(pd.Timestamp(f"{date} 23:59:59").value // 10**6)
+
+    # Get klines from Binance API (weight-limited, paginated in parallel)
+    return fetch_klines(symbol, interval, start_ms, end_ms, futures=True)
+
+
+def consecutive_date_runs(dates):
+    """
+    將已排序的日期分成連續日期的區段
+    :param dates: YYYY-MM-DD 列表
+    :return: [[date, ...], ...]
+    """
+    runs = []
+    previous = None
+    for date in dates:
+        day = pd.Timestamp(date)
+        if previous is None or day - previous != pd.Timedelta(days=1):
+            runs.append([])
+        runs[-1].append(date)
+        previous = day
+    return runs
+
+
+def backfill_klines(exchange, trading_pairs, kline_interval, start_date, end_date):
+    """
+    下載日期區間內缺少的 K 線並依日期切分存檔，已存在的日期會略過
+    連續缺少的日期合併為一次下載，不連續的區段分別下載，不重複抓取已存在的日期
+    :param trading_pairs: 交易對列表
+    :param start_date: 起始日期 YYYY-MM-DD
+    :param end_date: 結束日期 YYYY-MM-DD（含）
+    """
+    dates = [day.strftime("%Y-%m-%d") for day in pd.date_range(start_date, end_date, freq="D")]
+
+    for trading_pair in trading_pairs:
+        missing_dates = []
+        for date in dates:
+            if is_kline_data_exists(exchange, trading_pair, date, kline_interval):
+                continue
+            # 可由本地較細 K 線聚合的日期不需重新下載
+            if get_resampled_kline(exchange, trading_pair, date, kline_interval) is None:
+                missing_dates.append(date)
+
+        directory = os.path.join("kline", exchange, trading_pair, kline_interval)
+        for run in consecutive_date_runs(missing_dates):
+            start_ms = int(pd.Timestamp(f"{run[0]} 00:00:00").value // 10**6)
+            end_ms = int(pd.Timestamp(f"{run[-1]} 23:59:59").value // 10**6)
+            df = fetch_klines(trading_pair, kline_interval, start_ms, end_ms, futures=True)
+            if df.empty:
+                continue
+
+            os.makedirs(directory, exist_ok=True)
+            for date, day_df in df.groupby(df["open_time"].dt.strftime("%Y-%m-%d")):
+                if date not in run:
+                    continue
+                file_path = os.path.join(directory, f"{trading_pair}_{date}_{kline_interval}.csv")
+                day_df.to_csv(file_path, index=False)
+                print(f"K线数据已保存到: {file_path}")
 
 def fetch_1s_kline_from_binance_data(trading_pair, date):
     """
@@ -102,7 +127,16 @@ def get_kline(exchange, trading_pair, date, kline_interval):
 
     os.makedirs(os.path.dirname(file_path), exist_ok=True)
 
+    # time / tick / volume / dollar K 棒由 aggTrades 建立
+    if is_bar_spec(kline_interval):
+        get_bars(exchange, trading_pair, date, kline_interval)
+        return
+
     if not is_kline_data_exists(exchange, trading_pair, date, kline_interval):
+        # 優先由本地較細的 K 線聚合
+        if get_resampled_kline(exchange, trading_pair, date, kline_interval):
+            return
+
         if kline_interval == "1s":
             df = fetch_1s_kline_from_binance_data(trading_pair, date)
         else:
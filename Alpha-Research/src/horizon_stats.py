@@ -0,0 +1,102 @@
+"""
+多 horizon 報酬統計
+
+將所有 y{i}_close 欄位整理為 (samples × horizons) 的報酬矩陣，所有 horizon 的統計量
+以少數幾次沿 axis 0 的 NumPy reduction 一次算出；偏態與峰度採用與 pandas 相同的無偏估計。
+"""
+
+import re
+import numpy as np
+
+# 延遲價格欄位 y{i}_<field>
+HORIZON_COLUMN = re.compile(r"^y(\d+)_(.+)$")
+
+
+def horizon_columns(columns, field="close"):
+    """
+    由欄位名稱偵測 horizon 數量，不依賴固定的 SAMPLING_INTERVALS 長度
+    :return: 依 i 排序的 y{i}_<field> 欄位
+    """
+    matches = [(int(match.group(1)), column) for column in columns for match in [HORIZON_COLUMN.match(column)] if match and match.group(2) == field]
+    return [column for _, column in sorted(matches)]
+
+
+def horizon_returns(df, field="close"):
+    """
+    :return: (欄位列表, 依持倉方向調整的報酬矩陣 (samples × horizons), is_buy)
+    """
+    columns = horizon_columns(df.columns, field)
+    price = df["price"].to_numpy(dtype=np.float64)[:, None]
+    is_buy = df["is_buy"].to_numpy(dtype=bool)
+    direction = np.where(is_buy, 1.0, -1.0)[:, None]
+    returns = direction * (df[columns].to_numpy(dtype=np.float64) - price) / price
+    return columns, returns, is_buy
+
+
+def cumulative_returns(returns):
+    """
+    沿時間累乘的報酬 (1 + r).cumprod() - 1
+    """
+    return np.cumprod(1 + returns, axis=0) - 1
+
+
+def moment_statistics(n, mean, m2, m3, m4):
+    """
+    由樣本數、平均與二到四階中心動差和計算 std（ddof=1）、偏態、峰度（與 pandas 相同的無偏估計）與 Sharpe
+    """
+    horizons = len(mean)
+    nan = np.full(horizons, np.nan)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        std = np.sqrt(m2 / (n - 1)) if n > 1 else nan
+        if n > 2:
+            skew = np.where(m2 == 0, 0.0, n * (n - 1) ** 0.5 / (n - 2) * m3 / m2**1.5)
+        else:
+            skew = nan
+        if n > 3:
+            kurtosis = n * (n + 1) * (n - 1) * m4 / ((n - 2) * (n - 3) * m2**2) - 3 * (n - 1) ** 2 / ((n - 2) * (n - 3))
+            kurtosis = np.where(m2 == 0, 0.0, kurtosis)
+        else:
+            kurtosis = nan
+        sharpe = np.where(std != 0, mean / std, 0.0)
+    return {"std": std, "skew": skew, "kurtosis": kurtosis, "sharpe": sharpe}
+
+
+def describe_returns(returns):
+    """
+    :param returns: (samples × horizons) 報酬矩陣
+    :return: 統計量名稱 -> 每個 horizon 一個值的陣列（報酬類統計為小數，非百分比）
+    """
+    n, horizons = returns.shape
+    nan = np.full(horizons, np.nan)
+    stats = {"count": np.full(horizons, n)}
+    if n == 0:
+        for name in ["mean", "std", "min", "q25", "median", "q75", "max", "skew", "kurtosis", "sharpe", "win_rate", "total_return"]:
+            stats[name] = nan
+        return stats
+
+    mean = returns.mean(axis=0)
+    deviation = returns - mean
+    squared = deviation**2
+    stats.update(moment_statistics(n, mean, squared.sum(axis=0), (squared * deviation).sum(axis=0), (squared**2).sum(axis=0)))
+
+    q25, median, q75 = np.quantile(returns, [0.25, 0.5, 0.75], axis=0)
+    stats.update(
+        {
+            "mean": mean,
+            "min": returns.min(axis=0),
+            "q25": q25,
+            "median": median,
+            "q75": q75,
+            "max": returns.max(axis=0),
+            "win_rate": (returns > 0).mean(axis=0),
+            "total_return": np.prod(1 + returns, axis=0) - 1,
+        }
+    )
+    return stats
+
+
+def describe_sides(returns, is_buy):
+    """
+    :return: {"Long": describe_returns(...), "Short": describe_returns(...)}
+    """
+    return {"Long": describe_returns(returns[is_buy]), "Short": describe_returns(returns[~is_buy])}
@@ -0,0 +1,146 @@
+import time
+import hashlib
+from collections import defaultdict
+import numpy as np
+import pandas as pd
+
+
+def _numeric(df, column):
+    return pd.to_numeric(df[column], errors="coerce").astype(np.float64)
+
+
+def _ema(graph, df, source, span):
+    return graph.get(df, "source", source).ewm(span=span, adjust=False).mean()
+
+
+def _sma(graph, df, source, window):
+    return graph.get(df, "source", source).rolling(window=window).mean()
+
+
+def _true_range(graph, df, source):
+    """
+    真實波動幅度，第一根 K 棒沒有前收盤價時為 NaN
+    """
+    high = graph.get(df, "source", "high")
+    low = graph.get(df, "source", "low")
+    prev_close = graph.get(df, "source", "close").shift(1)
+    true_range = np.maximum(high - low, np.maximum((high - prev_close).abs(), (low - prev_close).abs()))
+    return true_range.where(prev_close.notna())
+
+
+def _atr(graph, df, source, window):
+    return graph.get(df, "true_range").rolling(window=window).mean()
+
+
+# 用於辨識資料內容的欄位，不同交易對在相同時間點的 K 線以這些欄位區分
+FINGERPRINT_COLUMNS = ["open", "high", "low", "close", "volume"]
+
+# 指標名稱 -> 計算函數，函數可再向 graph 請求其他節點，形成 DAG
+INDICATORS = {
+    "source": lambda graph, df, source: _numeric(df, source),
+    "ema": _ema,
+    "sma": _sma,
+    "true_range": _true_range,
+    "atr": _atr,
+}
+
+
+class IndicatorGraph:
+    """
+    多個 alpha 共用的指標 DAG
+
+    每個節點以 (indicator, params, source) 為鍵，同一根 K 棒、同一個 rolling window（時間範圍與價量內容皆相同）內只計算一次，
+    其他 alpha 或同一 alpha 的重複請求直接取用結果。回傳的 Series 為共用物件，請勿直接修改。
+    """
+
+    def __init__(self):
+        self.requests = defaultdict(int)
+        self.computations = defaultdict(int)
+        self.compute_seconds = defaultdict(float)
+        self.consumers = defaultdict(set)
+        self._cache = {}
+        self._current_bar = None
+
+    @staticmethod
+    def _frame_key(df):
+        # 以長度、首尾 open_time 與價量欄位的 hash 辨識同一個 rolling window，
+        # 多個交易對共用同一個圖時，相同時間範圍的不同資料不會互相命中；
+        # 沒有 open_time 或價量欄位時無法可靠辨識（id 可能在物件釋放後被重複使用），回傳 None 不快取
+        columns = [column for column in FINGERPRINT_COLUMNS if column in df.columns]
+        if "open_time" not in df.columns or not columns or not len(df):
+            return None
+        hashes = pd.util.hash_pandas_object(df[columns], index=False).to_numpy()
+        fingerprint = hashlib.blake2b(hashes.tobytes(), digest_size=16).hexdigest()
+        return len(df), df["open_time"].iloc[0], fingerprint, df["open_time"].iloc[-1]
+
+    def get(self, df, indicator, source="close", consumer=None, **params):
+        """
+        取得指標序列，若本根 K 棒已計算過則直接回傳
+        :param df: rolling window DataFrame
+        :param indicator: 指標名稱（見 INDICATORS）
+        :param source: 來源欄位
+        :param consumer: 請求者名稱，用於報告
+        """
+        node = (indicator, tuple(sorted(params.items())), source)
+        self.requests[node] += 1
+        if consumer is not None:
+            self.consumers[node].add(consumer)
+
+        frame_key = self._frame_key(df)
+        if frame_key is None:
+            return self._compute(node, df)
+
+        # 新的 K 棒到來時清除上一根 K 棒的結果
+        if frame_key[-1] != self._current_bar:
+            self._cache.clear()
+            self._current_bar = frame_key[-1]
+
+        cache_key = (frame_key, node)
+        if cache_key not in self._cache:
+            self._cache[cache_key] = self._compute(node, df)
+        return self._cache[cache_key]
+
+    def _compute(self, node, df):
+        indicator, params, source = node
+        start = time.perf_counter()
+        result = INDICATORS[indicator](self, df, source, **dict(params))
+        self.compute_seconds[node] += time.perf_counter() - start
+        self.computations[node] += 1
+        return result
+
+    def report(self):
+        """
+        回傳每個節點的請求數、實際計算數與去重節省的估計時間
+        """
+        rows = []
+        for node, requests in self.requests.items():
+            computations = self.computations[node]
+            average_seconds = self.compute_seconds[node] / computations if computations else 0.0
+            rows.append(
+                {
+                    "indicator": node[0],
+                    "params": dict(node[1]),
+                    "source": node[2],
+                    "consumers": sorted(self.consumers[node]),
+                    "requests": requests,
+                    "computations": computations,
+                    "saved": requests - computations,
+                    "saved_seconds": (requests - computations) * average_seconds,
+                }
+            )
+        return pd.DataFrame(rows)
+
+    def summary(self):
+        total_requests = sum(self.requests.values())
+        total_computations = sum(self.computations.values())
+        saved = total_requests - total_computations
+        saved_seconds = self.report()["saved_seconds"].sum() if self.requests else 0.0
+        ratio = saved / total_requests * 100 if total_requests else 0.0
+        return (
+            f"Indicator graph: {total_requests} requests, {total_computations} computations, "
+            f"{saved} deduplicated ({ratio:.1f}%), ~{saved_seconds:.2f}s saved"
+        )
+
+
+# 全域共用的指標圖，所有 alpha 透過 BaseAlpha.indicator 存取
+indicator_graph = IndicatorGraph()
@@ -0,0 +1,81 @@
+from datetime import timedelta
+
+
+class Interval:
+    """
+    K 線區間字串常數（與 Binance 的區間字串相同）
+    """
+
+    SECOND_1 = "1s"
+    MINUTE_1 = "1m"
+    MINUTE_3 = "3m"
+    MINUTE_5 = "5m"
+    MINUTE_15 = "15m"
+    MINUTE_20 = "20m"  # 非交易所原生區間，只能由本地 K 線聚合
+    MINUTE_30 = "30m"
+    HOUR_1 = "1h"
+    HOUR_2 = "2h"
+    HOUR_4 = "4h"
+    HOUR_6 = "6h"
+    HOUR_8 = "8h"
+    HOUR_12 = "12h"
+    DAY_1 = "1d"
+    DAY_3 = "3d"
+    WEEK_1 = "1w"
+    MONTH_1 = "1M"
+
+
+DAY_SECONDS = 24 * 60 * 60
+
+# 固定長度區間的秒數
+INTERVAL_SECONDS = {
+    Interval.SECOND_1: 1,
+    Interval.MINUTE_1: 60,
+    Interval.MINUTE_3: 3 * 60,
+    Interval.MINUTE_5: 5 * 60,
+    Interval.MINUTE_15: 15 * 60,
+    Interval.MINUTE_20: 20 * 60,
+    Interval.MINUTE_30: 30 * 60,
+    Interval.HOUR_1: 60 * 60,
+    Interval.HOUR_2: 2 * 60 * 60,
+    Interval.HOUR_4: 4 * 60 * 60,
+    Interval.HOUR_6: 6 * 60 * 60,
+    Interval.HOUR_8: 8 * 60 * 60,
+    Interval.HOUR_12: 12 * 60 * 60,
+    Interval.DAY_1: DAY_SECONDS,
+    Interval.DAY_3: 3 * DAY_SECONDS,
+    Interval.WEEK_1: 7 * DAY_SECONDS,
+}
+
+# 每個 K 線區間的毫秒數（1M 不固定，不支援分頁切割與聚合）
+INTERVAL_MILLISECONDS = {interval: seconds * 1000 for interval, seconds in INTERVAL_SECONDS.items()}
+
+# 月 K 長度不固定，採樣延遲以 30 天估算
+NOMINAL_SECONDS = {**INTERVAL_SECONDS, Interval.MONTH_1: 30 * DAY_SECONDS}
+
+BARS_PER_DAY = {interval: DAY_SECONDS / seconds for interval, seconds in NOMINAL_SECONDS.items()}
+
+
+def interval_seconds(interval):
+    """
+    :return: 區間秒數（1M 以 30 天計）
+    """
+    if interval not in NOMINAL_SECONDS:
+        raise ValueError(f"Unknown kline interval: {interval}")
+    return NOMINAL_SECONDS[interval]
+
+
+def interval_timedelta(interval, count=1):
+    """
+    :return: count 根 K 棒的時間長度
+    """
+    return timedelta(seconds=count * interval_seconds(interval))
+
+
+def bars_per_day(interval):
+    """
+    :return: 每天的 K 棒數（大於 1 天的區間為小數）
+    """
+    if interval not in BARS_PER_DAY:
+        raise ValueError(f"Unknown kline interval: {interval}")
+    return BARS_PER_DAY[interval]
@@ -0,0 +1,258 @@
+import re
+import numpy as np
+import pandas as pd
+from src.agg_trades import is_information_bar, parse_bar_spec
+from src.interval import interval_timedelta
+
+# Sampling 預設的延遲欄位
+BASE_LABEL_COLUMNS = ["open", "close", "high", "low"]
+
+# 延遲欄位 y{i}_<欄位>
+FORWARD_COLUMN = re.compile(r"^y(\d+)_(.+)$")
+
+
+def forward_suffixes(columns):
+    """
+    延遲欄位需要的 K 棒欄位名稱（不含 timestamp）
+    """
+    suffixes = []
+    for column in columns:
+        match = FORWARD_COLUMN.match(column)
+        if match and match.group(2) != "timestamp" and match.group(2) not in suffixes:
+            suffixes.append(match.group(2))
+    return suffixes
+
+
+def horizon_delay(kline_interval, horizon):
+    """
+    :return: horizon 根 K 棒的時間長度，資訊 K 棒沒有固定長度時回傳 None
+    """
+    if is_information_bar(kline_interval):
+        return None
+    spec = parse_bar_spec(kline_interval)
+    if spec:
+        return pd.Timedelta(milliseconds=horizon * spec[1])
+    return pd.Timedelta(interval_timedelta(kline_interval, horizon))
+
+
+def resolve_signal_positions(bar_times, signal_times):
+    """
+    找出每個採樣點在 K 棒序列中的位置（時間需完全相符，找不到為 -1）
+    """
+    bar_times = np.asarray(bar_times, dtype="datetime64[ns]")
+    signal_times = np.asarray(signal_times, dtype="datetime64[ns]")
+    positions = np.searchsorted(bar_times, signal_times, "left")
+    found = positions < len(bar_times)
+    found[found] = bar_times[positions[found]] == signal_times[found]
+    return np.where(found, positions, -1)
+
+
+def resolve_due_indices(bar_times, signal_positions, horizon, kline_interval, bar_counts=None):
+    """
+    每個採樣點 horizon 根 K 棒後到期的 K 棒位置，與 Sampling 的到期規則相同
+
+    固定區間以時間計算：第一根時間達到 signal_time + horizon × interval 的 K 棒，資料有缺口時自動落在缺口後的第一根；
+    資訊 K 棒以 K 棒序號計算。超出資料範圍時為 len(bar_times)。
+    :param bar_counts: K 棒序號（預設為位置），只用於資訊 K 棒
+    :return: (due 位置, y_timestamp)
+    """
+    bar_times = np.asarray(bar_times, dtype="datetime64[ns]")
+    signal_positions = np.asarray(signal_positions)
+    n_bars = len(bar_times)
+
+    delay = horizon_delay(kline_interval, horizon)
+    if delay is None:
+        counts = np.arange(n_bars) if bar_counts is None else np.asarray(bar_counts)
+        due = np.searchsorted(counts, counts[signal_positions] + horizon, "left")
+        target = np.where(due < n_bars, bar_times[np.minimum(due, n_bars - 1)], np.datetime64("NaT"))
+    else:
+        target = bar_times[signal_positions] + np.timedelta64(delay)
+        due = np.searchsorted(bar_times, target, "left")
+
+    return np.maximum(due, signal_positions + 1), target
+
+
+def forward_labels(bars, signal_positions, horizons, kline_interval, columns=BASE_LABEL_COLUMNS, time_column="close_time"):
+    """
+    以一次 fancy-indexing gather 產生所有延遲欄位 y{i}_timestamp、y{i}_<column>
+    :param bars: 完整的 K 棒 DataFrame（依時間排序）
+    :param signal_positions: 採樣點所在的 K 棒位置
+    :param horizons: 採樣 K 棒間隔（同 SAMPLING_INTERVALS）
+    :param columns: 要取值的 K 棒欄位，可包含 alpha 的特徵欄位
+    :return: 每個採樣點一列的 DataFrame，超出資料範圍的欄位為 NaN
+    """
+    bar_times = pd.to_datetime(bars[time_column]).to_numpy(dtype="datetime64[ns]")
+    signal_positions = np.asarray(signal_positions, dtype=np.int64)
+    n_bars = len(bar_times)
+    values = {column: bars[column].to_numpy(dtype=np.float64) for column in columns}
+
+    labels = {}
+    for i, horizon in enumerate(horizons, start=1):
+        due, target = resolve_due_indices(bar_times, signal_positions, horizon, kline_interval)
+        valid = due < n_bars
+        safe_due = np.minimum(due, n_bars - 1)
+        labels[f"y{i}_timestamp"] = target
+        for column in columns:
+            labels[f"y{i}_{column}"] = np.where(valid, values[column][safe_due], np.nan)
+
+    return pd.DataFrame(labels)
+
+
+def timestamps_as_objects(df):
+    """
+    時間欄位轉為 Timestamp 物件，輸出 CSV 的格式與 Sampling 相同
+    """
+    for column in df.columns:
+        if pd.api.types.is_datetime64_any_dtype(df[column]):
+            df[column] = df[column].astype(object)
+    return df
+
+
+def label_samples(samples, bars, horizons, kline_interval, columns=None, time_column="close_time"):
+    """
+    以新的 horizons 重新產生既有採樣結果的延遲欄位
+    :param samples: 採樣結果（timestamp 為採樣 K 棒的 close_time）
+    :param bars: 涵蓋採樣區間與最長 horizon 的 K 棒
+    :param columns: 延遲欄位取值的 K 棒欄位，預設為原檔延遲欄位中 bars 也有的欄位
+    :return: 當下欄位 + 新延遲欄位，找不到對應 K 棒的採樣點會被移除
+    """
+    forward_columns = [column for column in samples.columns if FORWARD_COLUMN.match(column)]
+    if columns is None:
+        columns = [suffix for suffix in forward_suffixes(forward_columns) if suffix in bars.columns] or BASE_LABEL_COLUMNS
+
+    bars = bars.sort_values(time_column, kind="stable").reset_index(drop=True)
+    bar_times = pd.to_datetime(bars[time_column]).to_numpy(dtype="datetime64[ns]")
+    positions = resolve_signal_positions(bar_times, pd.to_datetime(samples["timestamp"]))
+
+    current = samples.drop(columns=forward_columns)[positions >= 0].reset_index(drop=True)
+    labels = forward_labels(bars, positions[positions >= 0], horizons, kline_interval, columns, time_column)
+    return timestamps_as_objects(pd.concat([current, labels], axis=1))
+
+
+class SparseTable:
+    """
+    區間最大值 sparse table：建表 O(n log n)，任意區間查詢 O(1)
+
+    最小值以 SparseTable(-values) 查詢。NaN 視為不存在（以 fmax 合併）。
+    """
+
+    def __init__(self, values):
+        values = np.asarray(values, dtype=np.float64)
+        self.n = len(values)
+        levels = max(self.n, 1).bit_length()
+        # table[k, i] = max(values[i : i + 2**k])，超出範圍的位置為 -inf
+        self.table = np.full((levels, self.n), -np.inf)
+        self.table[0] = np.where(np.isnan(values), -np.inf, values)
+        for k in range(1, levels):
+            half = 1 << (k - 1)
+            self.table[k, : self.n - half] = np.fmax(self.table[k - 1, : self.n - half], self.table[k - 1, half:])
+
+    def query(self, left, right):
+        """
+        :return: values[left : right + 1] 的最大值（left <= right，可為陣列）
+        """
+        left = np.asarray(left, dtype=np.int64)
+        right = np.asarray(right, dtype=np.int64)
+        k = np.log2(right - left + 1).astype(np.int64)
+        return np.fmax(self.table[k, left], self.table[k, right - (1 << k) + 1])
+
+    def first_reaching(self, left, right, threshold):
+        """
+        每個區間內第一個累積最大值達到 threshold 的位置，以二分搜尋同步處理所有區間
+        :return: 位置，區間內沒有達到時為 right + 1
+        """
+        left = np.asarray(left, dtype=np.int64)
+        right = np.asarray(right, dtype=np.int64)
+        low, high = left.copy(), right + 1
+        while True:
+            active = low < high
+            if not active.any():
+                return low
+            middle = np.minimum((low + high) // 2, right)
+            reached = self.query(left, middle) >= threshold
+            high = np.where(active & reached, middle, high)
+            low = np.where(active & ~reached, middle + 1, low)
+
+
+def path_labels(bars, signal_positions, prices, is_buy, horizons, kline_interval, take_profit=None, stop_loss=None, time_column="close_time"):
+    """
+    路徑相關的延遲欄位，區間為採樣 K 棒之後到 horizon 到期的 K 棒（含）
+
+    y{i}_mfe / y{i}_mae：持倉方向的最大有利 / 最大不利報酬（以進場價計）
+    y{i}_barrier：三重障礙結果，1 為停利、-1 為停損、0 為到期；同一根 K 棒同時觸及時視為停損
+    y{i}_hit_bars：觸及障礙（或到期）經過的 K 棒數
+    :param prices: 進場價
+    :param is_buy: 持倉方向
+    :param take_profit: 停利報酬（例如 0.01），可為每個採樣點的陣列，None 為不設
+    :param stop_loss: 停損報酬，None 為不設；兩者皆 None 時不輸出障礙欄位
+    :return: 每個採樣點一列的 DataFrame，超出資料範圍的欄位為 NaN
+    """
+    bar_times = pd.to_datetime(bars[time_column]).to_numpy(dtype="datetime64[ns]")
+    signal_positions = np.asarray(signal_positions, dtype=np.int64)
+    prices = np.asarray(prices, dtype=np.float64)
+    is_buy = np.asarray(is_buy, dtype=bool)
+    n_bars = len(bar_times)
+
+    highs = SparseTable(bars["high"].to_numpy(dtype=np.float64))
+    negative_lows = SparseTable(-bars["low"].to_numpy(dtype=np.float64))
+
+    barriers = take_profit is not None or stop_loss is not None
+    if barriers:
+        take_profit = np.inf if take_profit is None else np.asarray(take_profit, dtype=np.float64)
+        stop_loss = np.inf if stop_loss is None else np.asarray(stop_loss, dtype=np.float64)
+        # 上方障礙：做多的停利、做空的停損；下方障礙相反
+        upper = prices * (1 + np.where(is_buy, take_profit, stop_loss))
+        lower = prices * (1 - np.where(is_buy, stop_loss, take_profit))
+
+    labels = {}
+    for i, horizon in enumerate(horizons, start=1):
+        due, _ = resolve_due_indices(bar_times, signal_positions, horizon, kline_interval)
+        valid = due < n_bars
+        left = np.minimum(signal_positions + 1, n_bars - 1)
+        right = np.maximum(np.minimum(due, n_bars - 1), left)
+
+        max_high = highs.query(left, right)
+        min_low = -negative_lows.query(left, right)
+        mfe = np.where(is_buy, max_high / prices - 1, 1 - min_low / prices)
+        mae = np.where(is_buy, min_low / prices - 1, 1 - max_high / prices)
+        labels[f"y{i}_mfe"] = np.where(valid, mfe, np.nan)
+        labels[f"y{i}_mae"] = np.where(valid, mae, np.nan)
+
+        if barriers:
+            upper_hit = highs.first_reaching(left, right, upper)
+            lower_hit = negative_lows.first_reaching(left, right, -lower)
+            profit_hit = np.where(is_buy, upper_hit, lower_hit)
+            loss_hit = np.where(is_buy, lower_hit, upper_hit)
+            outcome = np.where((loss_hit <= right) & (loss_hit <= profit_hit), -1, np.where(profit_hit <= right, 1, 0))
+            exit_position = np.where(outcome == 0, right, np.minimum(profit_hit, loss_hit))
+            labels[f"y{i}_barrier"] = np.where(valid, outcome, np.nan)
+            labels[f"y{i}_hit_bars"] = np.where(valid, exit_position - signal_positions, np.nan)
+
+    return pd.DataFrame(labels)
+
+
+def add_path_labels(samples, bars, horizons, kline_interval, take_profit=None, stop_loss=None, time_column="close_time"):
+    """
+    在採樣結果後加上 MFE / MAE 與三重障礙欄位（見 path_labels），原有欄位不變
+    :param samples: 採樣結果（timestamp、price、is_buy）
+    :param bars: 涵蓋採樣區間與最長 horizon 的 K 棒
+    """
+    bars = bars.sort_values(time_column, kind="stable").reset_index(drop=True)
+    bar_times = pd.to_datetime(bars[time_column]).to_numpy(dtype="datetime64[ns]")
+    positions = resolve_signal_positions(bar_times, pd.to_datetime(samples["timestamp"]))
+    found = positions >= 0
+
+    labels = path_labels(
+        bars,
+        positions[found],
+        samples["price"].to_numpy(dtype=np.float64)[found],
+        samples["is_buy"].astype(bool).to_numpy()[found],
+        horizons,
+        kline_interval,
+        take_profit,
+        stop_loss,
+        time_column,
+    )
+    labels.index = samples.index[found]
+    # 找不到對應 K 棒的採樣點欄位為 NaN
+    return samples.join(labels.reindex(samples.index))
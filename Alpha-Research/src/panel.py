@@ -0,0 +1,225 @@
+import os
+import glob
+import shutil
+import tempfile
+from concurrent.futures import ThreadPoolExecutor
+import numpy as np
+import pandas as pd
+from src.data_cache import kline_cache
+from src.interval import INTERVAL_MILLISECONDS
+
+PANEL_FIELDS = [
+    "open",
+    "high",
+    "low",
+    "close",
+    "volume",
+    "quote_asset_volume",
+    "number_of_trades",
+    "taker_buy_base_asset_volume",
+    "taker_buy_quote_asset_volume",
+]
+
+
+class Panel:
+    """
+    多交易對對齊後的 K 線面板
+
+    每個欄位為 (timestamps × symbols) 的 C-contiguous 陣列，同一時間點的所有交易對在記憶體中相鄰，
+    mask 標示該格是否有實際 K 線（缺少的 K 棒填 NaN）。
+    以 memory-map 暫存資料夾載入時，用完呼叫 close()（或使用 with）刪除暫存檔。
+    """
+
+    def __init__(self, timestamps, symbols, fields, mask, temporary_dir=None):
+        """
+        :param timestamps: open_time 陣列（datetime64[ns]）
+        :param symbols: 交易對列表
+        :param fields: 欄位名稱 -> (T, N) 陣列
+        :param mask: (T, N) bool 陣列
+        :param temporary_dir: 由面板擁有的 memory-map 暫存資料夾，close() 時刪除
+        """
+        self.timestamps = timestamps
+        self.symbols = list(symbols)
+        self.fields = fields
+        self.mask = mask
+        self.temporary_dir = temporary_dir
+
+    def close(self):
+        """
+        釋放 memory-map 並刪除暫存資料夾，之後面板不可再使用
+        """
+        if self.temporary_dir is None:
+            return
+        self.fields = {}
+        self.mask = None
+        shutil.rmtree(self.temporary_dir, ignore_errors=True)
+        self.temporary_dir = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+    @property
+    def shape(self):
+        return self.mask.shape
+
+    def __getitem__(self, field):
+        return self.fields[field]
+
+    def __contains__(self, field):
+        return field in self.fields
+
+    def to_wide(self, field=None):
+        """
+        轉為寬表：index 為 open_time，欄位為 <symbol>_<field>（指定 field 時欄位即為 symbol）
+        """
+        index = pd.DatetimeIndex(self.timestamps, name="open_time")
+        if field is not None:
+            return pd.DataFrame(np.asarray(self.fields[field]), index=index, columns=self.symbols)
+
+        columns = {}
+        for j, symbol in enumerate(self.symbols):
+            for name, values in self.fields.items():
+                columns[f"{symbol}_{name}"] = values[:, j]
+        return pd.DataFrame(columns, index=index)
+
+    def to_long(self):
+        """
+        轉為長表：每列為 (open_time, symbol)，只保留有 K 線的格子
+        """
+        rows, cols = np.nonzero(self.mask)
+        data = {"open_time": self.timestamps[rows], "symbol": np.asarray(self.symbols, dtype=object)[cols]}
+        for name, values in self.fields.items():
+            data[name] = values[rows, cols]
+        return pd.DataFrame(data).sort_values(["symbol", "open_time"], kind="stable").reset_index(drop=True)
+
+    def to_frame(self, format_type="wide"):
+        return self.to_long() if format_type.lower() == "long" else self.to_wide()
+
+
+def _list_kline_files(kline_root, exchange, trading_pair, kline_interval, start_date, end_date):
+    """
+    列出區間內的每日 K 線檔案（未指定日期時列出全部）
+    :return: [(date, file_path), ...]
+    """
+    directory = os.path.join(kline_root, exchange, trading_pair, kline_interval)
+    prefix, suffix = f"{trading_pair}_", f"_{kline_interval}.csv"
+    files = []
+    for file_path in sorted(glob.glob(os.path.join(directory, f"{prefix}*{suffix}"))):
+        date = os.path.basename(file_path)[len(prefix) : -len(suffix)]
+        if (start_date is None or date >= start_date) and (end_date is None or date <= end_date):
+            files.append((date, file_path))
+    return files
+
+
+def _available_memory():
+    try:
+        return os.sysconf("SC_AVPHYS_PAGES") * os.sysconf("SC_PAGE_SIZE")
+    except (ValueError, OSError, AttributeError):
+        return None
+
+
+def _allocate(shape, dtype, fill_value, mmap_dir, name):
+    if mmap_dir is None:
+        return np.full(shape, fill_value, dtype=dtype)
+    array = np.lib.format.open_memmap(os.path.join(mmap_dir, f"{name}.npy"), mode="w+", dtype=dtype, shape=shape)
+    array[:] = fill_value
+    return array
+
+
+def discover_symbols(exchange, kline_interval, kline_root="kline"):
+    """
+    找出 kline 資料夾中有指定區間資料的所有交易對
+    """
+    exchange_directory = os.path.join(kline_root, exchange)
+    if not os.path.isdir(exchange_directory):
+        return []
+    return sorted(
+        symbol for symbol in os.listdir(exchange_directory) if os.path.isdir(os.path.join(exchange_directory, symbol, kline_interval))
+    )
+
+
+def load_panel(
+    exchange,
+    trading_pairs=None,
+    kline_interval="1m",
+    start_date=None,
+    end_date=None,
+    fields=PANEL_FIELDS,
+    kline_root="kline",
+    max_workers=8,
+    mmap_dir=None,
+    memory_limit=None,
+):
+    """
+    載入 N 個交易對 × T 個時間點的對齊面板
+    :param trading_pairs: 交易對列表，None 表示 kline 資料夾中所有交易對
+    :param kline_interval: 固定長度的 K 線區間
+    :param start_date: 起始日期 YYYY-MM-DD，None 表示最早的檔案
+    :param end_date: 結束日期 YYYY-MM-DD（含），None 表示最晚的檔案
+    :param fields: 要載入的數值欄位
+    :param kline_root: kline 資料夾路徑
+    :param max_workers: 每個交易對並行讀取的執行緒數
+    :param mmap_dir: 面板超過 memory_limit 時存放 memory-map 檔案的資料夾，由呼叫端管理；
+                     未指定時建立暫存資料夾，由 Panel.close() 刪除
+    :param memory_limit: 改用 memory-map 的門檻（bytes），預設為可用實體記憶體的一半
+    :return: Panel
+    """
+    if kline_interval not in INTERVAL_MILLISECONDS:
+        raise ValueError(f"Panel requires a fixed-length kline interval, got {kline_interval}")
+    if trading_pairs is None:
+        trading_pairs = discover_symbols(exchange, kline_interval, kline_root)
+
+    files = {pair: _list_kline_files(kline_root, exchange, pair, kline_interval, start_date, end_date) for pair in trading_pairs}
+    dates = sorted(date for pair_files in files.values() for date, _ in pair_files)
+    if not dates:
+        raise ValueError(f"No {kline_interval} kline files found for {len(trading_pairs)} symbols")
+
+    # 以固定間隔建立共同時間軸
+    step_ns = INTERVAL_MILLISECONDS[kline_interval] * 10**6
+    start_ns = pd.Timestamp(start_date or dates[0]).value
+    end_ns = pd.Timestamp(end_date or dates[-1]).value + INTERVAL_MILLISECONDS["1d"] * 10**6
+    timestamps = np.arange(start_ns, end_ns, step_ns, dtype=np.int64)
+    shape = (len(timestamps), len(trading_pairs))
+
+    # 面板大於可用記憶體時改用 memory-map
+    if memory_limit is None:
+        available = _available_memory()
+        memory_limit = available // 2 if available else float("inf")
+    panel_bytes = shape[0] * shape[1] * (8 * len(fields) + 1)
+    temporary_dir = None
+    if panel_bytes > memory_limit:
+        if mmap_dir is None:
+            mmap_dir = temporary_dir = tempfile.mkdtemp(prefix="panel_")
+        os.makedirs(mmap_dir, exist_ok=True)
+    else:
+        mmap_dir = None
+
+    arrays = {field: _allocate(shape, np.float64, np.nan, mmap_dir, field) for field in fields}
+    mask = _allocate(shape, bool, False, mmap_dir, "mask")
+
+    def load_symbol(column):
+        pair_files = files[trading_pairs[column]]
+        if not pair_files:
+            return 0
+        df = pd.concat([kline_cache.load_file(file_path) for _, file_path in pair_files], ignore_index=True)
+        open_time = pd.to_datetime(df["open_time"]).to_numpy(dtype="datetime64[ns]").astype(np.int64)
+
+        # 落在時間軸外或未對齊的 K 線略過；重複的 K 線以先出現者為準
+        rows = (open_time - start_ns) // step_ns
+        valid = (rows >= 0) & (rows < shape[0]) & ((open_time - start_ns) % step_ns == 0)
+        rows, first = np.unique(rows[valid], return_index=True)
+        source = np.flatnonzero(valid)[first]
+
+        for field in fields:
+            arrays[field][rows, column] = df[field].to_numpy(dtype=np.float64)[source]
+        mask[rows, column] = True
+        return len(rows)
+
+    # 每個交易對寫入各自的欄，可安全並行
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        list(executor.map(load_symbol, range(len(trading_pairs))))
+
+    return Panel(timestamps.astype("datetime64[ns]"), trading_pairs, arrays, mask, temporary_dir)
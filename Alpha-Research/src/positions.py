@@ -0,0 +1,113 @@
+"""
+信號到持倉的向量化引擎
+
+每個採樣點視為在採樣 K 棒收盤進場、在 y{i}_timestamp 對應的 K 棒收盤出場的部位，
+以差分陣列（進場 +1、出場 -1，再 cumsum）在 O(bars + signals) 內得到每根 K 棒的淨曝險與重疊部位數。
+重疊的部位可平均（總曝險不超過 1）或截頂，報酬在逐 K 棒的 PnL 序列上複利（每根 K 棒依曝險重新平衡，空單與持有到期的報酬略有差異），
+不再對每個重疊的信號各自複利。
+"""
+
+import numpy as np
+import pandas as pd
+from src.labels import resolve_signal_positions
+
+# 重疊部位的合併方式
+OVERLAP_MODES = ("average", "cap", "sum")
+
+
+def holding_intervals(bar_times, entry_times, exit_times):
+    """
+    :return: (entry, exit) K 棒位置，部位賺取 entry + 1 到 exit（含）各根 K 棒的報酬；找不到進場 K 棒的 entry 為 -1
+    """
+    bar_times = np.asarray(bar_times, dtype="datetime64[ns]")
+    entry = resolve_signal_positions(bar_times, entry_times)
+    exit = np.searchsorted(bar_times, np.asarray(exit_times, dtype="datetime64[ns]"), "left")
+    return entry, np.minimum(exit, len(bar_times) - 1)
+
+
+def difference_accumulate(n_bars, entry, exit, weights):
+    """
+    差分陣列累加：每個部位在 (entry, exit] 的每根 K 棒貢獻 weights
+    :return: 長度 n_bars 的陣列
+    """
+    valid = (entry >= 0) & (exit > entry)
+    entry, exit, weights = entry[valid], exit[valid], np.broadcast_to(weights, valid.shape)[valid]
+    difference = np.bincount(entry + 1, weights, minlength=n_bars + 1) - np.bincount(exit + 1, weights, minlength=n_bars + 1)
+    return np.cumsum(difference[:n_bars])
+
+
+def net_exposure(n_bars, entry, exit, direction, mode="average", cap=1.0):
+    """
+    :param direction: 每個部位的方向（+1 / -1）
+    :param mode: average 為以重疊部位數平均、cap 為總曝險截頂於 ±cap、sum 為直接加總
+    :return: (每根 K 棒的淨曝險, 重疊部位數)
+    """
+    gross = difference_accumulate(n_bars, entry, exit, np.asarray(direction, dtype=np.float64))
+    count = np.rint(difference_accumulate(n_bars, entry, exit, 1.0)).astype(np.int64)
+    if mode == "average":
+        exposure = np.divide(gross, count, out=np.zeros(n_bars), where=count > 0)
+    elif mode == "cap":
+        exposure = np.clip(gross, -cap, cap)
+    elif mode == "sum":
+        exposure = gross
+    else:
+        raise ValueError(f"Unknown overlap mode: {mode}")
+    return exposure, count
+
+
+def bar_returns(close):
+    """
+    收盤到收盤的報酬，第一根為 0
+    """
+    close = np.asarray(close, dtype=np.float64)
+    return np.r_[0.0, close[1:] / close[:-1] - 1]
+
+
+def overlap_adjusted_returns(bars, samples, mode="average", cap=1.0, time_column="close_time"):
+    """
+    每個 horizon 的逐 K 棒 PnL，分別計算多、空與合併
+    :param bars: 涵蓋採樣區間與出場時間的 K 棒
+    :param samples: 採樣結果（timestamp、is_buy、y{i}_timestamp）
+    :return: {"times": K 棒時間, "Long" / "Short" / "Combined": {"pnl", "exposure", "count"}}，值為 (bars × horizons) 陣列
+    """
+    bars = bars.sort_values(time_column, kind="stable").reset_index(drop=True)
+    bar_times = pd.to_datetime(bars[time_column]).to_numpy(dtype="datetime64[ns]")
+    returns = bar_returns(bars["close"].to_numpy())
+    n_bars = len(bar_times)
+
+    exit_columns = sorted((column for column in samples.columns if column.startswith("y") and column.endswith("_timestamp")), key=lambda column: int(column[1:].split("_")[0]))
+    entry_times = pd.to_datetime(samples["timestamp"]).to_numpy(dtype="datetime64[ns]")
+    is_buy = samples["is_buy"].to_numpy(dtype=bool)
+    direction = np.where(is_buy, 1.0, -1.0)
+
+    result = {"times": bar_times}
+    for side, selected in (("Long", is_buy), ("Short", ~is_buy), ("Combined", np.ones(len(samples), dtype=bool))):
+        pnl = np.zeros((n_bars, len(exit_columns)))
+        exposure = np.zeros((n_bars, len(exit_columns)))
+        count = np.zeros((n_bars, len(exit_columns)), dtype=np.int64)
+        for h, column in enumerate(exit_columns):
+            entry, exit = holding_intervals(bar_times, entry_times[selected], pd.to_datetime(samples[column]).to_numpy(dtype="datetime64[ns]")[selected])
+            exposure[:, h], count[:, h] = net_exposure(n_bars, entry, exit, direction[selected], mode, cap)
+            pnl[:, h] = exposure[:, h] * returns
+        result[side] = {"pnl": pnl, "exposure": exposure, "count": count}
+    return result
+
+
+def describe_pnl(pnl, exposure, count):
+    """
+    逐 K 棒 PnL 的統計（每個 horizon 一個值）
+    :return: total_return、每根 K 棒的 mean / std / sharpe、持倉時間比例（淨曝險不為 0，多空互相抵銷的 K 棒不計）、平均曝險、最大重疊數
+    """
+    mean = pnl.mean(axis=0)
+    std = pnl.std(axis=0, ddof=1) if len(pnl) > 1 else np.full(pnl.shape[1], np.nan)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        sharpe = np.where(std != 0, mean / std, 0.0)
+    return {
+        "total_return": np.prod(1 + pnl, axis=0) - 1,
+        "mean": mean,
+        "std": std,
+        "sharpe": sharpe,
+        "time_in_market": (exposure != 0).mean(axis=0),
+        "mean_exposure": np.abs(exposure).mean(axis=0),
+        "max_overlap": count.max(axis=0),
+    }
@@ -0,0 +1,128 @@
+import os
+import numpy as np
+import pandas as pd
+from src.interval import INTERVAL_MILLISECONDS
+
+DAY_MILLISECONDS = INTERVAL_MILLISECONDS["1d"]
+
+# 週 K 以週一 00:00 UTC 開盤，1970-01-01 為週四，需位移 4 天
+INTERVAL_OFFSET_MILLISECONDS = {"1w": 4 * DAY_MILLISECONDS}
+
+# 來自現貨資料（data.binance.vision spot）的區間，不可用來聚合期貨 K 線
+SPOT_INTERVALS = {"1s"}
+
+
+def resample_klines(df, target_interval):
+    """
+    將細粒度 K 線聚合為較粗的區間
+    :param df: kline 檔案格式的 DataFrame（open_time 可為字串或 datetime）
+    :param target_interval: 目標區間，例如 5m、1h、1d
+    :return: 相同欄位格式的 DataFrame
+    """
+    if target_interval not in INTERVAL_MILLISECONDS:
+        raise ValueError(f"Unsupported interval for resampling: {target_interval}")
+    if df.empty:
+        return df.copy()
+
+    target_ns = INTERVAL_MILLISECONDS[target_interval] * 10**6
+    offset_ns = INTERVAL_OFFSET_MILLISECONDS.get(target_interval, 0) * 10**6
+
+    open_time = pd.to_datetime(df["open_time"]).to_numpy(dtype="datetime64[ns]").astype(np.int64)
+    order = np.argsort(open_time, kind="stable")
+    open_time = open_time[order]
+
+    # 以桶編號切出每根新 K 線的起訖位置
+    bucket = (open_time - offset_ns) // target_ns
+    starts = np.flatnonzero(np.r_[True, bucket[1:] != bucket[:-1]])
+    ends = np.r_[starts[1:], len(bucket)] - 1
+
+    def column(name, dtype=np.float64):
+        return df[name].to_numpy(dtype=dtype)[order]
+
+    bar_open_time = bucket[starts] * target_ns + offset_ns
+    result = pd.DataFrame(
+        {
+            "open_time": pd.to_datetime(bar_open_time, unit="ns"),
+            "open": column("open")[starts],
+            "high": np.maximum.reduceat(column("high"), starts),
+            "low": np.minimum.reduceat(column("low"), starts),
+            "close": column("close")[ends],
+            "volume": np.add.reduceat(column("volume"), starts),
+            "close_time": pd.to_datetime(bar_open_time + target_ns - 10**6, unit="ns"),
+            "quote_asset_volume": np.add.reduceat(column("quote_asset_volume"), starts),
+            "number_of_trades": np.add.reduceat(column("number_of_trades", np.int64), starts),
+            "taker_buy_base_asset_volume": np.add.reduceat(column("taker_buy_base_asset_volume"), starts),
+            "taker_buy_quote_asset_volume": np.add.reduceat(column("taker_buy_quote_asset_volume"), starts),
+            "ignore": 0,
+        }
+    )
+
+    return result
+
+
+def base_interval_candidates(exchange, trading_pair, date, target_interval):
+    """
+    本地已存、可整除目標區間的期貨 K 線區間（由細到粗）
+    """
+    target_ms = INTERVAL_MILLISECONDS.get(target_interval)
+    # 每日檔案只能組出不超過一天且可整除一天的區間
+    if target_ms is None or DAY_MILLISECONDS % target_ms != 0:
+        return []
+
+    pair_directory = os.path.join("kline", exchange, trading_pair)
+    if not os.path.isdir(pair_directory):
+        return []
+
+    candidates = []
+    for interval in os.listdir(pair_directory):
+        interval_ms = INTERVAL_MILLISECONDS.get(interval)
+        if interval in SPOT_INTERVALS or interval_ms is None or interval_ms >= target_ms or target_ms % interval_ms != 0:
+            continue
+        file_path = os.path.join(pair_directory, interval, f"{trading_pair}_{date}_{interval}.csv")
+        if os.path.exists(file_path):
+            candidates.append((interval_ms, interval))
+
+    return [interval for _, interval in sorted(candidates)]
+
+
+def find_base_interval(exchange, trading_pair, date, target_interval):
+    """
+    找出本地已存、可整除目標區間的最細期貨 K 線區間
+    :return: 區間字串，找不到則回傳 None
+    """
+    candidates = base_interval_candidates(exchange, trading_pair, date, target_interval)
+    return candidates[0] if candidates else None
+
+
+def is_complete_day(df, interval):
+    """
+    每日檔案是否包含整天的 K 線（例如當天以 REST 取得的部分資料不算完整）
+    """
+    if df.empty:
+        return False
+    expected = DAY_MILLISECONDS // INTERVAL_MILLISECONDS[interval]
+    return pd.to_datetime(df["open_time"]).nunique() == expected
+
+
+def get_resampled_kline(exchange, trading_pair, date, target_interval):
+    """
+    由本地較細且完整的期貨 K 線產生目標區間檔案，並存回 kline 資料夾作為快取
+    :return: 產生的檔案路徑，無可用的基礎資料則回傳 None
+    """
+    for base_interval in base_interval_candidates(exchange, trading_pair, date, target_interval):
+        base_path = os.path.join("kline", exchange, trading_pair, base_interval, f"{trading_pair}_{date}_{base_interval}.csv")
+        base_df = pd.read_csv(base_path)
+        # 不完整的基礎資料會產生永久被截斷的快取檔案
+        if is_complete_day(base_df, base_interval):
+            break
+    else:
+        return None
+
+    df = resample_klines(base_df, target_interval)
+
+    file_path = os.path.join("kline", exchange, trading_pair, target_interval, f"{trading_pair}_{date}_{target_interval}.csv")
+    os.makedirs(os.path.dirname(file_path), exist_ok=True)
+    df.to_csv(file_path, index=False)
+    print(f"K线数据已由 {base_interval} 聚合保存到: {file_path}")
+
+    return file_path
@@ -0,0 +1,233 @@
+import time
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+import pandas as pd
+import requests
+from requests.adapters import HTTPAdapter
+from src.interval import INTERVAL_MILLISECONDS, Interval
+
+FUTURES_BASE_URL = "https://fapi.binance.com"
+SPOT_BASE_URL = "https://api.binance.com"
+
+KLINE_COLUMNS = [
+    "open_time",
+    "open",
+    "high",
+    "low",
+    "close",
+    "volume",
+    "close_time",
+    "quote_asset_volume",
+    "number_of_trades",
+    "taker_buy_base_asset_volume",
+    "taker_buy_quote_asset_volume",
+    "ignore",
+]
+
+# 單次請求最多可取得的 K 線數量
+FUTURES_PAGE_LIMIT = 1500
+SPOT_PAGE_LIMIT = 1000
+
+# 月 K 長度不固定，分頁以最短的月份計算，確保每頁不超過 limit 根
+MIN_MONTH_MILLISECONDS = 28 * 24 * 60 * 60 * 1000
+
+# 每分鐘 request weight 上限
+FUTURES_WEIGHT_LIMIT = 2400
+SPOT_WEIGHT_LIMIT = 6000
+
+
+def kline_request_weight(limit, futures=True):
+    """
+    回傳 klines 請求的 weight（期貨依 limit 分級，現貨固定為 2）
+    """
+    if not futures:
+        return 2
+    if limit < 100:
+        return 1
+    if limit < 500:
+        return 2
+    if limit <= 1000:
+        return 5
+    return 10
+
+
+class WeightRateLimiter:
+    """
+    以 Binance 每分鐘 request weight 為單位的限流器
+
+    本地先預扣 weight，收到回應後再以 X-MBX-USED-WEIGHT 標頭校正已用量，
+    可在多執行緒間共用，確保並行下載不會超過預算。
+    """
+
+    def __init__(self, weight_limit=FUTURES_WEIGHT_LIMIT, safety_ratio=0.8, window_seconds=60):
+        """
+        :param weight_limit: 交易所公布的每分鐘 weight 上限
+        :param safety_ratio: 實際使用的預算比例，保留餘裕給其他程式
+        :param window_seconds: weight 計算的時間窗口
+        """
+        self.budget = int(weight_limit * safety_ratio)
+        self.window_seconds = window_seconds
+        self.window_start = self._current_window()
+        self.used_weight = 0
+        self.blocked_until = 0.0
+        self._lock = threading.Lock()
+
+    def _current_window(self):
+        now = time.time()
+        return now - now % self.window_seconds
+
+    def _roll_window(self):
+        window_start = self._current_window()
+        if window_start > self.window_start:
+            self.window_start = window_start
+            self.used_weight = 0
+
+    def acquire(self, weight):
+        """
+        阻塞直到預算足夠，並預扣 weight
+        """
+        while True:
+            with self._lock:
+                now = time.time()
+                if now >= self.blocked_until:
+                    self._roll_window()
+                    if self.used_weight + weight <= self.budget:
+                        self.used_weight += weight
+                        return
+                    wait = self.window_start + self.window_seconds - now
+                else:
+                    wait = self.blocked_until - now
+            time.sleep(max(wait, 0.05))
+
+    def update(self, headers):
+        """
+        依回應標頭同步伺服器端已使用的 weight
+        """
+        used = headers.get("X-MBX-USED-WEIGHT-1M") or headers.get("X-MBX-USED-WEIGHT")
+        if used is None:
+            return
+        with self._lock:
+            self._roll_window()
+            self.used_weight = max(self.used_weight, int(used))
+
+    def backoff(self, retry_after):
+        """
+        收到 429 / 418 時暫停所有請求 retry_after 秒
+        """
+        with self._lock:
+            self.blocked_until = max(self.blocked_until, time.time() + retry_after)
+
+
+# 全域共用的限流器，讓同一進程的所有下載共享同一份 weight 預算
+futures_limiter = WeightRateLimiter(FUTURES_WEIGHT_LIMIT)
+spot_limiter = WeightRateLimiter(SPOT_WEIGHT_LIMIT)
+
+
+def split_windows(start_ms, end_ms, interval, limit):
+    """
+    將時間區間切成與 K 線邊界對齊、每頁 limit 根的視窗（1M 不對齊，重疊的 K 線由 fetch_klines 去重）
+    :return: [(window_start_ms, window_end_ms), ...]
+    """
+    if interval in INTERVAL_MILLISECONDS:
+        interval_ms = INTERVAL_MILLISECONDS[interval]
+        window_start = start_ms - start_ms % interval_ms
+    elif interval == Interval.MONTH_1:
+        interval_ms = MIN_MONTH_MILLISECONDS
+        window_start = start_ms
+    else:
+        raise ValueError(f"Unknown kline interval: {interval}")
+    page_ms = interval_ms * limit
+    windows = []
+    while window_start <= end_ms:
+        windows.append((window_start, min(window_start + page_ms - 1, end_ms)))
+        window_start += page_ms
+    return windows
+
+
+def _fetch_page(session, symbol, interval, window, limit, futures, limiter, max_retries=5):
+    """
+    下載單一分頁，遇到限流或暫時性錯誤時重試
+    """
+    base_url = FUTURES_BASE_URL if futures else SPOT_BASE_URL
+    path = "/fapi/v1/klines" if futures else "/api/v3/klines"
+    params = {"symbol": symbol, "interval": interval, "startTime": window[0], "endTime": window[1], "limit": limit}
+    weight = kline_request_weight(limit, futures)
+
+    for attempt in range(max_retries):
+        limiter.acquire(weight)
+        try:
+            response = session.get(base_url + path, params=params, timeout=30)
+        except requests.RequestException:
+            time.sleep(2**attempt)
+            continue
+
+        limiter.update(response.headers)
+        if response.status_code in (418, 429):
+            limiter.backoff(int(response.headers.get("Retry-After", 60)))
+            continue
+        if response.status_code >= 500:
+            time.sleep(2**attempt)
+            continue
+        response.raise_for_status()
+        return response.json()
+
+    raise RuntimeError(f"Failed to fetch {symbol} {interval} klines for window {window} after {max_retries} retries")
+
+
+def klines_to_dataframe(klines):
+    """
+    將 API 回傳的 K 線列表轉為與 kline 檔案相同格式的 DataFrame
+    """
+    df = pd.DataFrame(klines, columns=KLINE_COLUMNS)
+
+    # Convert timestamp to datetime format
+    df["open_time"] = pd.to_datetime(df["open_time"], unit="ms")
+    df["close_time"] = pd.to_datetime(df["close_time"], unit="ms")
+
+    # Convert data type
+    df[["open", "high", "low", "close", "volume"]] = df[["open", "high", "low", "close", "volume"]].astype(float)
+
+    return df
+
+
+def fetch_klines(symbol, interval, start_ms, end_ms, futures=True, max_workers=8, limiter=None, session=None):
+    """
+    並行下載一段時間區間內的 K 線
+    :param symbol: 交易對，例如 BTCUSDT
+    :param interval: K 線區間，例如 1m
+    :param start_ms: 起始時間（毫秒，含）
+    :param end_ms: 結束時間（毫秒，含）
+    :param futures: True 使用 USDⓈ-M 期貨端點，False 使用現貨端點
+    :param max_workers: 並行下載的執行緒數
+    :param limiter: WeightRateLimiter，預設使用全域限流器
+    :param session: 共用的 requests.Session，各執行緒只用它發出 GET；自行傳入時連線池大小（pool_maxsize）應不小於 max_workers
+    :return: 依 open_time 排序且去重後的 DataFrame
+    """
+    limit = FUTURES_PAGE_LIMIT if futures else SPOT_PAGE_LIMIT
+    limiter = limiter or (futures_limiter if futures else spot_limiter)
+    windows = split_windows(start_ms, end_ms, interval, limit)
+
+    # 預設連線池只保留 10 條連線，執行緒較多時多出的連線用完即丟；連線池與執行緒數一致才能重複使用
+    own_session = session is None
+    if own_session:
+        session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=1, pool_maxsize=max_workers)
+        session.mount("https://", adapter)
+        session.mount("http://", adapter)
+
+    try:
+        with ThreadPoolExecutor(max_workers=max_workers) as executor:
+            pages = list(executor.map(lambda window: _fetch_page(session, symbol, interval, window, limit, futures, limiter), windows))
+    finally:
+        if own_session:
+            session.close()
+
+    # 依視窗順序重組，並以 open_time 去除重疊的 K 線
+    rows = {}
+    for page in pages:
+        for kline in page:
+            rows.setdefault(kline[0], kline)
+    klines = [rows[open_time] for open_time in sorted(rows)]
+
+    return klines_to_dataframe(klines)
@@ -1,26 +1,65 @@
+import numpy as np
 import pandas as pd
 from datetime import timedelta
 from collections import deque
+from numbers import Number
 import warnings
 import time
+from src.agg_trades import is_information_bar, parse_bar_spec
+from src.data_cache import kline_cache
+from src.interval import interval_timedelta
+from src.labels import FORWARD_COLUMN, forward_suffixes
+from src.schema import SampleBuffer
 
 warnings.simplefilter(action="ignore", category=FutureWarning)
 
 
 class Sampling:
-    def __init__(self, window_size, sampling_intervals, alpha):
+    def __init__(self, window_size, sampling_intervals, alpha, record_signals=False):
         """
         初始化採樣邏輯
         :param window_size: 滾動窗口大小
         :param sampling_intervals: 採樣時間間隔
+        :param record_signals: 是否記錄逐 K 棒欄位與信號，供 src/signal_cache.py 快取
         """
         self.window_size = window_size
         self.sampling_intervals = sampling_intervals
         self.rolling_window_df = pd.DataFrame()
         self.alpha_columns = alpha.get_columns()
-        self.sampling_points_df = pd.DataFrame(columns=self.alpha_columns)
-        self.completed_samples_df = pd.DataFrame(columns=self.alpha_columns)
+        # 採樣點存放於依 alpha schema 預先配置的型別化陣列
+        self.samples = SampleBuffer(alpha.get_schema())
+        self.pending_rows = np.zeros(0, dtype=np.int64)
+        self.completed_rows = []
+        self._completed_samples_df = None
+        # 每個採樣點各 horizon 的到期目標（時間為 ns，資訊 K 棒為 K 棒序號）
+        self.due_targets = np.zeros((0, len(sampling_intervals)), dtype=np.int64)
+        self.due_by_count = np.zeros(0, dtype=bool)
         self.rolling_window = deque(maxlen=window_size)  # 使用固定長度的 deque
+        self.bar_count = 0  # 已讀入的 K 棒數，資訊 K 棒以此計算採樣間隔
+        self.record_signals = record_signals
+        self.forward_suffixes = forward_suffixes(self.alpha_columns)
+        self.bar_records = []
+        self.signal_point_records = []
+
+    @property
+    def sampling_points_df(self):
+        """
+        尚未完成的採樣點
+        """
+        return self.samples.to_frame(self.pending_rows)
+
+    @property
+    def completed_samples_df(self):
+        """
+        已完成的採樣點（依完成順序）
+        """
+        if self._completed_samples_df is None:
+            self._completed_samples_df = self.samples.to_frame(self.completed_rows)
+        return self._completed_samples_df
+
+    @completed_samples_df.setter
+    def completed_samples_df(self, df):
+        self._completed_samples_df = df
 
     def generate_sampling_points(self, current_time, kline_interval):
         """
@@ -29,64 +68,84 @@ class Sampling:
         new_point = {}
 
         # 初始化 y 和 y_timestamp 列
-        minute_interval = {
-            "1m": 1,
-            "3m": 3,
-            "5m": 5,
-            "15m": 15,
-            "20m":20,
-            "30m": 30,
-            "1h": 60,
-            "2h": 120,
-            "4h": 240,
-            "6h": 360,
-            "8h": 480,
-            "12h": 720,
-            "1d": 1440,
-            "3d": 4320,
-            "1w": 10080,
-            "1M": 43200,
-        }
         for i, interval in enumerate(self.sampling_intervals, start=1):
-            if kline_interval == "1s":
-                new_point[f"y{i}_timestamp"] = current_time + timedelta(seconds=interval)
+            if is_information_bar(kline_interval):
+                # tick / volume / dollar K 棒沒有固定時間長度，先暫存目標 K 棒序號，到期時再寫入實際時間
+                new_point[f"y{i}_timestamp"] = self.bar_count + interval
+            elif parse_bar_spec(kline_interval):
+                # 由 aggTrades 建立的 time K 棒，門檻即為毫秒長度
+                new_point[f"y{i}_timestamp"] = current_time + timedelta(milliseconds=interval * parse_bar_spec(kline_interval)[1])
             else:
-                new_point[f"y{i}_timestamp"] = current_time + timedelta(minutes=interval * minute_interval[kline_interval])
+                new_point[f"y{i}_timestamp"] = current_time + interval_timedelta(kline_interval, interval)
         for column in self.alpha_columns:
             if column not in new_point:
                 new_point[column] = None
 
         return new_point
 
+    def _add_sampling_point(self, new_point):
+        """
+        寫入新的採樣點，y{i}_timestamp 為數字時為資訊 K 棒的目標序號，到期時才寫入實際時間
+        """
+        timestamp_columns = [f"y{i}_timestamp" for i in range(1, len(self.sampling_intervals) + 1)]
+        by_count = isinstance(new_point[timestamp_columns[0]], Number)
+        targets = [new_point[column] if by_count else pd.Timestamp(new_point[column]).value for column in timestamp_columns]
+
+        row = self.samples.append(new_point, skip=timestamp_columns if by_count else ())
+        if row >= len(self.due_by_count):
+            capacity = self.samples.capacity
+            self.due_targets = np.vstack([self.due_targets, np.zeros((capacity - len(self.due_targets), len(timestamp_columns)), dtype=np.int64)])
+            self.due_by_count = np.r_[self.due_by_count, np.zeros(capacity - len(self.due_by_count), dtype=bool)]
+        self.due_targets[row] = targets
+        self.due_by_count[row] = by_count
+        self.pending_rows = np.r_[self.pending_rows, row]
+
     def _update_sampling_points(self, current_time, calculated_df):
         """
         更新採樣點數據
         """
-        finished_rows = []
-        if self.sampling_points_df.empty:
+        if len(self.pending_rows) == 0:
             return
-        for index, row in self.sampling_points_df.iterrows():
-            is_filled = True
-            for i in range(1, len(self.sampling_intervals) + 1):
-                if any(pd.isna(value) for value in row.values) and current_time >= row[f"y{i}_timestamp"]:
-                    # 遍歷 calculated_df 的所有欄位
-                    for calculated_column in calculated_df.columns:
-                        column_suffix = calculated_column  # 例如 'open', 'close', 'macd' 等
-                        target_column = f"y{i}_{column_suffix}"
-                        if target_column in self.sampling_points_df.columns and pd.isna(self.sampling_points_df.at[index, target_column]):
-                            self.sampling_points_df.at[index, target_column] = calculated_df[calculated_column].iloc[-1]
-
-                if any(pd.isna(value) for value in row.values):
-                    is_filled = False
-
-            # 該採樣點已完成紀錄
-            if is_filled:
-                finished_rows.append(index)
-
-        # 將完整採樣數據移至 completed_samples_df
-        if finished_rows:
-            self.completed_samples_df = pd.concat([self.completed_samples_df, self.sampling_points_df.loc[finished_rows]], ignore_index=True)
-            self.sampling_points_df.drop(finished_rows, inplace=True)
+
+        # 上一根 K 棒前已填滿的採樣點移至完成（與逐列檢查的順序相同：填入後的下一根 K 棒才完成）
+        complete = self.samples.is_complete(self.pending_rows)
+        if complete.any():
+            self.completed_rows.extend(self.pending_rows[complete].tolist())
+            self._completed_samples_df = None
+            self.pending_rows = self.pending_rows[~complete]
+
+        rows = self.pending_rows
+        now = np.where(self.due_by_count[rows], self.bar_count, pd.Timestamp(current_time).value)
+        last_row = calculated_df.iloc[-1]
+        for i in range(1, len(self.sampling_intervals) + 1):
+            due_rows = rows[self.due_targets[rows, i - 1] <= now]
+            if len(due_rows) == 0:
+                continue
+            self.samples.fill(due_rows[self.due_by_count[due_rows]], f"y{i}_timestamp", current_time)
+            # 遍歷 calculated_df 的所有欄位，例如 'open', 'close', 'macd' 等
+            for column_suffix in calculated_df.columns:
+                target_column = f"y{i}_{column_suffix}"
+                if target_column in self.samples.column_index:
+                    self.samples.fill(due_rows, target_column, last_row[column_suffix])
+
+    def _record(self, current_time, calculated_df, new_point):
+        """
+        記錄本根 K 棒的延遲欄位來源值與信號（不含延遲欄位）
+        """
+        last_row = calculated_df.iloc[-1]
+        bar = {"time": current_time, "bar_count": self.bar_count}
+        bar.update({suffix: last_row[suffix] for suffix in self.forward_suffixes if suffix in last_row.index})
+        self.bar_records.append(bar)
+        if new_point:
+            signal = {column: value for column, value in new_point.items() if not FORWARD_COLUMN.match(column)}
+            signal["bar"] = len(self.bar_records) - 1
+            self.signal_point_records.append(signal)
+
+    def signal_records(self):
+        """
+        :return: {"bars": DataFrame, "signals": DataFrame}，可由 replay_samples 以任意 SAMPLING_INTERVALS 重建採樣結果
+        """
+        return {"bars": pd.DataFrame(self.bar_records), "signals": pd.DataFrame(self.signal_point_records)}
 
     def alpha_sampling(self, kline_file_path, alpha):
         """
@@ -94,24 +153,30 @@ class Sampling:
         :param kline_file_path: K 線數據文件路徑
         :param alpha: 策略類的實例
         """
-        for chunk in pd.read_csv(kline_file_path, chunksize=1000):
-            for _, row in chunk.iterrows():
-                # 添加當前行到滾動窗口
-                self.rolling_window_df = pd.concat([self.rolling_window_df, pd.DataFrame([row])], ignore_index=True)
-                current_time = pd.to_datetime(row["close_time"])
-
-                # rolling_window 已滿，開始採樣
-                if len(self.rolling_window_df) == self.window_size:
-                    # print("开始进行alpha采样")
-                    new_point, calculated_df = alpha.alpha(self.rolling_window_df, current_time, self.generate_sampling_points)
-                    if new_point:
-                        self.sampling_points_df = pd.concat([self.sampling_points_df, pd.DataFrame([new_point])], ignore_index=True)
-                        # print("采样完成，开始更新采样点数据。")
-
-                    # 更新採樣點數據
-                    self._update_sampling_points(current_time, calculated_df)
-
-                    # 同步計算後的 df 與移除 window_size 以外的資料
-                    # print(calculated_df)
-                    self.rolling_window_df = calculated_df
-                    self.rolling_window_df = self.rolling_window_df.iloc[-(self.window_size - 1) :].reset_index(drop=True)
\ No newline at end of file
+        # 透過共用快取讀取，多個 alpha 或重複執行時不需重新解析 CSV
+        kline_df = kline_cache.load_file(kline_file_path)
+        close_times = pd.to_datetime(kline_df["close_time"])
+        for position in range(len(kline_df)):
+            # 添加當前行到滾動窗口（以切片保留各欄位型別，不經過 object 型別的 Series）
+            self.rolling_window_df = pd.concat([self.rolling_window_df, kline_df.iloc[[position]]], ignore_index=True)
+            self.bar_count += 1
+            current_time = close_times.iloc[position]
+
+            # rolling_window 已滿，開始採樣
+            if len(self.rolling_window_df) == self.window_size:
+                # print("开始进行alpha采样")
+                new_point, calculated_df = alpha.alpha(self.rolling_window_df, current_time, self.generate_sampling_points)
+                if new_point:
+                    self._add_sampling_point(new_point)
+                    # print("采样完成，开始更新采样点数据。")
+
+                if self.record_signals:
+                    self._record(current_time, calculated_df, new_point)
+
+                # 更新採樣點數據
+                self._update_sampling_points(current_time, calculated_df)
+
+                # 同步計算後的 df 與移除 window_size 以外的資料
+                # print(calculated_df)
+                self.rolling_window_df = calculated_df
+                self.rolling_window_df = self.rolling_window_df.iloc[-(self.window_size - 1) :].reset_index(drop=True)
\ No newline at end of file
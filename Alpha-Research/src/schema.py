@@ -0,0 +1,144 @@
+import re
+import numpy as np
+import pandas as pd
+from src.labels import FORWARD_COLUMN
+
+# timestamp 與 y{i}_timestamp
+TIMESTAMP_COLUMN = re.compile(r"^(y\d+_)?timestamp$")
+
+# 報酬計算用的價格欄位維持 float64，其他特徵以 float32 儲存
+PRICE_COLUMNS = {"price", "open", "high", "low", "close"}
+
+
+def column_dtype(column):
+    """
+    依欄位名稱推斷預設型別：時間為 datetime64[ns]、is_* 為 bool、價格為 float64、其他特徵為 float32
+    """
+    if TIMESTAMP_COLUMN.match(column):
+        return "datetime64[ns]"
+    match = FORWARD_COLUMN.match(column)
+    name = match.group(2) if match else column
+    if name.startswith("is_"):
+        return "bool"
+    if name in PRICE_COLUMNS:
+        return "float64"
+    return "float32"
+
+
+def build_schema(columns, overrides=None):
+    """
+    :param columns: alpha.get_columns()
+    :param overrides: 欄位名稱（或延遲欄位的底線後名稱）-> dtype，覆寫預設型別
+    :return: 欄位 -> dtype（保留欄位順序）
+    """
+    overrides = overrides or {}
+    schema = {}
+    for column in columns:
+        match = FORWARD_COLUMN.match(column)
+        suffix = match.group(2) if match else None
+        schema[column] = overrides.get(column, overrides.get(suffix, column_dtype(column)))
+    return schema
+
+
+def apply_schema(df, schema):
+    """
+    將 DataFrame 轉為 schema 的型別；有缺值的 bool / 整數欄位維持原型別
+    """
+    for column, dtype in schema.items():
+        if column not in df.columns:
+            continue
+        if dtype == "datetime64[ns]":
+            df[column] = pd.to_datetime(df[column]).astype(dtype)
+        elif np.dtype(dtype).kind in "biu" and df[column].isna().any():
+            continue
+        else:
+            df[column] = df[column].astype(dtype)
+    return df
+
+
+class SampleBuffer:
+    """
+    預先配置的型別化採樣點陣列
+
+    每個欄位一個 numpy 陣列（時間以 int64 ns 儲存），另以 filled 矩陣記錄欄位是否已有值，
+    完整性檢查為一次向量化的 filled[rows].all(axis=1)。容量不足時加倍。
+    """
+
+    def __init__(self, schema, capacity=1024):
+        """
+        :param schema: build_schema() 的結果
+        :param capacity: 初始列數
+        """
+        self.schema = dict(schema)
+        self.columns = list(self.schema)
+        self.column_index = {column: index for index, column in enumerate(self.columns)}
+        self.size = 0
+        self.capacity = capacity
+        self.values = {column: np.zeros(capacity, self._storage_dtype(dtype)) for column, dtype in self.schema.items()}
+        self.filled = np.zeros((capacity, len(self.columns)), dtype=bool)
+
+    @staticmethod
+    def _storage_dtype(dtype):
+        return np.int64 if dtype == "datetime64[ns]" else np.dtype(dtype)
+
+    def _convert(self, column, value):
+        if self.schema[column] == "datetime64[ns]":
+            return pd.Timestamp(value).value
+        return value
+
+    def _grow(self):
+        self.capacity *= 2
+        for column, array in self.values.items():
+            grown = np.zeros(self.capacity, array.dtype)
+            grown[: self.size] = array[: self.size]
+            self.values[column] = grown
+        filled = np.zeros((self.capacity, len(self.columns)), dtype=bool)
+        filled[: self.size] = self.filled[: self.size]
+        self.filled = filled
+
+    def append(self, point, skip=()):
+        """
+        新增一列，None / NaN 的欄位標記為未填入
+        :param skip: 不寫入的欄位（例如資訊 K 棒暫存目標序號的 y{i}_timestamp）
+        :return: 列索引
+        """
+        if self.size == self.capacity:
+            self._grow()
+        row = self.size
+        for column, value in point.items():
+            if column in self.column_index and column not in skip and not pd.isna(value):
+                self.values[column][row] = self._convert(column, value)
+                self.filled[row, self.column_index[column]] = True
+        self.size += 1
+        return row
+
+    def fill(self, rows, column, value):
+        """
+        將 rows 中尚未填入的 column 設為 value（value 為缺值時不動作）
+        """
+        if pd.isna(value) or len(rows) == 0:
+            return
+        index = self.column_index[column]
+        rows = rows[~self.filled[rows, index]]
+        self.values[column][rows] = self._convert(column, value)
+        self.filled[rows, index] = True
+
+    def is_complete(self, rows):
+        return self.filled[rows].all(axis=1)
+
+    def to_frame(self, rows):
+        """
+        :return: rows 的 DataFrame（依 schema 型別，未填入的浮點與時間欄位為 NaN / NaT）
+        """
+        rows = np.asarray(rows, dtype=np.int64)
+        data = {}
+        for column, dtype in self.schema.items():
+            values = self.values[column][rows]
+            missing = ~self.filled[rows, self.column_index[column]]
+            if dtype == "datetime64[ns]":
+                values = values.view("datetime64[ns]").copy()
+                values[missing] = np.datetime64("NaT")
+            elif values.dtype.kind == "f":
+                values[missing] = np.nan
+            data[column] = values
+        return pd.DataFrame(data, columns=self.columns)
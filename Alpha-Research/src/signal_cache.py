@@ -0,0 +1,193 @@
+import os
+import ast
+import json
+import hashlib
+import inspect
+import textwrap
+import numpy as np
+import pandas as pd
+from src.labels import forward_suffixes, resolve_due_indices
+from src.schema import build_schema, apply_schema
+
+SIGNAL_CACHE_DIR = os.environ.get("SIGNAL_CACHE_DIR", "signal_cache")
+
+# 每個 K 線資料夾內記錄檔案 checksum 的清單
+MANIFEST_FILENAME = ".manifest.json"
+
+# 只影響延遲欄位與輸出檔名的參數，不參與信號快取的鍵
+NON_SIGNAL_PARAMETERS = {"SAMPLING_INTERVALS", "NOTE", "PATH_LABELS", "TAKE_PROFIT", "STOP_LOSS", "COLUMN_DTYPES"}
+
+
+def file_sha256(file_path):
+    """
+    檔案內容的 sha256（分塊讀取）
+    """
+    digest = hashlib.sha256()
+    with open(file_path, "rb") as f:
+        for block in iter(lambda: f.read(1 << 20), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def file_checksum(file_path):
+    """
+    檔案內容的 sha256，依 mtime 與大小快取於同資料夾的 manifest
+    """
+    directory, filename = os.path.split(file_path)
+    manifest_path = os.path.join(directory, MANIFEST_FILENAME)
+    try:
+        with open(manifest_path, "r", encoding="utf-8") as f:
+            manifest = json.load(f)
+    except (OSError, ValueError):
+        manifest = {}
+
+    stat = os.stat(file_path)
+    entry = manifest.get(filename)
+    if entry and entry["mtime_ns"] == stat.st_mtime_ns and entry["size"] == stat.st_size:
+        return entry["sha256"]
+
+    manifest[filename] = {"mtime_ns": stat.st_mtime_ns, "size": stat.st_size, "sha256": file_sha256(file_path)}
+
+    try:
+        with open(manifest_path, "w", encoding="utf-8") as f:
+            json.dump(manifest, f, indent=2)
+    except OSError:
+        pass
+    return manifest[filename]["sha256"]
+
+
+def data_fingerprint(file_paths):
+    """
+    區間內所有 K 線檔案的合併 checksum
+    """
+    digest = hashlib.sha256()
+    for file_path in file_paths:
+        digest.update(f"{os.path.basename(file_path)}:{file_checksum(file_path)}\n".encode())
+    return digest.hexdigest()
+
+
+def _class_logic(cls):
+    """
+    類別原始碼的 AST，移除全大寫的參數賦值（參數另外以實際值計入），註解與排版不影響結果
+    """
+    tree = ast.parse(textwrap.dedent(inspect.getsource(cls)))
+    class_node = tree.body[0]
+    class_node.body = [
+        statement
+        for statement in class_node.body
+        if not (isinstance(statement, ast.Assign) and all(isinstance(target, ast.Name) and target.id.isupper() for target in statement.targets))
+    ]
+    return ast.dump(class_node)
+
+
+def alpha_source_hash(alpha_class):
+    """
+    alpha 類別與其 alpha 資料夾內基底類別的原始碼 hash
+    """
+    digest = hashlib.sha256()
+    for cls in alpha_class.__mro__:
+        if cls.__module__.split(".")[0] == "alpha":
+            digest.update(_class_logic(cls).encode())
+    return digest.hexdigest()
+
+
+def alpha_parameters(alpha_instance):
+    """
+    影響信號的參數屬性（全大寫），NON_SIGNAL_PARAMETERS 除外
+    """
+    return {
+        name: repr(getattr(alpha_instance, name))
+        for name in sorted(dir(alpha_instance))
+        if name.isupper() and name not in NON_SIGNAL_PARAMETERS and not callable(getattr(alpha_instance, name))
+    }
+
+
+def signal_cache_key(alpha_instance, window_size, file_paths):
+    """
+    :return: alpha 原始碼、參數、rolling window 大小與 K 線資料 checksum 的 hash
+    """
+    payload = {
+        "source": alpha_source_hash(type(alpha_instance)),
+        "parameters": alpha_parameters(alpha_instance),
+        "window_size": window_size,
+        "data": data_fingerprint(file_paths),
+    }
+    return hashlib.sha256(json.dumps(payload, sort_keys=True).encode()).hexdigest()
+
+
+def load_signals(key, cache_dir=SIGNAL_CACHE_DIR):
+    """
+    :return: {"bars": DataFrame, "signals": DataFrame}，未命中時回傳 None
+    """
+    file_path = os.path.join(cache_dir, f"{key}.pkl")
+    if not os.path.exists(file_path):
+        return None
+    return pd.read_pickle(file_path)
+
+
+def save_signals(key, records, cache_dir=SIGNAL_CACHE_DIR):
+    os.makedirs(cache_dir, exist_ok=True)
+    file_path = os.path.join(cache_dir, f"{key}.pkl")
+    pd.to_pickle(records, file_path)
+    return file_path
+
+
+def _next_valid(values):
+    """
+    每個位置之後（含）第一個非 NaN 值的位置，沒有則為 len(values)
+    """
+    n = len(values)
+    positions = np.where(pd.notna(values), np.arange(n), n)
+    return np.r_[np.minimum.accumulate(positions[::-1])[::-1], n]
+
+
+def replay_samples(records, columns, sampling_intervals, kline_interval, schema=None):
+    """
+    由快取的逐 K 棒欄位與信號重建 Sampling.completed_samples_df，不需重新執行 alpha
+    :param records: Sampling.signal_records() 的結果
+    :param columns: alpha.get_columns()（依新的 SAMPLING_INTERVALS）
+    :param sampling_intervals: 採樣 K 棒間隔
+    :param kline_interval: K 線區間或 K 棒規格
+    :param schema: alpha.get_schema()，預設依欄位名稱推斷
+    """
+    schema = schema or build_schema(columns)
+    bars, signals = records["bars"], records["signals"]
+    if signals.empty:
+        return apply_schema(pd.DataFrame(columns=columns), schema)
+
+    n_bars = len(bars)
+    times = pd.to_datetime(bars["time"]).to_numpy()
+    bar_counts = bars["bar_count"].to_numpy()
+    positions = signals["bar"].to_numpy()
+    next_valid = {suffix: _next_valid(bars[suffix].to_numpy()) for suffix in forward_suffixes(columns) if suffix in bars}
+
+    result = {column: signals[column].to_numpy() for column in columns if column in signals}
+    # 當下欄位有缺值的採樣點在 Sampling 中永遠不會完成
+    complete = signals[[column for column in columns if column in signals]].notna().all(axis=1).to_numpy().copy()
+    completion = positions.copy()
+
+    for i, interval in enumerate(sampling_intervals, start=1):
+        # 到期的 K 棒：第一根時間（或 K 棒序號）達到目標的 K 棒
+        due, target = resolve_due_indices(times, positions, interval, kline_interval, bar_counts)
+        complete &= due < n_bars
+        safe_due = np.minimum(due, n_bars - 1)
+        result[f"y{i}_timestamp"] = target
+
+        for suffix, valid_index in next_valid.items():
+            column = f"y{i}_{suffix}"
+            if column not in columns:
+                continue
+            # 到期 K 棒的值為缺值時，Sampling 會在之後第一根有值的 K 棒補上
+            filled = valid_index[np.minimum(due, n_bars)]
+            complete &= filled < n_bars
+            completion = np.maximum(completion, np.minimum(filled, n_bars - 1))
+            result[column] = bars[suffix].to_numpy()[np.minimum(filled, n_bars - 1)]
+        completion = np.maximum(completion, safe_due)
+
+    # Sampling 在最後一個欄位填入後的下一根 K 棒才將採樣點移至完成
+    complete &= completion + 1 < n_bars
+
+    df = pd.DataFrame(result)
+    df["_completion"] = completion
+    df = df[complete].sort_values("_completion", kind="stable")
+    return apply_schema(df.reindex(columns=columns).reset_index(drop=True), schema)
@@ -0,0 +1,187 @@
+"""
+欄式統計報表
+
+每個樣本檔的統計整理為 tidy 表（一列一個 run × horizon × side × metric），寫成 Parquet；
+所有 run 的表另外合併為一個彙總索引，排行榜查詢只需讀一個檔案並篩選。
+Parquet 讀寫需要 pyarrow。
+"""
+
+import os
+import re
+import json
+import numpy as np
+import pandas as pd
+
+INDEX_FILENAME = "stats_index.parquet"
+
+# 以類別型別儲存的欄位（重複值多，篩選快）
+CATEGORY_COLUMNS = ["run", "alpha", "params", "exchange", "trading_pair", "interval", "start_date", "end_date", "note", "side", "metric"]
+
+# main.py 輸出檔名結尾的執行時間 _YYYYmmdd_HHMMSS
+RUN_TIME = re.compile(r"_\d{8}_\d{6}$")
+
+# 取樣時 alpha 參數的附檔（與樣本檔同名）
+PARAMS_SUFFIX = ".params.json"
+
+
+def sample_params_path(file_path):
+    return f"{os.path.splitext(file_path)[0]}{PARAMS_SUFFIX}"
+
+
+def save_sample_params(file_path, params):
+    """
+    記錄產生樣本檔時的 alpha 參數，之後修改 alpha 不影響既有樣本的統計紀錄
+    :param file_path: 樣本 CSV 路徑
+    :param params: 參數名稱 -> 值，JSON 無法表示的值以 repr 記錄
+    """
+    with open(sample_params_path(file_path), "w", encoding="utf-8") as f:
+        json.dump(params, f, ensure_ascii=False, indent=2, sort_keys=True, default=repr)
+
+
+def load_sample_params(file_path):
+    """
+    :return: 取樣時記錄的參數，沒有附檔（舊樣本）或無法讀取時為 None
+    """
+    try:
+        with open(sample_params_path(file_path), "r", encoding="utf-8") as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
+
+
+def parse_sample_path(file_path):
+    """
+    解析 sample_output/<alpha>/<interval>_<alpha>_<exchange>_<pair>_<start>_<end>/<interval>_<alpha><note>_..._<time>.csv
+    :return: {"alpha", "interval", "exchange", "trading_pair", "start_date", "end_date", "note"}
+    """
+    directory = os.path.dirname(os.path.abspath(file_path))
+    alpha_name = os.path.basename(os.path.dirname(directory))
+    # K 棒規格可能含底線（例如 tick_1000），以 alpha 名稱切割
+    kline_interval, separator, rest = os.path.basename(directory).partition(f"_{alpha_name}_")
+    parts = rest.split("_")
+    if not separator or len(parts) != 4:
+        raise ValueError(f"Unrecognized sample path: {file_path}")
+    exchange, trading_pair, start_date, end_date = parts
+
+    # NOTE 位於 alpha 名稱與交易所之間；重新標註等衍生檔案無法辨識時留空
+    stem = os.path.splitext(os.path.basename(file_path))[0]
+    prefix, suffix = f"{kline_interval}_{alpha_name}", f"_{exchange}_{trading_pair}_{start_date}_{end_date}"
+    body = RUN_TIME.sub("", stem)
+    note = body[len(prefix) : -len(suffix)].lstrip("_") if body.startswith(prefix) and body.endswith(suffix) else ""
+
+    return {
+        "alpha": alpha_name,
+        "interval": kline_interval,
+        "exchange": exchange,
+        "trading_pair": trading_pair,
+        "start_date": start_date,
+        "end_date": end_date,
+        "note": note,
+    }
+
+
+def tidy_stats(stats, run, info, params=None, intervals=None):
+    """
+    :param stats: describe_sides() 的結果
+    :param run: run 名稱（樣本檔相對於 sample_output 的路徑）
+    :param info: parse_sample_path() 的結果
+    :param params: 取樣時的 alpha 參數，以 JSON 字串儲存；None（未記錄）寫為 null
+    :param intervals: bootstrap_sides() 的結果，寫為 <metric>_ci_low / <metric>_ci_high
+    :return: tidy DataFrame
+    """
+    frames = []
+    for side, side_stats in stats.items():
+        metrics = dict(side_stats)
+        for name, (low, high) in (intervals or {}).get(side, {}).items():
+            metrics[f"{name}_ci_low"] = low
+            metrics[f"{name}_ci_high"] = high
+        horizons = len(next(iter(metrics.values())))
+        names = list(metrics)
+        frames.append(
+            pd.DataFrame(
+                {
+                    "horizon": np.tile(np.arange(1, horizons + 1), len(names)),
+                    "side": side,
+                    "metric": np.repeat(names, horizons),
+                    "value": np.concatenate([np.asarray(metrics[name], dtype=np.float64) for name in names]),
+                }
+            )
+        )
+
+    df = pd.concat(frames, ignore_index=True)
+    df.insert(0, "run", run)
+    for position, (key, value) in enumerate(info.items(), start=1):
+        df.insert(position, key, value)
+    df.insert(len(info) + 1, "params", json.dumps(params, sort_keys=True, default=str))
+    return _categorize(df)
+
+
+def _categorize(df):
+    for column in CATEGORY_COLUMNS:
+        if column in df.columns:
+            df[column] = df[column].astype("category")
+    df["horizon"] = df["horizon"].astype(np.int16)
+    return df
+
+
+def save_stats_table(df, file_path):
+    """
+    寫入 <樣本檔名>_stats.parquet
+    :return: 輸出路徑
+    """
+    output_path = f"{os.path.splitext(file_path)[0]}_stats.parquet"
+    df.to_parquet(output_path, index=False)
+    return output_path
+
+
+def update_stats_index(table_paths, root, runs=None, index_path=None):
+    """
+    以新的 run 表更新彙總索引，同名 run 以新表取代
+    :param table_paths: 本次產生的 *_stats.parquet
+    :param root: sample_output 目錄
+    :param runs: 仍存在的 run 名稱，其他 run 自索引移除（None 為保留全部）
+    :return: 索引路徑
+    """
+    index_path = index_path or os.path.join(root, INDEX_FILENAME)
+    frames = [pd.read_parquet(table_path) for table_path in table_paths]
+    new_runs = {str(run) for frame in frames for run in frame["run"].unique()}
+
+    if os.path.exists(index_path):
+        index = pd.read_parquet(index_path)
+        keep = ~index["run"].astype(str).isin(new_runs)
+        if runs is not None:
+            keep &= index["run"].astype(str).isin(set(runs))
+        frames.insert(0, index[keep])
+
+    if not frames:
+        return index_path
+    # 類別欄位合併時先轉回字串，避免不同類別集合變成 object
+    combined = pd.concat([frame.astype({column: str for column in CATEGORY_COLUMNS if column in frame.columns}) for frame in frames], ignore_index=True)
+    temporary_path = f"{index_path}.tmp"
+    _categorize(combined).to_parquet(temporary_path, index=False)
+    os.replace(temporary_path, index_path)
+    return index_path
+
+
+def load_stats_index(root, index_path=None, columns=None, filters=None):
+    """
+    讀取彙總索引
+    :param filters: pyarrow 篩選條件，例如 [("metric", "==", "sharpe")]，只讀取符合的資料
+    """
+    return pd.read_parquet(index_path or os.path.join(root, INDEX_FILENAME), columns=columns, filters=filters)
+
+
+def leaderboard(index, metric="sharpe", side="Long", horizon=None, top=20, ascending=False):
+    """
+    依某個統計量排序的 run 排行榜
+    :param index: load_stats_index() 的結果
+    :param horizon: 指定 horizon，None 時取各 run 所有 horizon 中最佳的值
+    :return: 每個 run 一列的 DataFrame
+    """
+    selected = index[(index["metric"] == metric) & (index["side"] == side)]
+    if horizon is not None:
+        selected = selected[selected["horizon"] == horizon]
+    selected = selected.sort_values("value", ascending=ascending, kind="stable")
+    best = selected.drop_duplicates("run", keep="first")
+    columns = ["run", "alpha", "trading_pair", "interval", "start_date", "end_date", "note", "params", "horizon", "value"]
+    return best[columns].head(top).rename(columns={"value": metric}).reset_index(drop=True)
@@ -0,0 +1,233 @@
+"""
+單次掃描、可合併的串流統計
+
+樣本檔大於記憶體時逐塊（CSV chunk 或 Parquet row group）讀取，每塊更新累加器後即丟棄：
+    MomentAccumulator   樣本數、平均與二到四階中心動差和，以 Pébay 合併公式逐塊合併，結果與一次計算相同
+    TDigest             合併式 t-digest 分位數草圖，centroid 數量固定，誤差在分布兩端最小
+    ReturnAccumulator   每個 horizon 的動差、極值、勝場數、累乘報酬與分位數草圖
+記憶體只與 horizon 數與 compression 有關，與樣本數無關。
+"""
+
+import numpy as np
+import pandas as pd
+from src.horizon_stats import horizon_returns, moment_statistics
+
+# 預設每塊讀取的樣本數
+DEFAULT_CHUNKSIZE = 200_000
+
+# t-digest compression，centroid 數約為 compression / 2
+DEFAULT_COMPRESSION = 500
+
+
+class MomentAccumulator:
+    """
+    沿 axis 0 逐塊累加 (samples × horizons) 的動差
+    """
+
+    def __init__(self, horizons):
+        self.count = 0
+        self.mean = np.zeros(horizons)
+        self.m2 = np.zeros(horizons)
+        self.m3 = np.zeros(horizons)
+        self.m4 = np.zeros(horizons)
+
+    def update(self, values):
+        """
+        :param values: (samples × horizons) 陣列
+        """
+        if len(values) == 0:
+            return
+        mean = values.mean(axis=0)
+        deviation = values - mean
+        squared = deviation**2
+        self._combine(len(values), mean, squared.sum(axis=0), (squared * deviation).sum(axis=0), (squared**2).sum(axis=0))
+
+    def merge(self, other):
+        if other.count:
+            self._combine(other.count, other.mean, other.m2, other.m3, other.m4)
+
+    def _combine(self, count, mean, m2, m3, m4):
+        na, nb = self.count, count
+        n = na + nb
+        delta = mean - self.mean
+        # Pébay (2008) 的成對合併公式，右側皆使用合併前的值
+        m4_new = (
+            self.m4
+            + m4
+            + delta**4 * na * nb * (na * na - na * nb + nb * nb) / n**3
+            + 6 * delta**2 * (na * na * m2 + nb * nb * self.m2) / n**2
+            + 4 * delta * (na * m3 - nb * self.m3) / n
+        )
+        m3_new = self.m3 + m3 + delta**3 * na * nb * (na - nb) / n**2 + 3 * delta * (na * m2 - nb * self.m2) / n
+        self.m2 = self.m2 + m2 + delta**2 * na * nb / n
+        self.m3, self.m4 = m3_new, m4_new
+        self.mean = self.mean + delta * nb / n
+        self.count = n
+
+
+class TDigest:
+    """
+    合併式 t-digest（scale function k1）
+
+    每次 update 將新資料與既有 centroid 一起排序，依累積權重的 k1 值分桶後合併，
+    每桶的 k 範圍不超過 1，因此分位數誤差有上界且在兩端最小；最小值與最大值另外精確記錄。
+    """
+
+    def __init__(self, compression=DEFAULT_COMPRESSION):
+        self.compression = compression
+        self.means = np.zeros(0)
+        self.weights = np.zeros(0)
+        self.min = np.inf
+        self.max = -np.inf
+
+    def update(self, values, weights=None):
+        values = np.asarray(values, dtype=np.float64)
+        weights = np.ones(len(values)) if weights is None else np.asarray(weights, dtype=np.float64)
+        keep = ~np.isnan(values)
+        values, weights = values[keep], weights[keep]
+        if len(values) == 0:
+            return
+        self.min = min(self.min, values.min())
+        self.max = max(self.max, values.max())
+
+        means = np.concatenate([self.means, values])
+        weights = np.concatenate([self.weights, weights])
+        order = np.argsort(means, kind="stable")
+        means, weights = means[order], weights[order]
+
+        cumulative = np.cumsum(weights)
+        total = cumulative[-1]
+        # 以每個點的中心分位數決定所屬的 k 桶
+        q = (cumulative - weights / 2) / total
+        bucket = np.floor(self.compression / (2 * np.pi) * np.arcsin(2 * q - 1))
+        starts = np.flatnonzero(np.r_[True, bucket[1:] != bucket[:-1]])
+
+        self.weights = np.add.reduceat(weights, starts)
+        self.means = np.add.reduceat(means * weights, starts) / self.weights
+
+    def merge(self, other):
+        if len(other.weights):
+            self.update(other.means, other.weights)
+            self.min = min(self.min, other.min)
+            self.max = max(self.max, other.max)
+
+    def quantile(self, q):
+        """
+        :param q: 分位數（純量或陣列，0~1）
+        """
+        if len(self.weights) == 0:
+            return np.full(np.shape(q), np.nan)
+        cumulative = np.cumsum(self.weights)
+        centers = cumulative - self.weights / 2
+        positions = np.r_[0.0, centers, cumulative[-1]]
+        values = np.r_[self.min, self.means, self.max]
+        return np.interp(np.asarray(q) * cumulative[-1], positions, values)
+
+
+class ReturnAccumulator:
+    """
+    單一持倉方向、所有 horizon 的串流報酬統計，describe() 的鍵與 describe_returns 相同
+    """
+
+    def __init__(self, horizons, compression=DEFAULT_COMPRESSION):
+        self.horizons = horizons
+        self.moments = MomentAccumulator(horizons)
+        self.min = np.full(horizons, np.inf)
+        self.max = np.full(horizons, -np.inf)
+        self.wins = np.zeros(horizons, dtype=np.int64)
+        self.growth = np.ones(horizons)
+        self.digests = [TDigest(compression) for _ in range(horizons)]
+
+    def update(self, returns):
+        """
+        :param returns: (samples × horizons) 報酬矩陣（依時間順序）
+        """
+        if len(returns) == 0:
+            return
+        self.moments.update(returns)
+        self.min = np.minimum(self.min, returns.min(axis=0))
+        self.max = np.maximum(self.max, returns.max(axis=0))
+        self.wins += (returns > 0).sum(axis=0)
+        self.growth *= np.prod(1 + returns, axis=0)
+        for h, digest in enumerate(self.digests):
+            digest.update(returns[:, h])
+
+    def merge(self, other):
+        """
+        合併另一段（時間在後）的累加器
+        """
+        self.moments.merge(other.moments)
+        self.min = np.minimum(self.min, other.min)
+        self.max = np.maximum(self.max, other.max)
+        self.wins += other.wins
+        self.growth *= other.growth
+        for digest, other_digest in zip(self.digests, other.digests):
+            digest.merge(other_digest)
+
+    def describe(self):
+        """
+        :return: 與 describe_returns 相同的統計量；動差類為精確值，分位數為 t-digest 近似
+        """
+        n = self.moments.count
+        nan = np.full(self.horizons, np.nan)
+        stats = {"count": np.full(self.horizons, n)}
+        if n == 0:
+            for name in ["mean", "std", "min", "q25", "median", "q75", "max", "skew", "kurtosis", "sharpe", "win_rate", "total_return"]:
+                stats[name] = nan
+            return stats
+
+        stats.update(moment_statistics(n, self.moments.mean, self.moments.m2, self.moments.m3, self.moments.m4))
+        q25, median, q75 = np.array([digest.quantile([0.25, 0.5, 0.75]) for digest in self.digests]).T
+        stats.update(
+            {
+                "mean": self.moments.mean,
+                "min": self.min,
+                "q25": q25,
+                "median": median,
+                "q75": q75,
+                "max": self.max,
+                "win_rate": self.wins / n,
+                "total_return": self.growth - 1,
+            }
+        )
+        return stats
+
+
+def read_chunks(file_path, chunksize=DEFAULT_CHUNKSIZE):
+    """
+    逐塊讀取樣本檔；Parquet 以 row group 為單位（需要 pyarrow）
+    """
+    if str(file_path).endswith(".parquet"):
+        import pyarrow.parquet as pq
+
+        parquet_file = pq.ParquetFile(file_path)
+        for index in range(parquet_file.num_row_groups):
+            yield parquet_file.read_row_group(index).to_pandas()
+    else:
+        yield from pd.read_csv(file_path, chunksize=chunksize)
+
+
+def stream_describe_sides(chunks, validate=None, compression=DEFAULT_COMPRESSION):
+    """
+    單次掃描所有 chunk，計算與 describe_sides 相同格式的統計
+    :param chunks: DataFrame 的 iterable
+    :param validate: 每塊資料的檢查函數（例如 pnl_graph.validate_data）
+    :return: {"Long": stats, "Short": stats}
+    """
+    sides = None
+    columns = None
+    for chunk in chunks:
+        if validate:
+            validate(chunk)
+        chunk_columns, returns, is_buy = horizon_returns(chunk)
+        if sides is None:
+            columns = chunk_columns
+            sides = {"Long": ReturnAccumulator(len(columns), compression), "Short": ReturnAccumulator(len(columns), compression)}
+        elif chunk_columns != columns:
+            raise ValueError("Horizon columns differ between chunks")
+        sides["Long"].update(returns[is_buy])
+        sides["Short"].update(returns[~is_buy])
+
+    if sides is None:
+        raise ValueError("No samples")
+    return {side: accumulator.describe() for side, accumulator in sides.items()}
@@ -0,0 +1,49 @@
+import os
+import sys
+import numpy as np
+import pytest
+from pathlib import Path
+
+# Allow `python -m pytest` from any directory
+sys.path.insert(0, str(Path(os.path.dirname(os.path.abspath(__file__))).parent))
+
+from src.alpha_expr import compile_formula
+
+FORMULAS = [
+    "ts_sum(returns, 7) - ts_std(close, 10)",
+    "decay_linear(close, 6) / ts_mean(close, 5)",
+    "ts_rank(volume, 8) + ts_corr(close, volume, 12)",
+    "ts_spearman(close, vwap, 9)",
+    "sign(ts_delta(close, 1)) * abs(log(volume)) ^ 0.5",
+    "price_mom = close/ts_delay(close, 2) - 1; vol_mom = volume/ts_delay(volume, 1) - 1; 0.8 * ts_mean(price_mom - vol_mom, 2) + 0.2 * ts_mean(price_mom - vol_mom, 10)",
+]
+
+
+def make_data(n=300):
+    rng = np.random.default_rng(0)
+    close = 100 + np.cumsum(rng.normal(size=n))
+    close[50] = np.nan
+    return {"close": close, "volume": rng.uniform(1, 10, n), "quote_asset_volume": rng.uniform(100, 1000, n)}
+
+
+@pytest.mark.parametrize("formula", FORMULAS)
+def test_stream_matches_batch(formula):
+    data = make_data()
+    compiled = compile_formula(formula)
+    stream = compiled.stream()
+    streamed = [stream.update({name: values[i] for name, values in data.items()}) for i in range(len(data["close"]))]
+    np.testing.assert_allclose(streamed, compiled.evaluate(data), rtol=1e-9, atol=1e-9)
+
+
+def test_stream_missing_field_stays_aligned():
+    stream = compile_formula("ts_mean(volume, 3) + ts_delay(close, 2)").stream()
+    bars = [{"close": 1.0, "volume": 1.0}, {"close": 2.0}] + [{"close": float(i), "volume": float(i)} for i in range(3, 7)]
+    values = [stream.update(bar) for bar in bars]
+    assert np.isnan(values[:4]).all()
+    assert values[4:] == [4.0 + 3.0, 5.0 + 4.0]
+
+
+@pytest.mark.parametrize("formula", ["ts_mean(close)", "ts_mean(close, volume)", "ts_mean(close, 2.5)", "rank(close, 2)"])
+def test_invalid_calls_raise_syntax_error(formula):
+    with pytest.raises(SyntaxError):
+        compile_formula(formula)
@@ -0,0 +1,31 @@
+import os
+import sys
+from pathlib import Path
+
+# Allow `python -m pytest` from any directory
+sys.path.insert(0, str(Path(os.path.dirname(os.path.abspath(__file__))).parent))
+
+from src.alpha_registry import AlphaRegistry
+
+SOURCE = """from alpha.base_alpha import BaseAlpha
+
+
+class TupleAlpha(BaseAlpha):
+    WINDOWS = (5, 20)
+    PAIRS = {"BTCUSDT", "ETHUSDT"}
+    WEIGHTS = {1: 0.5, 2: 0.5}
+    TAG = b"v1"
+    NAME = "tuple"
+"""
+
+
+def test_cached_params_equal_cold_scan(tmp_path):
+    (tmp_path / "tuple_alpha.py").write_text(SOURCE, encoding="utf-8")
+
+    cold = AlphaRegistry(str(tmp_path)).params("TupleAlpha")
+    assert os.path.exists(tmp_path / ".registry_cache.json")
+    warm = AlphaRegistry(str(tmp_path)).params("TupleAlpha")
+
+    assert cold == {"WINDOWS": (5, 20), "PAIRS": {"BTCUSDT", "ETHUSDT"}, "WEIGHTS": {1: 0.5, 2: 0.5}, "TAG": b"v1", "NAME": "tuple"}
+    assert warm == cold
+    assert isinstance(warm["WINDOWS"], tuple)
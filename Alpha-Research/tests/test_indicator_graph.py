@@ -0,0 +1,47 @@
+import os
+import sys
+import numpy as np
+import pandas as pd
+from pathlib import Path
+
+# Allow `python -m pytest` from any directory
+sys.path.insert(0, str(Path(os.path.dirname(os.path.abspath(__file__))).parent))
+
+from src.indicator_graph import IndicatorGraph
+
+
+def make_frame(close):
+    close = np.asarray(close, dtype=np.float64)
+    return pd.DataFrame(
+        {
+            "open_time": pd.date_range("2024-01-01", periods=len(close), freq="1min"),
+            "open": close,
+            "high": close * 1.001,
+            "low": close * 0.999,
+            "close": close,
+            "volume": np.ones(len(close)),
+        }
+    )
+
+
+def test_same_timestamps_different_prices_do_not_share_cache():
+    graph = IndicatorGraph()
+    btc = make_frame(np.linspace(40000, 41000, 50))
+    eth = make_frame(np.linspace(2000, 2100, 50))
+
+    btc_ema = graph.get(btc, "ema", span=10)
+    eth_ema = graph.get(eth, "ema", span=10)
+
+    pd.testing.assert_series_equal(eth_ema, eth["close"].ewm(span=10, adjust=False).mean())
+    assert btc_ema.iloc[-1] != eth_ema.iloc[-1]
+    assert graph.get(eth, "true_range").iloc[-1] < 10
+
+
+def test_same_frame_is_computed_once():
+    graph = IndicatorGraph()
+    df = make_frame(np.linspace(100, 110, 30))
+    first = graph.get(df, "atr", window=5)
+    second = graph.get(df.copy(), "atr", window=5)
+
+    assert first is second
+    assert graph.computations[("atr", (("window", 5),), "close")] == 1